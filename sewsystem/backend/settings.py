@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 import os
 import sys
+import tempfile
 import warnings
 from pathlib import Path
 from django.core.management.utils import get_random_secret_key
@@ -66,8 +67,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'ewaste.middleware.MetricsMiddleware',
+    "ewaste.middleware.CompressionMiddleware",
     'django.middleware.security.SecurityMiddleware',
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "ewaste.middleware.StaticFilesMiddleware",
     'ewaste.middleware.SimpleCorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -102,10 +105,17 @@ WSGI_APPLICATION = "backend.wsgi.application"
 
 DATABASE_ENGINE = os.environ.get("DJANGO_DB_ENGINE", "django.db.backends.sqlite3")
 DATABASE_URL = os.environ.get("DATABASE_URL", "").strip()
+# Under ASGI every request runs its queries on a thread of its own, so persistent per-thread
+# connections pile up; DJANGO_DB_POOL=true (set by the ASGI profile) shares a psycopg pool instead.
+DATABASE_POOL = os.environ.get("DJANGO_DB_POOL", "false").lower() == "true"
 if DATABASE_URL:
     DATABASES = {
-        "default": dj_database_url.parse(DATABASE_URL, conn_max_age=600, ssl_require=IS_PRODUCTION),
+        "default": dj_database_url.parse(
+            DATABASE_URL, conn_max_age=0 if DATABASE_POOL else 600, ssl_require=IS_PRODUCTION
+        ),
     }
+    if DATABASE_POOL and DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+        DATABASES["default"].setdefault("OPTIONS", {})["pool"] = True
 elif DATABASE_ENGINE == "django.db.backends.sqlite3":
     DATABASES = {
         "default": {
@@ -126,6 +136,15 @@ else:
     }
 
 
+# EmailBackend handles email logins; ProfileModelBackend handles usernames. Both load the profile with
+# the session user. A failed login must not fall through to a second ModelBackend and hash again;
+# migration ewaste 0015 moved sessions stored under ModelBackend to ProfileModelBackend.
+AUTHENTICATION_BACKENDS = [
+    "ewaste.backends.EmailBackend",
+    "ewaste.backends.ProfileModelBackend",
+]
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -166,6 +185,76 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Rendered monthly PDFs, shared by all workers on the host. File names embed the month's data
+# version, so stale files are never read; older versions are removed when a newer one is rendered.
+REPORT_CACHE_DIR = os.environ.get(
+    "DJANGO_REPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sewsystem-report-cache")
+)
+
+# Background monthly report jobs (POST /api/reports/jobs/), rendered by an in-process thread pool.
+REPORT_JOB_WORKERS = int(os.environ.get("DJANGO_REPORT_JOB_WORKERS", "2"))
+REPORT_JOB_DIR = os.environ.get("DJANGO_REPORT_JOB_DIR", os.path.join(tempfile.gettempdir(), "sewsystem-report-jobs"))
+# A job is failed as abandoned once its heartbeat is this old; the process holding it refreshes the
+# heartbeat every REPORT_JOB_HEARTBEAT_SECONDS while it waits in the pool and while it renders.
+REPORT_JOB_STALE_SECONDS = int(os.environ.get("DJANGO_REPORT_JOB_STALE_SECONDS", "600"))
+REPORT_JOB_HEARTBEAT_SECONDS = int(os.environ.get("DJANGO_REPORT_JOB_HEARTBEAT_SECONDS", "60"))
+REPORT_JOB_RETENTION_SECONDS = int(os.environ.get("DJANGO_REPORT_JOB_RETENTION_SECONDS", str(24 * 3600)))
+# Run jobs inline instead of on the pool (tests and debugging).
+REPORT_JOBS_EAGER = os.environ.get("DJANGO_REPORT_JOBS_EAGER", "false").lower() == "true"
+
+# Login/registration/password-reset rate limits live in a SQLite file shared by all workers on the
+# host, so the limit holds across gunicorn workers.
+RATE_LIMIT_DB = os.environ.get(
+    "DJANGO_RATE_LIMIT_DB",
+    os.path.join(
+        tempfile.mkdtemp(prefix="sewsystem-test-") if IS_TESTING else tempfile.gettempdir(),
+        "sewsystem-ratelimit.sqlite3",
+    ),
+)
+
+# Per-view request metrics served at /api/metrics. Each worker process writes a snapshot file to
+# METRICS_DIR and the endpoint merges them. gunicorn.conf.py clears it when gunicorn starts.
+METRICS_ENABLED = os.environ.get("DJANGO_METRICS", "true").lower() == "true"
+METRICS_DIR = os.environ.get(
+    "DJANGO_METRICS_DIR",
+    os.path.join(
+        tempfile.mkdtemp(prefix="sewsystem-test-") if IS_TESTING else tempfile.gettempdir(),
+        "sewsystem-metrics",
+    ),
+)
+METRICS_FLUSH_SECONDS = float(os.environ.get("DJANGO_METRICS_FLUSH_SECONDS", "5"))
+# Lets a Prometheus scraper authenticate with "Authorization: Bearer <token>" instead of a session.
+METRICS_TOKEN = os.environ.get("DJANGO_METRICS_TOKEN", "")
+
+# Resolve URLconfs, import heavy modules and check the database when a WSGI/ASGI worker boots, so the
+# first requests after a cold start (or a free-plan wake-up) do not pay for it.
+STARTUP_WARMUP = os.environ.get("DJANGO_STARTUP_WARMUP", "true").lower() == "true"
+
+# Server-sent events feed (GET /api/requests/events/, ASGI only).
+SSE_POLL_SECONDS = float(os.environ.get("DJANGO_SSE_POLL_SECONDS", "1"))
+SSE_HEARTBEAT_SECONDS = float(os.environ.get("DJANGO_SSE_HEARTBEAT_SECONDS", "15"))
+SSE_MAX_SECONDS = float(os.environ.get("DJANGO_SSE_MAX_SECONDS", "300"))
+SSE_RETRY_MS = int(os.environ.get("DJANGO_SSE_RETRY_MS", "3000"))
+REQUEST_EVENT_RETENTION_DAYS = int(os.environ.get("DJANGO_REQUEST_EVENT_RETENTION_DAYS", "7"))
+
+# Keyset pagination for GET /api/requests/ (opt-in via ?page_size= or ?cursor=).
+REQUESTS_PAGE_SIZE = int(os.environ.get("DJANGO_REQUESTS_PAGE_SIZE", "50"))
+REQUESTS_MAX_PAGE_SIZE = int(os.environ.get("DJANGO_REQUESTS_MAX_PAGE_SIZE", "200"))
+# Rows fetched per database round trip by the streaming export and the PDF report.
+EXPORT_CHUNK_SIZE = int(os.environ.get("DJANGO_EXPORT_CHUNK_SIZE", "2000"))
+# Upper bound on (request_id, collector_id) pairs accepted by POST /api/requests/assign/bulk/.
+BULK_ASSIGN_MAX_ITEMS = int(os.environ.get("DJANGO_BULK_ASSIGN_MAX_ITEMS", "1000"))
+# Time allowed for 2-opt improvement of a collector's route in GET /api/routes/.
+ROUTE_OPTIMIZE_SECONDS = float(os.environ.get("DJANGO_ROUTE_OPTIMIZE_SECONDS", "0.5"))
+# GET /api/requests/nearby/ defaults and caps.
+NEARBY_DEFAULT_RADIUS_KM = float(os.environ.get("DJANGO_NEARBY_DEFAULT_RADIUS_KM", "5"))
+NEARBY_MAX_RADIUS_KM = float(os.environ.get("DJANGO_NEARBY_MAX_RADIUS_KM", "50"))
+NEARBY_DEFAULT_LIMIT = int(os.environ.get("DJANGO_NEARBY_DEFAULT_LIMIT", "50"))
+NEARBY_MAX_LIMIT = int(os.environ.get("DJANGO_NEARBY_MAX_LIMIT", "200"))
+# Serve dashboard stats from the materialized StatusCounter rows instead of a table scan.
+# Run `python manage.py rebuild_status_counters` after turning this on.
+STATUS_COUNTERS_ENABLED = os.environ.get("DJANGO_STATUS_COUNTERS", "false").lower() == "true"
+
 # React dev server support.
 FRONTEND_ORIGIN = _normalize_origin(os.environ.get("FRONTEND_ORIGIN", "http://127.0.0.1:5173"))
 FRONTEND_ORIGINS = _env_list(
@@ -178,6 +267,11 @@ CSRF_TRUSTED_ORIGINS = _env_list(
     f"{FRONTEND_ORIGIN},http://127.0.0.1:5173,http://localhost:5173,https://*.vercel.app",
 )
 CSRF_TRUSTED_ORIGINS = [_normalize_origin(origin) for origin in CSRF_TRUSTED_ORIGINS]
+# Seconds browsers may cache a CORS preflight (Chromium caps this at 7200); 0 disables caching.
+CORS_PREFLIGHT_MAX_AGE = int(os.environ.get("DJANGO_CORS_PREFLIGHT_MAX_AGE", "7200"))
+# Responses of at least this many bytes are gzip-compressed for clients that accept it (streams
+# never are); 0 turns compression off.
+GZIP_MIN_BYTES = int(os.environ.get("DJANGO_GZIP_MIN_BYTES", "1024"))
 
 if IS_PRODUCTION:
     SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
@@ -0,0 +1,60 @@
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    # Benchmarks seed large tables, so they never touch the configured database. Point
+    # BENCH_DATABASE_URL at a scratch PostgreSQL database to benchmark there instead of SQLite.
+    bench_url = os.environ.get("BENCH_DATABASE_URL", "").strip()
+    os.environ.pop("DATABASE_URL", None)
+    if bench_url:
+        os.environ["DATABASE_URL"] = bench_url
+    else:
+        os.environ["DJANGO_DB_ENGINE"] = "django.db.backends.sqlite3"
+        os.environ["DJANGO_DB_NAME"] = os.path.join(tempfile.mkdtemp(prefix="sewbench-"), "bench.sqlite3")
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    os.environ.setdefault("DJANGO_SECRET_KEY", "benchmark-only-secret")
+    sys.path.insert(0, str(BASE_DIR))
+
+    import django
+
+    django.setup()
+
+
+def seed(apps, rows, users=500, collectors=25, batch_size=5000, seed_value=42, area=None, tag=""):
+    # Same data as `manage.py seed_requests`, against historical model states so a benchmark can
+    # seed before later migrations run (area needs migration 0013).
+    from ewaste.seeding import seed_requests
+
+    return seed_requests(
+        rows,
+        users=users,
+        collectors=collectors,
+        batch_size=batch_size,
+        seed_value=seed_value,
+        area=area,
+        tag=tag,
+        apps=apps,
+    )
+
+
+def timed(fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
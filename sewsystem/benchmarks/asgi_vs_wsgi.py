@@ -0,0 +1,219 @@
+"""
+Throughput and tail latency of the hot read endpoints served by gunicorn (WSGI, the old Render
+profile) and by uvicorn (ASGI), on a freshly seeded throwaway database.
+
+    python benchmarks/asgi_vs_wsgi.py --rows 100000 --workers 2 --concurrency 32 --seconds 10
+
+A local SQLite file answers in microseconds, which hides what the ASGI profile is for: waiting on a
+database across the network. --db-latency-ms adds that round trip to every query in the servers.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+
+from _common import BASE_DIR, free_port, seed, setup_django
+
+SERVERS = {
+    "wsgi (gunicorn)": ["gunicorn", "backend.wsgi:application", "--workers", "{workers}", "--bind", "127.0.0.1:{port}"],
+    "asgi (uvicorn)": [
+        "uvicorn",
+        "backend.asgi:application",
+        "--workers",
+        "{workers}",
+        "--port",
+        "{port}",
+        "--no-access-log",
+    ],
+}
+
+
+# Loaded by the server processes through PYTHONPATH; sleeping releases the GIL like socket I/O does.
+LATENCY_HOOK = """
+import os
+import time
+
+from django.db.backends.signals import connection_created
+
+DELAY = float(os.environ["BENCH_DB_LATENCY_MS"]) / 1000
+
+
+def _delay(execute, sql, params, many, context):
+    time.sleep(DELAY)
+    return execute(sql, params, many, context)
+
+
+def _install(sender, connection, **kwargs):
+    if _delay not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_delay)
+
+
+connection_created.connect(_install, weak=False)
+"""
+
+
+def _latency_env(latency_ms):
+    if not latency_ms:
+        return dict(os.environ)
+    hook_dir = tempfile.mkdtemp(prefix="sewbench-hook-")
+    with open(os.path.join(hook_dir, "sitecustomize.py"), "w") as handle:
+        handle.write(textwrap.dedent(LATENCY_HOOK))
+    return {
+        **os.environ,
+        "BENCH_DB_LATENCY_MS": str(latency_ms),
+        "PYTHONPATH": os.pathsep.join(filter(None, [hook_dir, os.environ.get("PYTHONPATH")])),
+    }
+
+
+def _wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+async def _get(state, port, path, cookie):
+    # Minimal HTTP/1.1 keep-alive client; reconnects when the server closes (gunicorn sync workers
+    # close after every response, which is part of what is being measured).
+    if state.get("writer") is None:
+        state["reader"], state["writer"] = await asyncio.open_connection("127.0.0.1", port)
+    reader, writer = state["reader"], state["writer"]
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nCookie: {cookie}\r\n\r\n".encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length, close = 0, False
+    while True:
+        line = (await reader.readline()).strip().lower()
+        if not line:
+            break
+        name, _, value = line.partition(b":")
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"connection" and value.strip() == b"close":
+            close = True
+    await reader.readexactly(length)
+    if close:
+        writer.close()
+        state["writer"] = None
+    return status
+
+
+async def _load(port, paths, cookie, concurrency, seconds):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def client(offset):
+        nonlocal errors
+        state = {}
+        index = offset
+        while time.perf_counter() < deadline:
+            path = paths[index % len(paths)]
+            index += 1
+            started = time.perf_counter()
+            try:
+                status = await _get(state, port, path, cookie)
+            except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+                state["writer"] = None
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors += 1
+        if state.get("writer") is not None:
+            state["writer"].close()
+
+    await asyncio.gather(*(client(offset) for offset in range(concurrency)))
+    return latencies, errors
+
+
+def _report(name, latencies, errors, seconds):
+    if not latencies:
+        print(f"{name:<18} no successful requests ({errors} errors)")
+        return
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{name:<18} {len(latencies) / seconds:8.1f} req/s   p50 {quantiles[49] * 1000:7.1f} ms   "
+        f"p95 {quantiles[94] * 1000:7.1f} ms   p99 {quantiles[98] * 1000:7.1f} ms   errors {errors}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--db-latency-ms", type=float, default=0, help="Simulated database round trip per query.")
+    args = parser.parse_args()
+
+    os.environ.update(
+        {
+            "DJANGO_DEBUG": "false",
+            "DJANGO_ALLOWED_HOSTS": "127.0.0.1",
+            "DJANGO_SECRET_KEY": "benchmark-only-secret",
+            "DJANGO_METRICS": "false",
+        }
+    )
+    setup_django()
+    from django.apps import apps
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+
+    call_command("migrate", verbosity=0)
+    print(f"Seeding {args.rows} requests on {connection.vendor}...")
+    user_ids, _ = seed(apps, args.rows)
+    call_command("backfill_daily_rollup", verbosity=0, stdout=open(os.devnull, "w"))
+    if connection.vendor == "sqlite":
+        connection.cursor().execute("ANALYZE")
+    admin = User.objects.create_user(username="bench_admin", is_staff=True)
+    client = Client()
+    client.force_login(admin)
+    cookie = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+    some_request = apps.get_model("ewaste", "EWasteRequest").objects.filter(user_id=user_ids[0]).first()
+    paths = [
+        "/api/me/",
+        "/api/requests/?page_size=50",
+        f"/api/requests/{some_request.id}/",
+        "/api/dashboard/stats/",
+    ]
+    connection.close()
+
+    print(
+        f"{args.workers} worker(s), {args.concurrency} concurrent clients, {args.seconds:g}s per server, "
+        f"{args.db_latency_ms:g} ms added per query, cycling {', '.join(paths)}"
+    )
+    server_env = _latency_env(args.db_latency_ms)
+    for name, command in SERVERS.items():
+        port = free_port()
+        server = subprocess.Popen(
+            [part.format(workers=args.workers, port=port) for part in command],
+            cwd=BASE_DIR,
+            env=server_env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            _wait_for(port)
+            asyncio.run(_load(port, paths, cookie, args.concurrency, 1))  # warm up
+            latencies, errors = asyncio.run(_load(port, paths, cookie, args.concurrency, args.seconds))
+            _report(name, latencies, errors, args.seconds)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""
+Plan and apply timings for the workload-balanced auto-assignment engine on a freshly
+seeded throwaway database (about 20% of the seeded requests are pending).
+
+    python benchmarks/auto_assign.py --rows 150000
+"""
+import argparse
+import time
+
+from _common import seed, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=150_000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.apps import apps
+    from django.core.management import call_command
+    from django.db import connection
+
+    from ewaste.assignment import apply_plan, plan_assignments
+    from ewaste.counters import rebuild_counters
+
+    call_command("migrate", verbosity=0)
+    print(f"Seeding {args.rows} requests on {connection.vendor}...")
+    seed(apps, args.rows)
+    call_command("backfill_daily_rollup", verbosity=0)
+    rebuild_counters()
+
+    start = time.perf_counter()
+    plan = plan_assignments()
+    planned = time.perf_counter() - start
+    print(f"plan:  {len(plan['assignments'])} requests over {len(plan['collectors'])} collectors in {planned:.2f} s")
+
+    start = time.perf_counter()
+    assigned = apply_plan(plan)
+    print(f"apply: {assigned} requests in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
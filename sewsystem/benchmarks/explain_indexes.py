@@ -0,0 +1,76 @@
+"""
+EXPLAIN plans and timings for the EWasteRequest hot queries before and after the
+0004 composite indexes, on a freshly seeded throwaway database.
+
+    python benchmarks/explain_indexes.py --rows 500000
+"""
+import argparse
+from datetime import date
+
+from _common import seed, setup_django, timed
+
+BEFORE = ("ewaste", "0003_remove_servicerating")
+AFTER = ("ewaste", "0004_ewasterequest_indexes")
+
+
+def _hot_queries(EWasteRequest, user_id, collector_id, year, month):
+    from django.db.models import Count
+
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    completed = EWasteRequest.objects.filter(status="completed")
+    return [
+        ("user request list", EWasteRequest.objects.filter(user_id=user_id).order_by("-created_at")[:50]),
+        (
+            "collector request list",
+            EWasteRequest.objects.filter(assigned_collector_id=collector_id).order_by("-created_at")[:50],
+        ),
+        ("admin keyset page", EWasteRequest.objects.order_by("-created_at", "-id")[:50]),
+        ("pending count", EWasteRequest.objects.filter(status="pending").values("status").annotate(n=Count("id"))),
+        (
+            "monthly report (__year/__month)",
+            completed.filter(pickup_date__year=year, pickup_date__month=month).order_by("pickup_date"),
+        ),
+        (
+            "monthly report (half-open range)",
+            completed.filter(pickup_date__gte=start, pickup_date__lt=end).order_by("pickup_date"),
+        ),
+    ]
+
+
+def _report(label, EWasteRequest, user_id, collector_id, year, month):
+    print(f"\n=== {label} ===")
+    for name, qs in _hot_queries(EWasteRequest, user_id, collector_id, year, month):
+        elapsed = timed(lambda: list(qs.all()))
+        print(f"\n-- {name}: {elapsed * 1000:.2f} ms (median of 5)")
+        for line in qs.explain().splitlines():
+            print(f"   {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.management import call_command
+    from django.db import connection
+    from django.db.migrations.executor import MigrationExecutor
+
+    call_command("migrate", BEFORE[0], BEFORE[1], verbosity=0)
+    apps = MigrationExecutor(connection).loader.project_state(BEFORE).apps
+    EWasteRequest = apps.get_model("ewaste", "EWasteRequest")
+    print(f"Seeding {args.rows} requests on {connection.vendor}...")
+    user_ids, collector_ids = seed(apps, args.rows)
+    today = date.today()
+    year, month = (today.year - 1, today.month)
+
+    _report("before (0003)", EWasteRequest, user_ids[0], collector_ids[0], year, month)
+    call_command("migrate", AFTER[0], AFTER[1], verbosity=0)
+    if connection.vendor == "sqlite":
+        connection.cursor().execute("ANALYZE")
+    _report("after (0004)", EWasteRequest, user_ids[0], collector_ids[0], year, month)
+
+
+if __name__ == "__main__":
+    main()
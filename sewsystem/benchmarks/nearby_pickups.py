@@ -0,0 +1,50 @@
+"""
+"Pending pickups within X km" through the grid_cell index at growing table sizes. The rows
+around the search point stay fixed while the table grows elsewhere, so the query plan and
+timing should stay flat.
+
+    python benchmarks/nearby_pickups.py --rows 100000 400000 1600000
+"""
+import argparse
+
+from _common import seed, setup_django, timed
+
+SEARCH = (-6.16, 39.19)  # Stone Town
+AROUND_SEARCH = (-6.36, -5.96, 38.99, 39.39)
+# Both sides of the search box, so cell ids below and above it grow.
+ELSEWHERE = (-11.0, -1.0, 30.0, 40.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 400_000])
+    parser.add_argument("--local-rows", type=int, default=20_000)
+    parser.add_argument("--radius-km", type=float, default=5.0)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.apps import apps
+    from django.core.management import call_command
+    from django.db import connection
+
+    from ewaste.models import EWasteRequest
+    from ewaste.spatial import cells_within, nearby
+
+    call_command("migrate", verbosity=0)
+    seed(apps, args.local_rows, area=AROUND_SEARCH, tag="local")
+    pending = EWasteRequest.objects.filter(status=EWasteRequest.STATUS_PENDING, grid_cell__isnull=False)
+    seeded = args.local_rows
+    for round_number, rows in enumerate(sorted(args.rows)):
+        seed(apps, rows - seeded, seed_value=round_number, area=ELSEWHERE, tag=f"r{round_number}")
+        seeded = rows
+        if connection.vendor == "sqlite":
+            connection.cursor().execute("ANALYZE")
+        matches = nearby(pending, *SEARCH, args.radius_km, 200)
+        elapsed = timed(lambda: nearby(pending, *SEARCH, args.radius_km, 200))
+        print(f"\n{rows} rows: {len(matches)} pending within {args.radius_km} km in {elapsed * 1000:.2f} ms")
+        for line in pending.filter(grid_cell__in=cells_within(*SEARCH, args.radius_km)).explain().splitlines():
+            print(f"   {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Filtered and full-text searched GET /api/requests/ pages (page_size=50, admin scope) on a
+freshly seeded throwaway database.
+
+    python benchmarks/request_search.py --rows 1000000
+"""
+import argparse
+
+from _common import seed, setup_django, timed
+
+QUERIES = (
+    ("status filter", {"status": "pending"}),
+    ("status + date range", {"status": "completed", "from": "2025-01-01", "to": "2025-01-31"}),
+    ("collector filter", {"collector_id": "{collector}"}),
+    ("search: common term", {"q": "laptop"}),
+    ("search: rare term", {"q": "plot 4321"}),
+    ("search + status", {"q": "printer", "status": "pending"}),
+    ("search: no match", {"q": "zzzz"}),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.apps import apps
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+
+    settings.ALLOWED_HOSTS = ["*"]
+    call_command("migrate", verbosity=0)
+    print(f"Seeding {args.rows} requests on {connection.vendor}...")
+    _, collector_ids = seed(apps, args.rows)
+    if connection.vendor == "sqlite":
+        connection.cursor().execute("ANALYZE")
+
+    client = Client()
+    client.force_login(User.objects.create_superuser("bench_admin", "bench_admin@example.com", "x"))
+    for name, params in QUERIES:
+        params = {key: value.format(collector=collector_ids[0]) for key, value in params.items()}
+        params["page_size"] = "50"
+        response = client.get("/api/requests/", params)
+        assert response.status_code == 200, response.content
+        elapsed = timed(lambda: client.get("/api/requests/", params))
+        print(f"{name:24} {len(response.json()['results']):3} rows  {elapsed * 1000:8.2f} ms (median of 5)")
+
+
+if __name__ == "__main__":
+    main()
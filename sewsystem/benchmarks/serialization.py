@@ -0,0 +1,64 @@
+"""
+Request list serialization: model instances through views._serialize_request() versus the values_list()
+rows of ewaste.serialization, plus what gzip does to the payload.
+
+    python benchmarks/serialization.py --rows 10000 100000
+
+Both paths must produce the same JSON bytes; the script stops if they differ.
+"""
+import argparse
+import sys
+
+from _common import seed, setup_django, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.apps import apps
+    from django.core.management import call_command
+    from django.db import connection
+    from django.http import JsonResponse
+    from django.middleware.gzip import GZipMiddleware
+    from django.utils.text import compress_string
+
+    from ewaste.models import EWasteRequest
+    from ewaste.serialization import request_rows, serialize_request_row
+    from ewaste.views import _serialize_request
+
+    call_command("migrate", verbosity=0)
+    print(f"Seeding {max(args.rows)} requests on {connection.vendor}...")
+    seed(apps, max(args.rows))
+    base = EWasteRequest.objects.select_related("user", "assigned_collector").order_by("-created_at", "-id")
+
+    for rows in args.rows:
+        qs = base[:rows]
+
+        def instances():
+            return JsonResponse([_serialize_request(req) for req in qs.all()], safe=False).content
+
+        def values_rows():
+            return JsonResponse([serialize_request_row(row) for row in request_rows(qs)], safe=False).content
+
+        body = values_rows()
+        if instances() != body:
+            raise SystemExit("The two serializers produced different JSON")
+        before = timed(instances, repeat=args.repeat)
+        after = timed(values_rows, repeat=args.repeat)
+        compressed = compress_string(body, max_random_bytes=GZipMiddleware.max_random_bytes)
+        gzip_seconds = timed(
+            lambda: compress_string(body, max_random_bytes=GZipMiddleware.max_random_bytes), repeat=args.repeat
+        )
+        print(
+            f"{rows:>7} rows   instances {before * 1000:8.1f} ms   values_list {after * 1000:8.1f} ms   "
+            f"x{before / after:4.1f}   body {len(body) / 1024:8.0f} KiB -> gzip {len(compressed) / 1024:6.0f} KiB "
+            f"in {gzip_seconds * 1000:6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Time to first response of a freshly started server, with and without the startup warmup, on a freshly
+seeded throwaway database.
+
+    python benchmarks/startup.py --rows 20000 --workers 2 --runs 3
+
+Each run starts the server, sends GET /api/me/ until it answers, then asks for a monthly PDF report: the
+first response includes the worker's boot, and the report the imports it needs. "cold" turns the warmup
+off (DJANGO_STARTUP_WARMUP=false); "preload" boots the app once in the gunicorn master before forking.
+"""
+import argparse
+import http.client
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from _common import BASE_DIR, free_port, seed, setup_django
+
+GUNICORN = ["gunicorn", "backend.wsgi:application", "--workers", "{workers}", "--bind", "127.0.0.1:{port}"]
+UVICORN = ["uvicorn", "backend.asgi:application", "--workers", "{workers}", "--port", "{port}", "--no-access-log"]
+# The Render profile: uvicorn workers forked by a gunicorn master.
+GUNICORN_UVICORN = [
+    "gunicorn",
+    "backend.asgi:application",
+    "-k",
+    "uvicorn_worker.UvicornWorker",
+    "--workers",
+    "{workers}",
+    "--bind",
+    "127.0.0.1:{port}",
+]
+PROFILES = (
+    ("wsgi cold", GUNICORN, False),
+    ("wsgi warm", GUNICORN, True),
+    ("wsgi warm preload", GUNICORN + ["--preload"], True),
+    ("asgi cold", UVICORN, False),
+    ("asgi warm", UVICORN, True),
+    ("asgi warm preload", GUNICORN_UVICORN + ["--preload"], True),
+)
+
+
+def _get(port, path, cookie, timeout=60):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        connection.request("GET", path, headers={"Cookie": cookie})
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def _first_response(port, cookie, started, timeout=60):
+    deadline = started + timeout
+    while time.perf_counter() < deadline:
+        try:
+            status = _get(port, "/api/me/", cookie)
+        except (ConnectionError, http.client.RemoteDisconnected):
+            time.sleep(0.005)
+            continue
+        if status != 200:
+            raise RuntimeError(f"GET /api/me/ answered {status}")
+        return time.perf_counter() - started
+    raise RuntimeError(f"server on port {port} did not answer")
+
+
+def _run(command, warmup, workers, cookie, month, env):
+    port = free_port()
+    run_env = {
+        **env,
+        "DJANGO_STARTUP_WARMUP": "true" if warmup else "false",
+        # A fresh cache, so the report is rendered rather than read back from an earlier run.
+        "DJANGO_REPORT_CACHE_DIR": tempfile.mkdtemp(prefix="sewbench-reports-"),
+    }
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [part.format(workers=workers, port=port) for part in command],
+        cwd=BASE_DIR,
+        env=run_env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        first = _first_response(port, cookie, started)
+        report_started = time.perf_counter()
+        status = _get(port, f"/api/reports/monthly-pdf/?month={month}", cookie)
+        if status != 200:
+            raise RuntimeError(f"monthly report answered {status}")
+        return first, time.perf_counter() - report_started
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--runs", type=int, default=3, help="Server starts per profile; medians are reported.")
+    args = parser.parse_args()
+
+    os.environ.update(
+        {
+            "DJANGO_DEBUG": "false",
+            "DJANGO_ALLOWED_HOSTS": "127.0.0.1",
+            "DJANGO_SECRET_KEY": "benchmark-only-secret",
+            "DJANGO_METRICS": "false",
+        }
+    )
+    setup_django()
+    from django.apps import apps
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+
+    call_command("migrate", verbosity=0)
+    print(f"Seeding {args.rows} requests on {connection.vendor}...")
+    seed(apps, args.rows)
+    admin = User.objects.create_user(username="bench_admin", is_staff=True)
+    client = Client()
+    client.force_login(admin)
+    cookie = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+    month = apps.get_model("ewaste", "EWasteRequest").objects.filter(status="completed").latest("pickup_date")
+    month = month.pickup_date.strftime("%Y-%m")
+    connection.close()
+
+    print(f"{args.workers} worker(s), median of {args.runs} starts, report month {month}")
+    for name, command, warmup in PROFILES:
+        samples = [_run(command, warmup, args.workers, cookie, month, os.environ) for _ in range(args.runs)]
+        first = statistics.median(sample[0] for sample in samples)
+        report = statistics.median(sample[1] for sample in samples)
+        print(f"{name:<18} first response {first * 1000:7.0f} ms   first report {report * 1000:7.0f} ms")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+import heapq
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import EWasteRequest, UserProfile
+from .tracking import record_request_changes
+
+
+def write_assignments(pairs):
+    # pairs: (request, collector_id) with the requests loaded (and locked) by the caller inside its
+    # transaction. Only the collector differs between rows, so this is one UPDATE per collector
+    # (per 500 ids). QuerySet.update skips auto_now and post_save, so updated_at and the
+    # counters/rollup/report/event tracking are handled here.
+    now = timezone.now()
+    changes = []
+    ids_by_collector = defaultdict(list)
+    for req, collector_id in pairs:
+        previous = req._loaded_state
+        req.assigned_collector_id = collector_id
+        req.status = EWasteRequest.STATUS_ASSIGNED
+        req.assigned_at = now
+        req.updated_at = now
+        changes.append((req, previous))
+        ids_by_collector[collector_id].append(req.pk)
+    for collector_id, ids in ids_by_collector.items():
+        for start in range(0, len(ids), 500):
+            EWasteRequest.objects.filter(pk__in=ids[start:start + 500]).update(
+                assigned_collector_id=collector_id,
+                status=EWasteRequest.STATUS_ASSIGNED,
+                assigned_at=now,
+                updated_at=now,
+            )
+    if changes:
+        record_request_changes(changes)
+    return len(changes)
+
+
+def _open_load(collector_ids):
+    # (collector, pickup_date) -> open assignment count, and collector -> open quantity, in one query.
+    per_day = defaultdict(int)
+    quantity = dict.fromkeys(collector_ids, 0)
+    rows = (
+        EWasteRequest.objects.filter(status=EWasteRequest.STATUS_ASSIGNED, assigned_collector_id__in=collector_ids)
+        .values_list("assigned_collector_id", "pickup_date")
+        .annotate(count=Count("id"), quantity=Sum("quantity"))
+        .order_by()
+    )
+    for collector_id, pickup_date, count, total in rows:
+        per_day[collector_id, pickup_date] = count
+        quantity[collector_id] += total or 0
+    return per_day, quantity
+
+
+def plan_assignments():
+    """Spread every pending request over the active collectors.
+
+    Requests are handled day by day, largest quantity first; each goes to the collector with the
+    fewest open assignments on that pickup date, ties broken by total open quantity. A per-day heap
+    keeps this at O(n log c) for n pending requests and c collectors.
+    """
+    collector_ids = list(
+        User.objects.filter(profile__role=UserProfile.ROLE_COLLECTOR, is_active=True)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    plan = {"assignments": [], "collectors": {cid: {"assigned": 0, "quantity": 0} for cid in collector_ids}}
+    if not collector_ids:
+        return plan
+
+    per_day, quantity = _open_load(collector_ids)
+    pending = (
+        EWasteRequest.objects.filter(status=EWasteRequest.STATUS_PENDING)
+        .order_by("pickup_date", "-quantity", "id")
+        .values_list("id", "pickup_date", "quantity")
+    )
+    heap = []
+    current_day = None
+    for request_id, pickup_date, item_quantity in pending.iterator(chunk_size=2000):
+        if pickup_date != current_day:
+            # Only the popped collector's key changes while a day is processed, so one heap per
+            # day built from the running totals stays exact.
+            current_day = pickup_date
+            heap = [(per_day[cid, pickup_date], quantity[cid], cid) for cid in collector_ids]
+            heapq.heapify(heap)
+        day_count, total, collector_id = heap[0]
+        heapq.heapreplace(heap, (day_count + 1, total + item_quantity, collector_id))
+        per_day[collector_id, pickup_date] = day_count + 1
+        quantity[collector_id] = total + item_quantity
+        plan["assignments"].append((request_id, collector_id))
+        summary = plan["collectors"][collector_id]
+        summary["assigned"] += 1
+        summary["quantity"] += item_quantity
+    return plan
+
+
+def apply_plan(plan):
+    # Writes the plan in one transaction. Requests that stopped being pending since the plan was
+    # computed, or whose collector lost the role, are skipped rather than overwritten.
+    collector_by_request = dict(plan["assignments"])
+    if not collector_by_request:
+        return 0
+    with transaction.atomic():
+        collectors = set(
+            User.objects.filter(
+                id__in=set(collector_by_request.values()),
+                profile__role=UserProfile.ROLE_COLLECTOR,
+                is_active=True,
+            ).values_list("id", flat=True)
+        )
+        requests_by_id = (
+            EWasteRequest.objects.select_for_update()
+            .filter(status=EWasteRequest.STATUS_PENDING)
+            .in_bulk(list(collector_by_request))
+        )
+        return write_assignments(
+            (req, collector_by_request[request_id])
+            for request_id, req in requests_by_id.items()
+            if collector_by_request[request_id] in collectors
+        )
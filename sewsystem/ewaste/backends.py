@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from .models import users_with_email
+
+UserModel = get_user_model()
+
+
+class ProfileModelBackend(ModelBackend):
+    # Loads the session user together with its profile, so role checks in views need no extra query.
+    def get_user(self, user_id):
+        try:
+            user = UserModel._default_manager.select_related("profile").get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        # request.auser() in async views; ModelBackend's version would drop the profile join.
+        try:
+            user = await UserModel._default_manager.select_related("profile").aget(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+class EmailBackend(ProfileModelBackend):
+    # Resolves exactly one account through the LOWER(email) index, so an email login costs a single
+    # password hash no matter how the address is cased.
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if not email or password is None:
+            return None
+        user = users_with_email(email).first()
+        if user is None:
+            # Run the hasher anyway so response time does not reveal whether the email exists.
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import EWasteRequest, StatusCounter
+from .rollups import rollup_status_counts, rollup_status_rows, status_totals
+
+STATUSES = tuple(status for status, _ in EWasteRequest.STATUS_CHOICES)
+
+
+def counters_enabled():
+    return getattr(settings, "STATUS_COUNTERS_ENABLED", False)
+
+
+def live_status_counts():
+    # One conditional-aggregate scan instead of a COUNT per status.
+    aggregates = {status: Count("id", filter=Q(status=status)) for status in STATUSES}
+    return EWasteRequest.objects.aggregate(total=Count("id"), **aggregates)
+
+
+def stored_status_counts():
+    return status_totals(StatusCounter.objects.values_list("status", "count"))
+
+
+def status_counts():
+    # O(1) with materialized counters, otherwise O(days) from the daily rollup.
+    return stored_status_counts() if counters_enabled() else rollup_status_counts()
+
+
+async def astatus_counts():
+    rows = StatusCounter.objects.values_list("status", "count") if counters_enabled() else rollup_status_rows()
+    return status_totals([row async for row in rows])
+
+
+def apply_deltas(deltas):
+    # deltas: {status: signed change}. Must run inside the caller's transaction.
+    for status, delta in deltas.items():
+        if not delta:
+            continue
+        updated = StatusCounter.objects.filter(status=status).update(count=F("count") + delta)
+        if not updated:
+            StatusCounter.objects.get_or_create(status=status)
+            StatusCounter.objects.filter(status=status).update(count=F("count") + delta)
+
+
+def record_transition(previous, current):
+    if not counters_enabled() or previous == current:
+        return
+    deltas = {}
+    if previous:
+        deltas[previous] = -1
+    if current:
+        deltas[current] = deltas.get(current, 0) + 1
+    apply_deltas(deltas)
+
+
+def record_transitions(pairs):
+    # Batched form of record_transition for bulk writes that bypass save().
+    if not counters_enabled():
+        return
+    deltas = {}
+    for previous, current in pairs:
+        if previous == current:
+            continue
+        if previous:
+            deltas[previous] = deltas.get(previous, 0) - 1
+        if current:
+            deltas[current] = deltas.get(current, 0) + 1
+    apply_deltas(deltas)
+
+
+def rebuild_counters():
+    with transaction.atomic():
+        live = live_status_counts()
+        for status in STATUSES:
+            StatusCounter.objects.update_or_create(status=status, defaults={"count": live[status]})
+    return live
+
+
+def counter_drift():
+    live = live_status_counts()
+    stored = stored_status_counts()
+    return {key: (stored[key], live[key]) for key in live if stored[key] != live[key]}
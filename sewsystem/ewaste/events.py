@@ -0,0 +1,91 @@
+import asyncio
+import json
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import EWasteRequest, RequestEvent, UserProfile
+
+
+def event_kind(previous, current):
+    if previous is None:
+        return RequestEvent.KIND_CREATED
+    if current["status"] == EWasteRequest.STATUS_ASSIGNED and (
+        previous["status"] != current["status"]
+        or previous["assigned_collector_id"] != current["assigned_collector_id"]
+    ):
+        return RequestEvent.KIND_ASSIGNED
+    if previous["status"] != current["status"]:
+        return RequestEvent.KIND_STATUS_CHANGED
+    return None
+
+
+def record_request_events(pairs):
+    # pairs: (request, previous tracked state); runs in the transaction that wrote the requests.
+    events = []
+    for req, previous in pairs:
+        kind = event_kind(previous, req.tracked_state())
+        if kind:
+            events.append(
+                RequestEvent(
+                    request_id=req.id,
+                    kind=kind,
+                    status=req.status,
+                    user_id=req.user_id,
+                    collector_id=req.assigned_collector_id,
+                )
+            )
+    if events:
+        RequestEvent.objects.bulk_create(events)
+        if random.random() < 0.01:
+            cutoff = timezone.now() - timedelta(days=settings.REQUEST_EVENT_RETENTION_DAYS)
+            RequestEvent.objects.filter(created_at__lt=cutoff).delete()
+
+
+def scoped_events(user, role):
+    qs = RequestEvent.objects.all()
+    if role == UserProfile.ROLE_USER:
+        qs = qs.filter(user=user)
+    elif role == UserProfile.ROLE_COLLECTOR:
+        qs = qs.filter(collector=user)
+    return qs
+
+
+def format_event(event):
+    payload = {
+        "id": event.id,
+        "type": event.kind,
+        "request_id": event.request_id,
+        "status": event.status,
+        "created_at": event.created_at.isoformat(),
+    }
+    return f"id: {event.id}\nevent: {event.kind}\ndata: {json.dumps(payload)}\n\n"
+
+
+async def latest_event_id():
+    last = await RequestEvent.objects.order_by("-id").values_list("id", flat=True).afirst()
+    return last or 0
+
+
+async def event_stream(user, role, last_id):
+    # Polls the indexed event log for rows after last_id. The stream ends after SSE_MAX_SECONDS so
+    # sessions are re-checked; EventSource reconnects on its own and resumes through Last-Event-ID.
+    yield f"retry: {settings.SSE_RETRY_MS}\n\n"
+    deadline = time.monotonic() + settings.SSE_MAX_SECONDS
+    last_sent = time.monotonic()
+    events = scoped_events(user, role).order_by("id")
+    while time.monotonic() < deadline:
+        batch = [event async for event in events.filter(id__gt=last_id)[:100]]
+        for event in batch:
+            last_id = event.id
+            yield format_event(event)
+        if batch:
+            last_sent = time.monotonic()
+            continue
+        if time.monotonic() - last_sent >= settings.SSE_HEARTBEAT_SECONDS:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(settings.SSE_POLL_SECONDS)
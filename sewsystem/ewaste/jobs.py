@@ -0,0 +1,143 @@
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import ReportJob
+from .reports import open_monthly_report
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+# Ids of the jobs this process has queued or is running; guarded by _executor_lock.
+_held = set()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.REPORT_JOB_WORKERS, thread_name_prefix="report-job"
+            )
+            threading.Thread(target=_heartbeat_loop, name="report-job-heartbeat", daemon=True).start()
+        return _executor
+
+
+def _beat():
+    # Marks the jobs this process holds as alive, however long they wait in the pool or render.
+    with _executor_lock:
+        held = list(_held)
+    if held:
+        ReportJob.objects.filter(pk__in=held, status__in=ReportJob.ACTIVE_STATUSES).update(heartbeat_at=timezone.now())
+
+
+def _heartbeat_loop():
+    while True:
+        time.sleep(settings.REPORT_JOB_HEARTBEAT_SECONDS)
+        close_old_connections()
+        try:
+            _beat()
+        except Exception:
+            logger.exception("Report job heartbeat failed")
+        finally:
+            connection.close()
+
+
+def job_output_path(job_id):
+    return os.path.join(settings.REPORT_JOB_DIR, f"{job_id}.pdf")
+
+
+def _expire_stale_jobs():
+    # A job whose worker process died never finishes, and its heartbeat stops; stop duplicates from
+    # attaching to it forever.
+    now = timezone.now()
+    ReportJob.objects.filter(
+        status__in=ReportJob.ACTIVE_STATUSES,
+        heartbeat_at__lt=now - timedelta(seconds=settings.REPORT_JOB_STALE_SECONDS),
+    ).update(status=ReportJob.STATUS_FAILED, error="Job timed out", finished_at=now)
+
+    expired = ReportJob.objects.exclude(status__in=ReportJob.ACTIVE_STATUSES).filter(
+        created_at__lt=now - timedelta(seconds=settings.REPORT_JOB_RETENTION_SECONDS)
+    )
+    for job_id in expired.values_list("id", flat=True):
+        try:
+            os.remove(job_output_path(job_id))
+        except FileNotFoundError:
+            pass
+    expired.delete()
+
+
+def submit_monthly_report(year, month, user):
+    # Returns (job, created); a job still in flight for the same month and admin is reused.
+    _expire_stale_jobs()
+    month_start = date(year, month, 1)
+    active = ReportJob.objects.filter(month=month_start, requested_by=user, status__in=ReportJob.ACTIVE_STATUSES)
+    job = active.first()
+    if job:
+        return job, False
+    try:
+        with transaction.atomic():
+            job = ReportJob.objects.create(month=month_start, requested_by=user)
+    except IntegrityError:
+        # Lost the race against a concurrent submission from another worker. The winner may have
+        # finished since, in which case it is still the newest job for the month.
+        job = ReportJob.objects.filter(month=month_start, requested_by=user).order_by("-created_at").first()
+        if job is None:
+            raise
+        return job, False
+
+    if settings.REPORT_JOBS_EAGER:
+        _run_job(job.id)
+        job.refresh_from_db()
+    else:
+        executor = _get_executor()
+        with _executor_lock:
+            _held.add(job.id)
+        executor.submit(_run_job_in_thread, job.id)
+    return job, True
+
+
+def _run_job_in_thread(job_id):
+    close_old_connections()
+    try:
+        _run_job(job_id)
+    finally:
+        with _executor_lock:
+            _held.discard(job_id)
+        connection.close()
+
+
+def _run_job(job_id):
+    job = ReportJob.objects.select_related("requested_by").get(pk=job_id)
+    # Each transition only applies from the state it expects: a job failed as abandoned stays failed,
+    # and a newer job may already own its month.
+    started = ReportJob.objects.filter(pk=job_id, status=ReportJob.STATUS_QUEUED).update(
+        status=ReportJob.STATUS_RUNNING, heartbeat_at=timezone.now()
+    )
+    if not started:
+        return
+    try:
+        os.makedirs(settings.REPORT_JOB_DIR, exist_ok=True)
+        path = job_output_path(job_id)
+        with open_monthly_report(job.month.year, job.month.month, job.requested_by.username) as source:
+            with open(f"{path}.tmp", "wb") as target:
+                shutil.copyfileobj(source, target)
+        os.replace(f"{path}.tmp", path)
+    except Exception as exc:
+        logger.exception("Monthly report job %s failed", job_id)
+        ReportJob.objects.filter(pk=job_id, status=ReportJob.STATUS_RUNNING).update(
+            status=ReportJob.STATUS_FAILED, error=str(exc)[:255], finished_at=timezone.now()
+        )
+        return
+    ReportJob.objects.filter(pk=job_id, status=ReportJob.STATUS_RUNNING).update(
+        status=ReportJob.STATUS_DONE, finished_at=timezone.now()
+    )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from ewaste.assignment import apply_plan, plan_assignments
+
+
+class Command(BaseCommand):
+    help = "Spread pending requests across collectors, balancing open assignments per pickup date."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--apply",
+            action="store_true",
+            help="Write the plan in one transaction. Without it the plan is only previewed.",
+        )
+
+    def handle(self, *args, **options):
+        plan = plan_assignments()
+        if not plan["collectors"]:
+            self.stdout.write(self.style.WARNING("No active collectors; nothing to assign."))
+            return
+
+        for collector_id, summary in plan["collectors"].items():
+            self.stdout.write(
+                f"collector {collector_id}: +{summary['assigned']} requests, +{summary['quantity']} items"
+            )
+        if options["apply"]:
+            assigned = apply_plan(plan)
+            self.stdout.write(self.style.SUCCESS(f"Assigned {assigned} of {len(plan['assignments'])} planned requests."))
+        else:
+            self.stdout.write(f"Dry run: {len(plan['assignments'])} requests would be assigned. Pass --apply to write.")
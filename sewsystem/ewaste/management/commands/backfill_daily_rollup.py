@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ewaste.rollups import rebuild_rollup, rollup_drift
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily collection rollup from the request history and verify it."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only compare the rollup with the request table; exit non-zero on drift.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if not options["check"]:
+            rebuild_rollup(batch_size=options["batch_size"])
+
+        drift = rollup_drift()
+        if drift:
+            raise CommandError(f"Daily rollup differs from the request table in {len(drift)} group(s)")
+        self.stdout.write(self.style.SUCCESS("Daily rollup matches the request table."))
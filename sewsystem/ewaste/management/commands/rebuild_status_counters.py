@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ewaste.counters import counter_drift, rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized request status counters and verify them against the live table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only compare the stored counters with the live table; exit non-zero on drift.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["check"]:
+            counts = rebuild_counters()
+            self.stdout.write(", ".join(f"{key}={value}" for key, value in counts.items()))
+
+        drift = counter_drift()
+        if drift:
+            details = ", ".join(f"{key}: stored={stored} live={live}" for key, (stored, live) in drift.items())
+            raise CommandError(f"Status counters drifted from the live table ({details})")
+        self.stdout.write(self.style.SUCCESS("Status counters match the live table."))
@@ -0,0 +1,59 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ewaste.counters import rebuild_counters
+from ewaste.models import EWasteRequest
+from ewaste.reports import bump_report_versions
+from ewaste.rollups import rebuild_rollup
+from ewaste.seeding import seed_requests
+
+
+class Command(BaseCommand):
+    help = "Bulk-seed users, collectors and requests across statuses and months for load and query testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000, help="Requests to create.")
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--collectors", type=int, default=25)
+        parser.add_argument("--months", type=int, default=24, help="Months of pickup dates to spread rows over.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42, help="Random seed, for repeatable data.")
+        parser.add_argument(
+            "--tag",
+            default="",
+            help="Username tag; use a new one to seed a database that was seeded before.",
+        )
+
+    def handle(self, *args, **options):
+        for name in ("rows", "users", "collectors", "months", "batch_size"):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1")
+        tag = options["tag"]
+        if User.objects.filter(username=f"seed{tag}_user_0").exists():
+            raise CommandError("This database was already seeded with that --tag; pass a different one.")
+
+        with transaction.atomic():
+            seed_requests(
+                options["rows"],
+                users=options["users"],
+                collectors=options["collectors"],
+                months=options["months"],
+                batch_size=options["batch_size"],
+                seed_value=options["seed"],
+                tag=tag,
+            )
+            # bulk_create skipped the per-row bookkeeping, so rebuild the derived tables in one pass.
+            rebuild_counters()
+            rebuild_rollup(batch_size=options["batch_size"])
+            bump_report_versions(
+                EWasteRequest.objects.filter(status=EWasteRequest.STATUS_COMPLETED)
+                .dates("pickup_date", "month")
+                .order_by()
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {options['rows']} requests for {options['users']} users and "
+                f"{options['collectors']} collectors."
+            )
+        )
@@ -0,0 +1,178 @@
+import atexit
+import glob
+import json
+import os
+import secrets
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class MetricsStore:
+    """Per-process request metrics, flushed as a JSON snapshot to ``<directory>/<pid>-<token>.json``.
+
+    Recording only touches in-memory dicts; the snapshot is rewritten at most every
+    ``flush_seconds`` (and at exit). The exposition merges every worker's file, so counters are
+    aggregated across gunicorn workers without a shared server. Files of exited workers are kept
+    so counters never go backwards, and the random token keeps a worker that reuses an old pid
+    from overwriting one. The gunicorn master clears the directory at start (gunicorn.conf.py).
+    """
+
+    def __init__(self, directory, flush_seconds):
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # Called again in a forked child, which gets a file of its own.
+        self._file_name = f"{os.getpid()}-{secrets.token_hex(4)}.json"
+        self._requests = defaultdict(int)  # (view, method, status) -> count
+        self._latency = {}  # view -> [per-bucket counts..., +Inf count, sum]
+        self._sizes = {}  # view -> [per-bucket counts..., +Inf count, sum]
+        self._queries = defaultdict(lambda: [0, 0.0])  # view -> [queries, seconds]
+        self._next_flush = time.monotonic() + self.flush_seconds
+
+    def observe(self, view, method, status, seconds, queries, query_seconds, size):
+        latency_bucket = bisect_left(LATENCY_BUCKETS, seconds)
+        size_bucket = bisect_left(SIZE_BUCKETS, size) if size is not None else None
+        with self._lock:
+            self._requests[view, method, status] += 1
+            latency = self._latency.get(view)
+            if latency is None:
+                latency = self._latency[view] = [0] * (len(LATENCY_BUCKETS) + 2)
+            latency[latency_bucket] += 1
+            latency[-1] += seconds
+            if size_bucket is not None:
+                sizes = self._sizes.get(view)
+                if sizes is None:
+                    sizes = self._sizes[view] = [0] * (len(SIZE_BUCKETS) + 2)
+                sizes[size_bucket] += 1
+                sizes[-1] += size
+            totals = self._queries[view]
+            totals[0] += queries
+            totals[1] += query_seconds
+            flush_due = time.monotonic() >= self._next_flush
+            if flush_due:
+                self._next_flush = time.monotonic() + self.flush_seconds
+        if flush_due:
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": [[*key, count] for key, count in self._requests.items()],
+                "latency": {view: list(values) for view, values in self._latency.items()},
+                "sizes": {view: list(values) for view, values in self._sizes.items()},
+                "queries": {view: list(values) for view, values in self._queries.items()},
+            }
+
+    def flush(self):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as handle:
+            json.dump(self.snapshot(), handle)
+        os.replace(tmp_path, os.path.join(self.directory, self._file_name))
+
+    def after_fork(self):
+        # A forked worker must not re-report what its parent recorded.
+        self._lock = threading.Lock()
+        self._reset()
+
+
+def clear_snapshots(directory):
+    # Counters restart with the service; snapshots from the previous run's workers must not be
+    # merged into them.
+    for path in glob.glob(os.path.join(directory, "*.json")) + glob.glob(os.path.join(directory, "*.tmp")):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def merged_snapshot(directory):
+    merged = {"requests": defaultdict(int), "latency": {}, "sizes": {}, "queries": {}}
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        try:
+            with open(path) as handle:
+                snapshot = json.load(handle)
+        except (OSError, ValueError):
+            continue
+        for view, method, status, count in snapshot["requests"]:
+            merged["requests"][view, method, status] += count
+        for name in ("latency", "sizes", "queries"):
+            for view, values in snapshot[name].items():
+                current = merged[name].setdefault(view, [0] * len(values))
+                merged[name][view] = [a + b for a, b in zip(current, values)]
+    return merged
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram(lines, name, help_text, buckets, series):
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for view, values in sorted(series.items()):
+        cumulative = 0
+        for bound, count in zip((*buckets, "+Inf"), values[:-1]):
+            cumulative += count
+            lines.append(f'{name}_bucket{{view="{_label(view)}",le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{view="{_label(view)}"}} {values[-1]}')
+        lines.append(f'{name}_count{{view="{_label(view)}"}} {cumulative}')
+
+
+def render_prometheus(snapshot):
+    lines = [
+        "# HELP ewaste_http_requests_total Responses by URL name, method and status.",
+        "# TYPE ewaste_http_requests_total counter",
+    ]
+    for (view, method, status), count in sorted(snapshot["requests"].items()):
+        labels = f'view="{_label(view)}",method="{_label(method)}",status="{status}"'
+        lines.append(f"ewaste_http_requests_total{{{labels}}} {count}")
+    _histogram(
+        lines,
+        "ewaste_http_request_duration_seconds",
+        "Time to build the response.",
+        LATENCY_BUCKETS,
+        snapshot["latency"],
+    )
+    _histogram(
+        lines,
+        "ewaste_http_response_size_bytes",
+        "Response body size; streams of unknown length are skipped.",
+        SIZE_BUCKETS,
+        snapshot["sizes"],
+    )
+    for index, (name, help_text) in enumerate(
+        (
+            ("ewaste_db_queries_total", "Database queries run while handling requests."),
+            ("ewaste_db_query_seconds_total", "Time spent in database queries while handling requests."),
+        )
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for view, values in sorted(snapshot["queries"].items()):
+            lines.append(f'{name}{{view="{_label(view)}"}} {values[index]}')
+    return "\n".join(lines) + "\n"
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = MetricsStore(settings.METRICS_DIR, settings.METRICS_FLUSH_SECONDS)
+                atexit.register(_store.flush)
+                os.register_at_fork(after_in_child=_store.after_fork)
+    return _store
@@ -1,56 +1,250 @@
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
 from django.http import HttpResponse
 from django.conf import settings
+from django.middleware.gzip import GZipMiddleware, re_accepts_gzip
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .metrics import get_store
+from .streaming import stream_file_async
+
+# Distinct Origin values remembered per process; browsers send a handful, scanners many.
+ORIGIN_MEMO_SIZE = 512
+
+ALLOW_HEADERS = "Content-Type, Authorization, X-CSRFToken"
+ALLOW_METHODS = "GET, POST, PATCH, PUT, DELETE, OPTIONS"
 
 
 def _normalize_origin(origin):
     return (origin or "").strip().rstrip("/")
 
 
-def _origin_matches(origin, allowed_origin):
-    if not origin or not allowed_origin:
-        return False
-    if allowed_origin == origin:
-        return True
-    if "*." not in allowed_origin:
-        return False
+class OriginMatcher:
+    """Allowed origins compiled into an exact-match set and a wildcard suffix table.
 
-    allowed_scheme, _, allowed_host = allowed_origin.partition("://")
-    origin_scheme, _, origin_host = origin.partition("://")
-    if not allowed_host or allowed_scheme != origin_scheme:
-        return False
-    if not allowed_host.startswith("*."):
+    ``https://*.example.com`` allows strict subdomains only (``https://a.example.com``, not
+    ``https://example.com``), on the same scheme. Decisions are memoized per origin.
+    """
+
+    def __init__(self, allowed_origins):
+        self.exact = set()
+        self.suffixes = set()  # (scheme, ".example.com")
+        for allowed in map(_normalize_origin, allowed_origins):
+            scheme, _, host = allowed.partition("://")
+            if scheme and host.startswith("*.") and len(host) > 2:
+                self.suffixes.add((scheme, host[1:]))
+            elif allowed:
+                self.exact.add(allowed)
+        self.allows = lru_cache(maxsize=ORIGIN_MEMO_SIZE)(self._allows)
+
+    def _allows(self, origin):
+        if not origin:
+            return False
+        if origin in self.exact:
+            return True
+        if not self.suffixes:
+            return False
+        scheme, _, host = origin.partition("://")
+        # Every ".label.label" tail of the host that leaves at least one label in front.
+        dot = host.find(".")
+        while dot > 0:
+            if (scheme, host[dot:]) in self.suffixes:
+                return True
+            dot = host.find(".", dot + 1)
         return False
 
-    suffix = allowed_host[1:]  # keep the leading dot for strict subdomain matching
-    return origin_host.endswith(suffix) and origin_host != allowed_host[2:]
 
+class _DualModeMiddleware:
+    # Runs natively under both handlers. Under ASGI, a single sync-only middleware makes Django run
+    # the request through a worker thread and back, so every layer here is async-capable.
+    sync_capable = True
+    async_capable = True
 
-class SimpleCorsMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+
+class StaticFilesMiddleware(_DualModeMiddleware, WhiteNoiseMiddleware):
+    # WhiteNoise itself is sync-only. Lookups are dict hits on the startup file index; only serving a
+    # file touches the disk.
+    def __init__(self, get_response):
+        WhiteNoiseMiddleware.__init__(self, get_response)
+        _DualModeMiddleware.__init__(self, get_response)
 
     def __call__(self, request):
+        if self.async_mode:
+            return self._acall(request)
+        return WhiteNoiseMiddleware.__call__(self, request)
+
+    async def _acall(self, request):
+        static_file = self.find_file(request.path_info) if self.autorefresh else self.files.get(request.path_info)
+        if static_file is not None:
+            return stream_file_async(await sync_to_async(self.serve)(static_file, request))
+        return await self.get_response(request)
+
+
+class SimpleCorsMiddleware(_DualModeMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.fallback_origin = _normalize_origin(getattr(settings, "FRONTEND_ORIGIN", ""))
+        self.matcher = OriginMatcher([*getattr(settings, "FRONTEND_ORIGINS", []), self.fallback_origin])
+        self.preflight_max_age = str(getattr(settings, "CORS_PREFLIGHT_MAX_AGE", 0))
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self._acall(request)
         if request.method == "OPTIONS":
-            response = HttpResponse(status=204)
-        else:
-            response = self.get_response(request)
+            return self._add_headers(request, HttpResponse(status=204))
+        return self._add_headers(request, self.get_response(request))
+
+    async def _acall(self, request):
+        if request.method == "OPTIONS":
+            return self._add_headers(request, HttpResponse(status=204))
+        return self._add_headers(request, await self.get_response(request))
 
+    def _add_headers(self, request, response):
         origin = _normalize_origin(request.headers.get("Origin"))
-        allowed_origins = [
-            _normalize_origin(candidate) for candidate in getattr(settings, "FRONTEND_ORIGINS", [])
-        ]
-        fallback_origin = _normalize_origin(getattr(settings, "FRONTEND_ORIGIN", ""))
-        if fallback_origin:
-            allowed_origins.append(fallback_origin)
-
-        origin_allowed = any(_origin_matches(origin, allowed) for allowed in allowed_origins)
-        if origin and origin_allowed:
+        if origin and self.matcher.allows(origin):
             response["Access-Control-Allow-Origin"] = origin
-            response["Vary"] = "Origin"
-        elif not origin and fallback_origin:
-            response["Access-Control-Allow-Origin"] = fallback_origin
-            response["Vary"] = "Origin"
-        response["Access-Control-Allow-Headers"] = "Content-Type, Authorization, X-CSRFToken"
-        response["Access-Control-Allow-Methods"] = "GET, POST, PATCH, PUT, DELETE, OPTIONS"
+            patch_vary_headers(response, ("Origin",))
+        elif not origin and self.fallback_origin:
+            response["Access-Control-Allow-Origin"] = self.fallback_origin
+            patch_vary_headers(response, ("Origin",))
+        response["Access-Control-Allow-Headers"] = ALLOW_HEADERS
+        response["Access-Control-Allow-Methods"] = ALLOW_METHODS
         response["Access-Control-Allow-Credentials"] = "true"
+        if request.method == "OPTIONS" and self.preflight_max_age != "0":
+            # Lets the browser reuse this preflight for later POST/PATCH calls to the same URL.
+            response["Access-Control-Max-Age"] = self.preflight_max_age
+        return response
+
+
+class CompressionMiddleware(_DualModeMiddleware):
+    # Django's GZipMiddleware, except that it is dual-mode (GZipMiddleware hops to a worker thread on
+    # every ASGI request), has a configurable threshold, and leaves streams alone: compressing them
+    # would hold back server-sent events and squeeze already-compressed PDFs again.
+
+    def __init__(self, get_response):
+        if not settings.GZIP_MIN_BYTES:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.min_bytes = settings.GZIP_MIN_BYTES
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self._acall(request)
+        return self._compress(request, self.get_response(request))
+
+    async def _acall(self, request):
+        return self._compress(request, await self.get_response(request))
+
+    def _compress(self, request, response):
+        if response.streaming or len(response.content) < self.min_bytes or response.has_header("Content-Encoding"):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if not re_accepts_gzip.search(request.META.get("HTTP_ACCEPT_ENCODING", "")):
+            return response
+        # Random filler in the gzip header, as in GZipMiddleware, blunts BREACH-style length probing.
+        compressed = compress_string(response.content, max_random_bytes=GZipMiddleware.max_random_bytes)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            # The compressed bytes differ, so the tag may only claim semantic equivalence.
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = "gzip"
+        return response
+
+
+# Anything else is reported as "other" so clients cannot mint label values.
+METRIC_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+# [queries, seconds] of the request being handled; None outside MetricsMiddleware.
+_query_totals = ContextVar("ewaste_query_totals", default=None)
+
+
+def _count_query(execute, sql, params, many, context):
+    totals = _query_totals.get()
+    if totals is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        totals[0] += 1
+        totals[1] += time.perf_counter() - started
+
+
+def _install_query_counter(sender, connection, **kwargs):
+    # Installed once per connection rather than per request: entering execute_wrapper() on every
+    # request costs more than the rest of the middleware combined.
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+class MetricsMiddleware(_DualModeMiddleware):
+    # Outermost, so latency covers the rest of the middleware stack. Labels come from the resolved
+    # URL name; unresolved paths share one "unmatched" label.
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.store = get_store()
+        connection_created.connect(_install_query_counter, dispatch_uid="ewaste_metrics_query_counter")
+        for connection in connections.all(initialized_only=True):
+            _install_query_counter(None, connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self._acall(request)
+        totals = [0, 0.0]
+        token = _query_totals.set(totals)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_totals.reset(token)
+        return self._record(request, response, time.perf_counter() - started, totals)
+
+    async def _acall(self, request):
+        # Async ORM calls run in a copy of this context, so they add to the same totals list.
+        totals = [0, 0.0]
+        token = _query_totals.set(totals)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_totals.reset(token)
+        return self._record(request, response, time.perf_counter() - started, totals)
+
+    def _record(self, request, response, elapsed, totals):
+        match = request.resolver_match
+        if response.streaming:
+            length = response.get("Content-Length")
+            size = int(length) if length else None
+        else:
+            size = len(response.content)
+        self.store.observe(
+            match.view_name if match else "unmatched",
+            request.method if request.method in METRIC_METHODS else "other",
+            response.status_code,
+            elapsed,
+            totals[0],
+            totals[1],
+            size,
+        )
         return response
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ewaste", "0003_remove_servicerating"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ewasterequest",
+            index=models.Index(fields=["user", "-created_at"], name="ewaste_req_user_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ewasterequest",
+            index=models.Index(fields=["assigned_collector", "-created_at"], name="ewaste_req_coll_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ewasterequest",
+            index=models.Index(fields=["-created_at", "-id"], name="ewaste_req_created_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ewasterequest",
+            index=models.Index(fields=["status", "pickup_date"], name="ewaste_req_status_pickup_idx"),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ewaste", "0004_ewasterequest_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatusCounter",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "Pending"), ("assigned", "Assigned"), ("completed", "Completed"), ("cancelled", "Cancelled")],
+                        max_length=20,
+                        unique=True,
+                    ),
+                ),
+                ("count", models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
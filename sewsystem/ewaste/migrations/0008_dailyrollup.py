@@ -0,0 +1,62 @@
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rollup(apps, schema_editor):
+    EWasteRequest = apps.get_model("ewaste", "EWasteRequest")
+    DailyRollup = apps.get_model("ewaste", "DailyRollup")
+    groups = (
+        EWasteRequest.objects.values("pickup_date", "status", "item_type", "assigned_collector_id")
+        .annotate(count=Count("id"), quantity=Sum("quantity"))
+        .order_by()
+    )
+    DailyRollup.objects.bulk_create(
+        (
+            DailyRollup(
+                date=row["pickup_date"],
+                status=row["status"],
+                item_type=row["item_type"],
+                collector_id=row["assigned_collector_id"] or 0,
+                count=row["count"],
+                quantity=row["quantity"],
+            )
+            for row in groups.iterator()
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ewaste", "0007_reportjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "Pending"), ("assigned", "Assigned"), ("completed", "Completed"), ("cancelled", "Cancelled")],
+                        max_length=20,
+                    ),
+                ),
+                ("item_type", models.CharField(max_length=120)),
+                ("collector_id", models.BigIntegerField(default=0)),
+                ("count", models.BigIntegerField(default=0)),
+                ("quantity", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "indexes": [models.Index(fields=["status", "date"], name="ewaste_rollup_status_date_idx")],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("date", "status", "item_type", "collector_id"), name="ewaste_dailyrollup_key"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
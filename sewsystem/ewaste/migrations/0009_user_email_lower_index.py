@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def resolve_duplicate_emails(apps, schema_editor):
+    # Case-insensitive duplicates keep the oldest account (the one login and password reset already
+    # resolved to); newer duplicates lose the email and keep signing in with their username.
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    duplicated = (
+        User.objects.exclude(email="")
+        .annotate(email_lower=Lower("email"))
+        .values("email_lower")
+        .annotate(total=Count("id"))
+        .filter(total__gt=1)
+        .values_list("email_lower", flat=True)
+    )
+    for email_lower in list(duplicated):
+        ids = list(
+            User.objects.annotate(email_lower=Lower("email"))
+            .filter(email_lower=email_lower)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        User.objects.filter(id__in=ids[1:]).update(email="")
+
+
+# Uniqueness ignores blank emails (username-only accounts); lookups use the full expression index.
+EMAIL_INDEXES = (
+    ("ewaste_user_email_lower_uniq", "CREATE UNIQUE INDEX {name} ON {table} (LOWER({email})) WHERE {email} <> ''"),
+    ("ewaste_user_email_lower_idx", "CREATE INDEX {name} ON {table} (LOWER({email}))"),
+)
+
+
+def create_email_indexes(apps, schema_editor):
+    # The user table belongs to AUTH_USER_MODEL, so its name and column come from the model rather
+    # than being spelled out.
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    quote = schema_editor.quote_name
+    table, email = quote(User._meta.db_table), quote(User._meta.get_field("email").column)
+    for name, sql in EMAIL_INDEXES:
+        schema_editor.execute(sql.format(name=quote(name), table=table, email=email))
+
+
+def drop_email_indexes(apps, schema_editor):
+    for name, _ in EMAIL_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(name)}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ewaste", "0008_dailyrollup"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(resolve_duplicate_emails, migrations.RunPython.noop),
+        migrations.RunPython(create_email_indexes, drop_email_indexes),
+    ]
@@ -0,0 +1,14 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ewaste", "0009_user_email_lower_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ewasterequest",
+            index=models.Index(fields=["updated_at"], name="ewaste_req_updated_idx"),
+        ),
+    ]
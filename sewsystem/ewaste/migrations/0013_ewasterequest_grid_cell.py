@@ -0,0 +1,53 @@
+from django.db import migrations, models
+
+# The grid as of this migration, copied rather than imported from ewaste.spatial: the cells stored
+# here must stay what this migration computed even if the live grid changes. A new grid size needs
+# its own migration recomputing every cell.
+GRID_DEGREES = 0.05
+GRID_ROWS = round(180 / GRID_DEGREES)
+GRID_COLUMNS = round(360 / GRID_DEGREES)
+
+
+def grid_cell(latitude, longitude):
+    row = min(int((latitude + 90) // GRID_DEGREES), GRID_ROWS - 1)
+    column = int((longitude + 180) // GRID_DEGREES) % GRID_COLUMNS
+    return row * GRID_COLUMNS + column
+
+
+def fill_grid_cells(apps, schema_editor):
+    EWasteRequest = apps.get_model("ewaste", "EWasteRequest")
+    located = EWasteRequest.objects.filter(latitude__isnull=False, longitude__isnull=False).only(
+        "id", "latitude", "longitude"
+    )
+    batch = []
+    for req in located.iterator(chunk_size=2000):
+        req.grid_cell = grid_cell(req.latitude, req.longitude)
+        batch.append(req)
+        if len(batch) == 2000:
+            EWasteRequest.objects.bulk_update(batch, ["grid_cell"])
+            batch = []
+    if batch:
+        EWasteRequest.objects.bulk_update(batch, ["grid_cell"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ewaste", "0012_ewasterequest_coordinates"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ewasterequest",
+            name="grid_cell",
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_grid_cells, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="ewasterequest",
+            index=models.Index(
+                condition=models.Q(("grid_cell__isnull", False), ("status", "pending")),
+                fields=["grid_cell"],
+                name="ewaste_req_pending_cell_idx",
+            ),
+        ),
+    ]
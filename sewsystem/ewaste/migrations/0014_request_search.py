@@ -0,0 +1,26 @@
+from django.db import migrations
+
+# Unlike the grid cells of 0013, the search index is deliberately built from live code: the
+# post_migrate handler in ewaste.signals re-creates it from ewaste.search after every migrate, so a
+# frozen copy here would only disagree with it. Nothing is computed from row data and kept; the
+# index is rebuilt from the rows. Creation is IF NOT EXISTS, so changing its shape needs a migration
+# that drops the old index first.
+from ewaste.search import create_search_index, drop_search_index
+
+
+def create_index(apps, schema_editor):
+    create_search_index(schema_editor.connection, rebuild=True)
+
+
+def drop_index(apps, schema_editor):
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ewaste", "0013_ewasterequest_grid_cell"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,33 @@
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import migrations
+from django.utils import timezone
+
+LEGACY_BACKEND = "django.contrib.auth.backends.ModelBackend"
+PROFILE_BACKEND = "ewaste.backends.ProfileModelBackend"
+
+
+def move_sessions_to_profile_backend(apps, schema_editor):
+    # ModelBackend is no longer listed in AUTHENTICATION_BACKENDS; sessions that name it would stop
+    # resolving and log their users out. ProfileModelBackend loads the same users.
+    Session = apps.get_model("sessions", "Session")
+    store = SessionStore()
+    changed = []
+    for session in Session.objects.filter(expire_date__gt=timezone.now()).iterator(chunk_size=2000):
+        data = store.decode(session.session_data)
+        if data.get(BACKEND_SESSION_KEY) == LEGACY_BACKEND:
+            data[BACKEND_SESSION_KEY] = PROFILE_BACKEND
+            session.session_data = store.encode(data)
+            changed.append(session)
+    Session.objects.bulk_update(changed, ["session_data"], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ewaste", "0014_request_search"),
+        ("sessions", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(move_sessions_to_profile_backend, migrations.RunPython.noop),
+    ]
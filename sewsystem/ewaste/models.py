@@ -1,11 +1,22 @@
-from django.db import models
+import uuid
+
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db.models.functions import Lower
 from django.utils import timezone
 
+from .spatial import grid_cell
+
 User = get_user_model()
 
 
+def users_with_email(email):
+    # Matches the expression index on LOWER(email) created in migration 0009, unlike email__iexact.
+    return User.objects.alias(email_lower=Lower("email")).filter(email_lower=(email or "").strip().lower())
+
+
 class UserProfile(models.Model):
     ROLE_USER = "user"
     ROLE_ADMIN = "admin"
@@ -44,6 +55,11 @@ class EWasteRequest(models.Model):
     brand = models.CharField(max_length=80, blank=True)
     pickup_address = models.CharField(max_length=255)
     pickup_date = models.DateField()
+    # Optional WGS84 coordinates of the pickup address, used for route planning.
+    latitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
     notes = models.TextField(blank=True)
     assigned_collector = models.ForeignKey(
@@ -57,6 +73,40 @@ class EWasteRequest(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Fixed-grid cell of (latitude, longitude), kept in sync by save(); see ewaste.spatial.
+    grid_cell = models.IntegerField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Role-scoped request lists, newest first.
+            models.Index(fields=["user", "-created_at"], name="ewaste_req_user_created_idx"),
+            models.Index(fields=["assigned_collector", "-created_at"], name="ewaste_req_coll_created_idx"),
+            # Admin list and keyset pagination on (created_at, id).
+            models.Index(fields=["-created_at", "-id"], name="ewaste_req_created_id_idx"),
+            # Status counts and the monthly report (status + pickup_date range).
+            models.Index(fields=["status", "pickup_date"], name="ewaste_req_status_pickup_idx"),
+            # MAX(updated_at) for list ETags.
+            models.Index(fields=["updated_at"], name="ewaste_req_updated_idx"),
+            # "Pending pickups near a point": only pending rows with coordinates are indexed.
+            models.Index(
+                fields=["grid_cell"],
+                name="ewaste_req_pending_cell_idx",
+                condition=models.Q(status="pending", grid_cell__isnull=False),
+            ),
+        ]
+
+    # Fields whose stored values the save/delete signal handlers diff to maintain counters,
+    # report versions and the daily rollup.
+    TRACKED_FIELDS = ("status", "pickup_date", "item_type", "quantity", "assigned_collector_id")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_state = instance.tracked_state()
+        return instance
+
+    def tracked_state(self):
+        return {name: self.__dict__.get(name) for name in self.TRACKED_FIELDS}
 
     def mark_assigned(self, collector):
         self.assigned_collector = collector
@@ -76,12 +126,132 @@ class EWasteRequest(models.Model):
         if self.status in {self.STATUS_ASSIGNED, self.STATUS_COMPLETED} and not self.assigned_collector_id:
             raise ValidationError({"assigned_collector": "Assigned or completed requests must have a collector."})
 
+        if (self.latitude is None) != (self.longitude is None):
+            raise ValidationError({"latitude": "Latitude and longitude must be set together."})
+
         if self.status == self.STATUS_COMPLETED and not self.completed_at:
             self.completed_at = timezone.now()
 
     def save(self, *args, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
+        self.grid_cell = grid_cell(self.latitude, self.longitude)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "grid_cell"}
+        # post_save handlers (status counters) run inside the same transaction as the row write.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
 
     def __str__(self):
         return f"{self.item_type} ({self.status}) - {self.user.username}"
+
+
+class RequestEvent(models.Model):
+    # Append-only change log behind the server-sent events feed; ids double as SSE event ids.
+    KIND_CREATED = "created"
+    KIND_ASSIGNED = "assigned"
+    KIND_STATUS_CHANGED = "status_changed"
+    KIND_CHOICES = (
+        (KIND_CREATED, "Created"),
+        (KIND_ASSIGNED, "Assigned"),
+        (KIND_STATUS_CHANGED, "Status changed"),
+    )
+
+    request = models.ForeignKey(EWasteRequest, on_delete=models.CASCADE, related_name="events")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=EWasteRequest.STATUS_CHOICES)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    collector = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "id"], name="ewaste_event_user_id_idx"),
+            models.Index(fields=["collector", "id"], name="ewaste_event_collector_id_idx"),
+            models.Index(fields=["created_at"], name="ewaste_event_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.kind} request {self.request_id}"
+
+
+class StatusCounter(models.Model):
+    status = models.CharField(max_length=20, choices=EWasteRequest.STATUS_CHOICES, unique=True)
+    count = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.status}: {self.count}"
+
+
+class DailyRollup(models.Model):
+    # Per-day aggregate of EWasteRequest keyed by pickup date, status, item type and collector,
+    # kept in step by the request signal handlers. collector_id is 0 for unassigned requests.
+    date = models.DateField()
+    status = models.CharField(max_length=20, choices=EWasteRequest.STATUS_CHOICES)
+    item_type = models.CharField(max_length=120)
+    collector_id = models.BigIntegerField(default=0)
+    count = models.BigIntegerField(default=0)
+    quantity = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "status", "item_type", "collector_id"], name="ewaste_dailyrollup_key"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["status", "date"], name="ewaste_rollup_status_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.status} {self.item_type}: {self.count}"
+
+
+class ReportVersion(models.Model):
+    # Bumped whenever the completed pickups of a month change; part of the monthly PDF cache key.
+    month = models.DateField(unique=True)
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} v{self.version}"
+
+
+class ReportJob(models.Model):
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    )
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    month = models.DateField()
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="report_jobs")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    error = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Refreshed while a live worker holds the job, queued or running; see ewaste.jobs.
+    heartbeat_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # At most one in-flight job per month and admin; duplicate submissions attach to it.
+            models.UniqueConstraint(
+                fields=["month", "requested_by"],
+                condition=models.Q(status__in=["queued", "running"]),
+                name="ewaste_reportjob_one_active",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} report ({self.status})"
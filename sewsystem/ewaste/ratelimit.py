@@ -0,0 +1,77 @@
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hits (key TEXT NOT NULL, ts REAL NOT NULL, expires_at REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS hits_key_ts ON hits (key, ts);
+CREATE INDEX IF NOT EXISTS hits_expires ON hits (expires_at);
+"""
+
+
+class SlidingWindowLimiter:
+    # Sliding-window log kept in a SQLite file shared by every worker process on the host. Each check
+    # runs in a BEGIN IMMEDIATE transaction, so the count-then-insert is atomic across processes.
+
+    def __init__(self, path, prune_probability=0.01):
+        self.path = path
+        self.prune_probability = prune_probability
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        # Connections must not cross a fork (gunicorn preload) or be shared between threads.
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def hit(self, key, limit, window_seconds):
+        # Records an attempt and returns 0 when allowed, else the seconds until one is allowed again.
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM hits WHERE key = ? AND ts <= ?", (key, now - window_seconds))
+            count, oldest = conn.execute("SELECT COUNT(*), MIN(ts) FROM hits WHERE key = ?", (key,)).fetchone()
+            if count >= limit:
+                retry_after = max(1, math.ceil(oldest + window_seconds - now))
+            else:
+                conn.execute(
+                    "INSERT INTO hits (key, ts, expires_at) VALUES (?, ?, ?)", (key, now, now + window_seconds)
+                )
+                retry_after = 0
+            if random.random() < self.prune_probability:
+                conn.execute("DELETE FROM hits WHERE expires_at <= ?", (now,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return retry_after
+
+    def reset(self, key):
+        self._connection().execute("DELETE FROM hits WHERE key = ?", (key,))
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter():
+    path = settings.RATE_LIMIT_DB
+    with _limiters_lock:
+        if path not in _limiters:
+            _limiters[path] = SlidingWindowLimiter(path)
+        return _limiters[path]
@@ -0,0 +1,267 @@
+import glob
+import hashlib
+import os
+import tempfile
+from calendar import month_name
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db.models import Count, F
+
+from .models import EWasteRequest, ReportVersion
+from .rollups import rollup_completed_summary
+
+REPORT_ROW_FIELDS = (
+    "id",
+    "pickup_date",
+    "user__username",
+    "item_type",
+    "quantity",
+    "assigned_collector__username",
+    "pickup_address",
+)
+
+
+def month_bounds(year, month):
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def report_version(year, month):
+    version = ReportVersion.objects.filter(month=date(year, month, 1)).values_list("version", flat=True).first()
+    return version or 0
+
+
+def bump_report_versions(months):
+    # months: first-of-month dates whose completed pickups changed. Runs in the writer's transaction.
+    for month in months:
+        updated = ReportVersion.objects.filter(month=month).update(version=F("version") + 1)
+        if not updated:
+            ReportVersion.objects.get_or_create(month=month, defaults={"version": 1})
+
+
+def completed_requests(year, month):
+    month_start, month_end = month_bounds(year, month)
+    # Half-open range on the raw column so the (status, pickup_date) index can serve it.
+    return EWasteRequest.objects.filter(
+        status=EWasteRequest.STATUS_COMPLETED,
+        pickup_date__gte=month_start,
+        pickup_date__lt=month_end,
+    )
+
+
+def monthly_summary(year, month):
+    # Header figures come from the daily rollup; only unique users need the request table, and that
+    # count is served by the (status, pickup_date) index.
+    summary = rollup_completed_summary(*month_bounds(year, month))
+    summary["unique_users"] = completed_requests(year, month).aggregate(n=Count("user", distinct=True))["n"]
+    return summary
+
+
+def _cache_prefix(year, month, generated_by):
+    owner = hashlib.sha1(generated_by.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(settings.REPORT_CACHE_DIR, f"monthly-{year}-{month:02d}-{owner}")
+
+
+def open_monthly_report(year, month, generated_by):
+    # Returns an open binary file of the rendered PDF, rendering it on a cache miss.
+    # The version is read before rendering: whatever is stored under version N is at least as new
+    # as N, so a hit can never be older than the data it is keyed on.
+    version = report_version(year, month)
+    prefix = _cache_prefix(year, month, generated_by)
+    path = f"{prefix}-v{version}.pdf"
+    try:
+        return open(path, "rb")
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(settings.REPORT_CACHE_DIR, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=settings.REPORT_CACHE_DIR, suffix=".tmp", delete=False) as spool:
+        try:
+            render_monthly_report(year, month, generated_by, spool)
+        except BaseException:
+            os.remove(spool.name)
+            raise
+    os.replace(spool.name, path)
+    handle = open(path, "rb")
+
+    # Older versions of this report can never be served again.
+    for stale in glob.glob(f"{glob.escape(prefix)}-v*.pdf"):
+        if stale != path:
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
+    return handle
+
+
+def render_monthly_report(year, month, generated_by, output):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.pdfgen import canvas
+
+    summary = monthly_summary(year, month)
+    rows = (
+        completed_requests(year, month)
+        .order_by("pickup_date", "id")
+        .values_list(*REPORT_ROW_FIELDS)
+        .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    )
+
+    # Pages are compressed as they are emitted; rows are never held beyond the current chunk.
+    pdf = canvas.Canvas(output, pagesize=A4, pageCompression=1)
+    width, height = A4
+    left = 36
+    right = width - 36
+    total_collections = summary["total_collections"]
+    total_quantity = summary["total_quantity"]
+    unique_users = summary["unique_users"]
+    unique_collectors = summary["unique_collectors"]
+
+    header_bg = colors.HexColor("#0B7A66")
+    accent_bg = colors.HexColor("#E8F6F2")
+    accent_bg_2 = colors.HexColor("#E7F2FA")
+    line_color = colors.HexColor("#D4E5DF")
+    text_dark = colors.HexColor("#10212A")
+    text_muted = colors.HexColor("#526370")
+    panel_bg = colors.HexColor("#F6FAFC")
+
+    def _truncate(value, size):
+        value = str(value)
+        return value if len(value) <= size else f"{value[:size-1]}..."
+
+    def draw_page_header(page_no):
+        # Soft page panel to improve print/readability over white paper.
+        pdf.setFillColor(panel_bg)
+        pdf.roundRect(24, 20, width - 48, height - 40, 16, stroke=0, fill=1)
+
+        pdf.setFillColor(header_bg)
+        pdf.roundRect(24, height - 103, width - 48, 86, 14, stroke=0, fill=1)
+
+        pdf.setFillColor(colors.white)
+        pdf.setFont("Helvetica-Bold", 18)
+        title_x = left + 6
+        pdf.drawString(title_x, height - 48, "Smart E-Waste Collection System")
+        pdf.setFont("Helvetica", 11)
+        pdf.drawString(title_x, height - 68, f"Monthly Collection Report - {month_name[month]} {year}")
+        pdf.drawRightString(right - 6, height - 68, f"Generated by: {generated_by}")
+        pdf.setFont("Helvetica", 10)
+        pdf.drawRightString(right - 6, height - 84, f"Page {page_no}")
+        pdf.setFont("Helvetica-Bold", 9)
+        pdf.setFillColor(colors.HexColor("#D2F4E9"))
+        pdf.drawString(left + 8, height - 86, "Environment First")
+
+    def draw_summary_cards(y_top):
+        card_width = (right - left - 18) / 4
+        labels = [
+            ("Completed Pickups", total_collections),
+            ("Total Items", total_quantity),
+            ("Unique Users", unique_users),
+            ("Collectors", unique_collectors),
+        ]
+        for index, (label, value) in enumerate(labels):
+            x = left + (card_width + 6) * index
+            pdf.setFillColor(accent_bg if index % 2 == 0 else accent_bg_2)
+            pdf.roundRect(x, y_top - 52, card_width, 44, 8, stroke=0, fill=1)
+            pdf.setFillColor(text_dark)
+            pdf.setFont("Helvetica-Bold", 12)
+            pdf.drawString(x + 8, y_top - 27, str(value))
+            pdf.setFont("Helvetica", 8)
+            pdf.setFillColor(text_muted)
+            pdf.drawString(x + 8, y_top - 40, label)
+
+    def draw_item_breakdown(y_top):
+        pdf.setFillColor(colors.white)
+        pdf.roundRect(left, y_top - 78, right - left, 66, 10, stroke=0, fill=1)
+        pdf.setFillColor(text_dark)
+        pdf.setFont("Helvetica-Bold", 10)
+        pdf.drawString(left + 10, y_top - 25, "Top Collected Item Types")
+
+        top_items = summary["top_items"]
+        if not top_items:
+            pdf.setFillColor(text_muted)
+            pdf.setFont("Helvetica-Oblique", 9)
+            pdf.drawString(left + 10, y_top - 42, "No completed collections for this month.")
+            return y_top - 86
+
+        max_count = top_items[0][1] if top_items else 1
+        bar_area_width = 140
+        for idx, (item_name, count) in enumerate(top_items):
+            row_y = y_top - 42 - (idx * 16)
+            pdf.setFillColor(text_muted)
+            pdf.setFont("Helvetica", 8.5)
+            pdf.drawString(left + 10, row_y, _truncate(item_name, 22))
+            pdf.setFillColor(colors.HexColor("#D9EAF6"))
+            pdf.roundRect(left + 160, row_y - 3, bar_area_width, 8, 4, stroke=0, fill=1)
+            bar_width = 0 if max_count == 0 else (count / max_count) * bar_area_width
+            pdf.setFillColor(colors.HexColor("#0F4F7A"))
+            pdf.roundRect(left + 160, row_y - 3, bar_width, 8, 4, stroke=0, fill=1)
+            pdf.setFillColor(text_dark)
+            pdf.setFont("Helvetica-Bold", 8)
+            pdf.drawString(left + 306, row_y, str(count))
+        return y_top - 86
+
+    def draw_table_header(y):
+        pdf.setFillColor(colors.HexColor("#0F4F7A"))
+        pdf.rect(left, y - 15, right - left, 15, stroke=0, fill=1)
+        pdf.setFillColor(colors.white)
+        pdf.setFont("Helvetica-Bold", 8.5)
+        pdf.drawString(left + 4, y - 10, "ID")
+        pdf.drawString(left + 30, y - 10, "DATE")
+        pdf.drawString(left + 90, y - 10, "USER")
+        pdf.drawString(left + 180, y - 10, "ITEM TYPE")
+        pdf.drawString(left + 312, y - 10, "QTY")
+        pdf.drawString(left + 344, y - 10, "COLLECTOR")
+        pdf.drawString(left + 440, y - 10, "ADDRESS")
+        return y - 18
+
+    page_no = 1
+    draw_page_header(page_no)
+    draw_summary_cards(height - 102)
+    y = draw_item_breakdown(height - 154)
+    y = draw_table_header(y - 8)
+
+    if not total_collections:
+        pdf.setFont("Helvetica-Oblique", 10)
+        pdf.setFillColor(text_muted)
+        pdf.drawString(left + 4, y - 6, "No completed collections found for this month.")
+    else:
+        for index, row in enumerate(rows):
+            req_id, pickup_date, username, item_type, quantity, collector_name, address = row
+            if y < 64:
+                pdf.setStrokeColor(line_color)
+                pdf.line(left, 42, right, 42)
+                pdf.setFillColor(text_muted)
+                pdf.setFont("Helvetica", 8)
+                pdf.drawRightString(right, 28, f"Generated on {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+                pdf.showPage()
+                page_no += 1
+                draw_page_header(page_no)
+                draw_summary_cards(height - 102)
+                y = draw_item_breakdown(height - 154)
+                y = draw_table_header(y - 8)
+
+            if index % 2 == 0:
+                pdf.setFillColor(colors.HexColor("#F8FBFD"))
+                pdf.rect(left, y - 12, right - left, 14, stroke=0, fill=1)
+
+            pdf.setFillColor(text_dark)
+            pdf.setFont("Helvetica", 8)
+            pdf.drawString(left + 4, y - 8, str(req_id))
+            pdf.drawString(left + 30, y - 8, pickup_date.isoformat())
+            pdf.drawString(left + 90, y - 8, _truncate(username, 16))
+            pdf.drawString(left + 180, y - 8, _truncate(item_type, 24))
+            pdf.drawString(left + 312, y - 8, str(quantity))
+            pdf.drawString(left + 344, y - 8, _truncate(collector_name or "-", 16))
+            pdf.drawString(left + 440, y - 8, _truncate(address, 24))
+            y -= 14
+
+    pdf.setStrokeColor(line_color)
+    pdf.line(left, 42, right, 42)
+    pdf.setFillColor(text_muted)
+    pdf.setFont("Helvetica", 8)
+    pdf.drawString(left, 28, f"Report Month: {month_name[month]} {year}")
+    pdf.drawCentredString(width / 2, 28, "Smart E-Waste Management - Zanzibar")
+    pdf.drawRightString(right, 28, f"Generated on {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    pdf.save()
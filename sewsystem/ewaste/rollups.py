@@ -0,0 +1,149 @@
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import DailyRollup, EWasteRequest
+
+STATUSES = tuple(status for status, _ in EWasteRequest.STATUS_CHOICES)
+
+
+def _rollup_key(state):
+    if not state or not state.get("status") or not state.get("pickup_date"):
+        return None
+    return (state["pickup_date"], state["status"], state["item_type"], state["assigned_collector_id"] or 0)
+
+
+def rollup_deltas(pairs):
+    # pairs: (previous, current) tracked states; None means the row did not exist before/after.
+    deltas = {}
+    for previous, current in pairs:
+        for state, sign in ((previous, -1), (current, 1)):
+            key = _rollup_key(state)
+            if key is None:
+                continue
+            count, quantity = deltas.get(key, (0, 0))
+            deltas[key] = (count + sign, quantity + sign * (state["quantity"] or 0))
+    return deltas
+
+
+def _increment_sql():
+    # Raw so a large batch costs one executemany rather than one compiled ORM update per key;
+    # increments stay relative (count = count + %s) like the single-key path.
+    qn = connection.ops.quote_name
+    column = lambda name: qn(DailyRollup._meta.get_field(name).column)  # noqa: E731
+    return (
+        f"UPDATE {qn(DailyRollup._meta.db_table)} "
+        f"SET {column('count')} = {column('count')} + %s, {column('quantity')} = {column('quantity')} + %s "
+        f"WHERE {column('date')} = %s AND {column('status')} = %s "
+        f"AND {column('item_type')} = %s AND {column('collector_id')} = %s"
+    )
+
+
+def record_rollup_changes(pairs):
+    # Must run inside the transaction that wrote the requests.
+    deltas = {key: change for key, change in rollup_deltas(pairs).items() if any(change)}
+    if len(deltas) <= 2:
+        # A single save touches at most two keys: usually one UPDATE each.
+        for (day, status, item_type, collector_id), (count, quantity) in deltas.items():
+            key = {"date": day, "status": status, "item_type": item_type, "collector_id": collector_id}
+            changes = {"count": F("count") + count, "quantity": F("quantity") + quantity}
+            if not DailyRollup.objects.filter(**key).update(**changes):
+                DailyRollup.objects.get_or_create(**key)
+                DailyRollup.objects.filter(**key).update(**changes)
+        return
+
+    DailyRollup.objects.bulk_create(
+        [
+            DailyRollup(date=day, status=status, item_type=item_type, collector_id=collector_id)
+            for day, status, item_type, collector_id in deltas
+        ],
+        ignore_conflicts=True,
+        batch_size=500,
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            _increment_sql(),
+            [
+                (count, quantity, connection.ops.adapt_datefield_value(day), status, item_type, collector_id)
+                for (day, status, item_type, collector_id), (count, quantity) in deltas.items()
+            ],
+        )
+
+
+def status_totals(rows):
+    # rows: (status, count) pairs; every status is present in the result, plus "total".
+    counts = dict.fromkeys(STATUSES, 0)
+    counts.update(rows)
+    counts["total"] = sum(counts[status] for status in STATUSES)
+    return counts
+
+
+def rollup_status_rows():
+    return DailyRollup.objects.values_list("status").annotate(total=Sum("count")).order_by()
+
+
+def rollup_status_counts():
+    return status_totals(rollup_status_rows())
+
+
+def rollup_completed_summary(start, end):
+    qs = DailyRollup.objects.filter(status=EWasteRequest.STATUS_COMPLETED, date__gte=start, date__lt=end)
+    summary = qs.aggregate(
+        total_collections=Sum("count"),
+        total_quantity=Sum("quantity"),
+        unique_collectors=Count("collector_id", distinct=True, filter=Q(count__gt=0) & ~Q(collector_id=0)),
+    )
+    summary["total_collections"] = summary["total_collections"] or 0
+    summary["total_quantity"] = summary["total_quantity"] or 0
+    summary["top_items"] = list(
+        qs.values("item_type")
+        .annotate(total=Sum("quantity"))
+        .filter(total__gt=0)
+        .order_by("-total", "item_type")
+        .values_list("item_type", "total")[:3]
+    )
+    return summary
+
+
+def _live_groups():
+    return (
+        EWasteRequest.objects.values("pickup_date", "status", "item_type", "assigned_collector_id")
+        .annotate(count=Count("id"), quantity=Sum("quantity"))
+        .order_by()
+    )
+
+
+def rebuild_rollup(batch_size=5000):
+    with transaction.atomic():
+        DailyRollup.objects.all().delete()
+        batch = []
+        for row in _live_groups().iterator(chunk_size=batch_size):
+            batch.append(
+                DailyRollup(
+                    date=row["pickup_date"],
+                    status=row["status"],
+                    item_type=row["item_type"],
+                    collector_id=row["assigned_collector_id"] or 0,
+                    count=row["count"],
+                    quantity=row["quantity"],
+                )
+            )
+            if len(batch) >= batch_size:
+                DailyRollup.objects.bulk_create(batch)
+                batch = []
+        DailyRollup.objects.bulk_create(batch)
+
+
+def rollup_drift():
+    live = {
+        (row["pickup_date"], row["status"], row["item_type"], row["assigned_collector_id"] or 0): (
+            row["count"],
+            row["quantity"],
+        )
+        for row in _live_groups().iterator()
+    }
+    stored = {
+        (row.date, row.status, row.item_type, row.collector_id): (row.count, row.quantity)
+        for row in DailyRollup.objects.exclude(count=0, quantity=0).iterator()
+    }
+    keys = live.keys() | stored.keys()
+    return {key: (stored.get(key), live.get(key)) for key in keys if stored.get(key) != live.get(key)}
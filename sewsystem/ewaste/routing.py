@@ -0,0 +1,72 @@
+import math
+import time
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(a, b):
+    lat1, lng1 = math.radians(a[0]), math.radians(a[1])
+    lat2, lng2 = math.radians(b[0]), math.radians(b[1])
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+def _distance_matrix(points):
+    return [[haversine_km(a, b) for b in points] for a in points]
+
+
+def _nearest_neighbour(dist, first):
+    order = [first]
+    unvisited = set(range(len(dist))) - {first}
+    while unvisited:
+        row = dist[order[-1]]
+        nearest = min(unvisited, key=row.__getitem__)
+        unvisited.remove(nearest)
+        order.append(nearest)
+    return order
+
+
+def _two_opt(order, dist, fixed_start, deadline):
+    # Open path: reversing order[i..j] swaps edges (i-1, i) and (j, j+1); a missing neighbour at
+    # either end contributes nothing. Stops at a local optimum or when the time budget runs out;
+    # the clock is only checked between passes to keep the inner loop tight.
+    n = len(order)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(1 if fixed_start else 0, n - 1):
+            a = order[i - 1] if i > 0 else None
+            b = order[i]
+            row_a = dist[a] if a is not None else None
+            row_b = dist[b]
+            for j in range(i + 1, n):
+                c = order[j]
+                d = order[j + 1] if j + 1 < n else None
+                before = (row_a[b] if a is not None else 0.0) + (dist[c][d] if d is not None else 0.0)
+                after = (row_a[c] if a is not None else 0.0) + (row_b[d] if d is not None else 0.0)
+                if after < before - 1e-9:
+                    order[i:j + 1] = reversed(order[i:j + 1])
+                    b = order[i]
+                    row_b = dist[b]
+                    improved = True
+    return order
+
+
+def plan_route(points, start=None, time_budget=0.5):
+    """Order (lat, lng) points into a short open path.
+
+    Nearest-neighbour construction from ``start`` (or the first point) followed by 2-opt
+    improvement within ``time_budget`` seconds. Returns ``(order, legs_km)`` where ``order``
+    indexes into ``points`` and ``legs_km[k]`` is the distance driven to reach stop ``k``.
+    """
+    if not points:
+        return [], []
+    nodes = ([start] if start is not None else []) + list(points)
+    dist = _distance_matrix(nodes)
+    order = _nearest_neighbour(dist, 0)
+    order = _two_opt(order, dist, start is not None, time.perf_counter() + time_budget)
+
+    legs = [dist[prev][cur] for prev, cur in zip(order, order[1:])]
+    if start is not None:
+        return [index - 1 for index in order[1:]], legs
+    return order, [0.0] + legs
@@ -0,0 +1,115 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_FIELDS = ("item_type", "brand", "pickup_address", "notes")
+MAX_SEARCH_TERMS = 8
+# Up to this many FTS5 matches are inlined as an id list; beyond it the list order drives the query.
+SQLITE_ID_LIST_LIMIT = 500
+
+REQUEST_TABLE = "ewaste_ewasterequest"
+# SQLite: external-content FTS5 table over the request columns, kept in sync by triggers.
+FTS_TABLE = "ewaste_request_fts"
+# PostgreSQL: GIN expression index; queries must repeat the expression verbatim to use it.
+PG_SEARCH_INDEX = "ewaste_req_search_idx"
+PG_SEARCH_VECTOR = "to_tsvector('simple'::regconfig, {})".format(" || ' ' || ".join(SEARCH_FIELDS))
+
+
+def _sqlite_trigger_sql():
+    columns = ", ".join(SEARCH_FIELDS)
+    new_values = ", ".join(f"new.{field}" for field in SEARCH_FIELDS)
+    old_values = ", ".join(f"old.{field}" for field in SEARCH_FIELDS)
+    insert_new = f"INSERT INTO {FTS_TABLE} (rowid, {columns}) VALUES (new.id, {new_values});"
+    delete_old = (
+        f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+    )
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {REQUEST_TABLE} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {REQUEST_TABLE} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {columns} ON {REQUEST_TABLE} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def create_search_index(connection, rebuild=False):
+    """Create the full-text index for ``connection`` if it is missing.
+
+    Idempotent. It also runs after every ``migrate`` because SQLite drops a table's triggers when
+    Django rebuilds the table for a schema change.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"{', '.join(SEARCH_FIELDS)}, content='{REQUEST_TABLE}', content_rowid='id')"
+            )
+            for statement in _sqlite_trigger_sql():
+                cursor.execute(statement)
+            if rebuild:
+                cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+        elif connection.vendor == "postgresql":
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {PG_SEARCH_INDEX} ON {REQUEST_TABLE} USING GIN (({PG_SEARCH_VECTOR}))"
+            )
+
+
+def drop_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            for suffix in ("ai", "ad", "au"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        elif connection.vendor == "postgresql":
+            cursor.execute(f"DROP INDEX IF EXISTS {PG_SEARCH_INDEX}")
+
+
+def search_terms(text):
+    # Word tokens only, so user input never reaches the FTS5 / tsquery syntax.
+    return re.findall(r"\w+", (text or "").lower())[:MAX_SEARCH_TERMS]
+
+
+def search_requests(qs, text):
+    """Restrict ``qs`` to requests matching every term of ``text`` (as word prefixes)."""
+    terms = search_terms(text)
+    if not terms:
+        return qs
+    vendor = connections[qs.db].vendor
+    if vendor == "sqlite":
+        return _sqlite_search(qs, " ".join(f'"{term}"*' for term in terms))
+    if vendor == "postgresql":
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        return qs.filter(
+            id__in=RawSQL(
+                f"SELECT id FROM {REQUEST_TABLE} WHERE {PG_SEARCH_VECTOR} @@ to_tsquery('simple'::regconfig, %s)",
+                (tsquery,),
+            )
+        )
+    # No full-text index on other backends: substring match on every term.
+    for term in terms:
+        qs = qs.filter(Q(*(Q(**{f"{field}__icontains": term}) for field in SEARCH_FIELDS), _connector=Q.OR))
+    return qs
+
+
+def _sqlite_search(qs, match):
+    # SQLite cannot estimate how many rows an FTS5 MATCH returns, and always drives the query off
+    # the match list. That is right for rare terms but means sorting every match of a common one,
+    # so probe the match count first.
+    with connections[qs.db].cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s LIMIT %s", (match, SQLITE_ID_LIST_LIMIT + 1)
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+    if len(ids) <= SQLITE_ID_LIST_LIMIT:
+        return qs.filter(id__in=ids)
+    # Many matches: the unary + stops SQLite from driving off the match list, so it walks the list
+    # order's index and stops once the page is full, probing the match set for each row.
+    qn = connections[qs.db].ops.quote_name
+    return qs.filter(
+        RawSQL(
+            f"+{qn(REQUEST_TABLE)}.{qn('id')} IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)",
+            (match,),
+            output_field=BooleanField(),
+        )
+    )
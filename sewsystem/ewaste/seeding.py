@@ -0,0 +1,102 @@
+import random
+from datetime import date, datetime, time, timedelta, timezone
+
+from django.apps import apps as global_apps
+
+from .spatial import grid_cell
+
+ITEM_TYPES = (
+    "Laptop",
+    "Desktop",
+    "Mobile Phone",
+    "Tablet",
+    "Printer",
+    "Monitor",
+    "Television",
+    "Battery",
+    "Router",
+    "Keyboard",
+)
+BRANDS = ("", "Dell", "HP", "Lenovo", "Samsung", "Apple", "Tecno", "Canon", "LG")
+CONDITIONS = ("", "Working", "Faulty", "Broken")
+STATUS_WEIGHTS = (("pending", 20), ("assigned", 15), ("completed", 55), ("cancelled", 10))
+
+
+def seed_requests(
+    rows,
+    users=500,
+    collectors=25,
+    months=24,
+    batch_size=5000,
+    seed_value=42,
+    area=None,
+    tag="",
+    apps=global_apps,
+):
+    """Bulk-insert users, collectors and ``rows`` requests; returns ``(user_ids, collector_ids)``.
+
+    Pickup dates cover the last ``months`` months plus the next one, and statuses follow
+    STATUS_WEIGHTS. ``area=(south, north, west, east)`` scatters requests over that box; a distinct
+    ``tag`` lets one database be seeded more than once. ``apps`` may be a migration state, so the
+    benchmarks can seed before later migrations run.
+
+    Rows go in with ``bulk_create``, which skips the save() bookkeeping: rebuild the status
+    counters and the daily rollup afterwards (the seed_requests command does).
+    """
+    User = apps.get_model("auth", "User")
+    UserProfile = apps.get_model("ewaste", "UserProfile")
+    EWasteRequest = apps.get_model("ewaste", "EWasteRequest")
+    rng = random.Random(seed_value)
+
+    User.objects.bulk_create(
+        [User(username=f"seed{tag}_user_{i}", email=f"seed{tag}_user_{i}@example.com") for i in range(users)]
+        + [
+            User(username=f"seed{tag}_collector_{i}", email=f"seed{tag}_collector_{i}@example.com")
+            for i in range(collectors)
+        ],
+        batch_size=batch_size,
+    )
+    user_ids = list(User.objects.filter(username__startswith=f"seed{tag}_user_").values_list("id", flat=True))
+    collector_ids = list(
+        User.objects.filter(username__startswith=f"seed{tag}_collector_").values_list("id", flat=True)
+    )
+    UserProfile.objects.bulk_create(
+        [UserProfile(user_id=uid, role="user") for uid in user_ids]
+        + [UserProfile(user_id=cid, role="collector") for cid in collector_ids],
+        batch_size=batch_size,
+    )
+
+    statuses = [status for status, _ in STATUS_WEIGHTS]
+    weights = [weight for _, weight in STATUS_WEIGHTS]
+    first_day = date.today() - timedelta(days=months * 30)
+    span_days = (months + 1) * 30
+    created = 0
+    while created < rows:
+        batch = []
+        for _ in range(min(batch_size, rows - created)):
+            status = rng.choices(statuses, weights)[0]
+            pickup_date = first_day + timedelta(days=rng.randint(0, span_days))
+            handled_at = datetime.combine(pickup_date, time(12), tzinfo=timezone.utc)
+            located = {}
+            if area:
+                latitude, longitude = rng.uniform(area[0], area[1]), rng.uniform(area[2], area[3])
+                located = {"latitude": latitude, "longitude": longitude, "grid_cell": grid_cell(latitude, longitude)}
+            batch.append(
+                EWasteRequest(
+                    user_id=rng.choice(user_ids),
+                    item_type=rng.choice(ITEM_TYPES),
+                    brand=rng.choice(BRANDS),
+                    condition=rng.choice(CONDITIONS),
+                    quantity=rng.randint(1, 5),
+                    pickup_address=f"Plot {rng.randint(1, 9999)}, Stone Town",
+                    pickup_date=pickup_date,
+                    status=status,
+                    assigned_collector_id=rng.choice(collector_ids) if status in {"assigned", "completed"} else None,
+                    assigned_at=handled_at - timedelta(days=1) if status in {"assigned", "completed"} else None,
+                    completed_at=handled_at if status == "completed" else None,
+                    **located,
+                )
+            )
+        EWasteRequest.objects.bulk_create(batch, batch_size=batch_size)
+        created += len(batch)
+    return user_ids, collector_ids
@@ -0,0 +1,81 @@
+# Columns of a serialized request, user and collector included; read straight from the joined rows.
+REQUEST_COLUMNS = (
+    "id",
+    "item_type",
+    "quantity",
+    "condition",
+    "brand",
+    "pickup_address",
+    "pickup_date",
+    "latitude",
+    "longitude",
+    "status",
+    "notes",
+    "created_at",
+    "assigned_at",
+    "completed_at",
+    "user_id",
+    "user__username",
+    "user__email",
+    "assigned_collector_id",
+    "assigned_collector__username",
+    "assigned_collector__email",
+)
+
+
+def request_rows(qs):
+    """``qs`` as named tuples of REQUEST_COLUMNS.
+
+    No model instances are built: the request, its user and its collector arrive as one tuple per
+    row, and rows keep ``created_at`` and ``id`` attributes for keyset pagination.
+    """
+    return qs.values_list(*REQUEST_COLUMNS, named=True)
+
+
+def serialize_request_row(row):
+    # Same dict, key order included, as views._serialize_request() builds from a model instance, so
+    # both paths encode to the same JSON bytes.
+    (
+        pk,
+        item_type,
+        quantity,
+        condition,
+        brand,
+        pickup_address,
+        pickup_date,
+        latitude,
+        longitude,
+        status,
+        notes,
+        created_at,
+        assigned_at,
+        completed_at,
+        user_id,
+        username,
+        email,
+        collector_id,
+        collector_username,
+        collector_email,
+    ) = row
+    return {
+        "id": pk,
+        "item_type": item_type,
+        "quantity": quantity,
+        "condition": condition,
+        "brand": brand,
+        "pickup_address": pickup_address,
+        "pickup_date": pickup_date.isoformat(),
+        "latitude": latitude,
+        "longitude": longitude,
+        "status": status,
+        "notes": notes,
+        "created_at": created_at.isoformat(),
+        "assigned_at": assigned_at.isoformat() if assigned_at else None,
+        "completed_at": completed_at.isoformat() if completed_at else None,
+        "user": {"id": user_id, "username": username, "email": email},
+        "assigned_collector": (
+            {"id": collector_id, "username": collector_username, "email": collector_email}
+            if collector_id is not None
+            else None
+        ),
+    }
@@ -1,14 +1,122 @@
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db import connections, transaction
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_init, post_migrate, post_save, pre_delete, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
 
-from .models import UserProfile
+from .counters import record_transition
+from .models import EWasteRequest, UserProfile
+from .reports import bump_report_versions
+from .rollups import record_rollup_changes
+from .search import create_search_index
+from .tracking import completed_months, record_request_changes
 
 
 @receiver(post_save, sender=User)
 def ensure_user_profile(sender, instance, created, **kwargs):
-    profile, _ = UserProfile.objects.get_or_create(user=instance, defaults={"role": UserProfile.ROLE_USER})
+    try:
+        # Existing users usually have the profile cached already; avoid a lookup on every save.
+        profile = None if created else instance.profile
+    except UserProfile.DoesNotExist:
+        profile = None
+    if profile is None:
+        profile, _ = UserProfile.objects.get_or_create(user=instance, defaults={"role": UserProfile.ROLE_USER})
     if instance.is_superuser or instance.is_staff:
         if profile.role != UserProfile.ROLE_ADMIN:
             profile.role = UserProfile.ROLE_ADMIN
             profile.save(update_fields=["role"])
+
+
+# User columns copied into serialized requests, as owner and as collector.
+LISTED_USER_FIELDS = ("username", "email")
+
+
+def _listed_values(user):
+    # Read from __dict__ so a deferred field is not fetched just to be remembered.
+    return tuple(user.__dict__.get(name) for name in LISTED_USER_FIELDS)
+
+
+def _touch_requests(requests):
+    # List ETags key on the newest updated_at in scope, and cached monthly PDFs print the owner's and
+    # collector's usernames; neither notices a change made to the users alone.
+    bump_report_versions(
+        requests.filter(status=EWasteRequest.STATUS_COMPLETED).dates("pickup_date", "month").order_by()
+    )
+    requests.update(updated_at=timezone.now())
+
+
+@receiver(post_init, sender=User)
+def remember_listed_user_fields(sender, instance, **kwargs):
+    instance._listed_values = _listed_values(instance)
+
+
+@receiver(post_save, sender=User)
+def touch_requests_of_renamed_user(sender, instance, created, using, **kwargs):
+    current = _listed_values(instance)
+    if not created and current != instance._listed_values:
+        _touch_requests(EWasteRequest.objects.using(using).filter(Q(user=instance) | Q(assigned_collector=instance)))
+    instance._listed_values = current
+
+
+@receiver(pre_delete, sender=User)
+def touch_requests_of_deleted_collector(sender, instance, using, **kwargs):
+    # Runs before the collector is cleared from the requests, which a queryset update does without
+    # any signal; the user's own requests are deleted one by one and tracked as such.
+    _touch_requests(EWasteRequest.objects.using(using).filter(assigned_collector=instance))
+
+
+def _stored_state(sender, instance, using):
+    # Deltas are taken against the row as stored now, not as this instance last read it: two saves
+    # of instances read before either wrote would otherwise both apply the same old -> new change.
+    # save() and delete() run in a transaction, so the row stays locked until the write commits.
+    if instance.pk is None:
+        return None
+    rows = sender._base_manager.using(using).filter(pk=instance.pk)
+    if transaction.get_connection(using).in_atomic_block:
+        rows = rows.select_for_update()
+    return rows.values(*sender.TRACKED_FIELDS).first()
+
+
+@receiver(pre_save, sender=EWasteRequest)
+def lock_request_state(sender, instance, using, update_fields, **kwargs):
+    state = _stored_state(sender, instance, using)
+    if state is not None and update_fields is not None:
+        # Tracked fields this save does not write keep their stored values.
+        written = {sender._meta.get_field(name).attname for name in update_fields}
+        for name, value in state.items():
+            if name not in written:
+                setattr(instance, name, value)
+    instance._loaded_state = state
+
+
+@receiver(post_save, sender=EWasteRequest)
+def track_request_changes(sender, instance, created, **kwargs):
+    record_request_changes([(instance, None if created else instance._loaded_state)])
+
+
+@receiver(pre_delete, sender=EWasteRequest)
+def lock_deleted_request_state(sender, instance, using, **kwargs):
+    instance._loaded_state = _stored_state(sender, instance, using)
+
+
+@receiver(post_delete, sender=EWasteRequest)
+def untrack_request(sender, instance, **kwargs):
+    previous = instance._loaded_state
+    if previous is None:
+        # Already deleted by a concurrent write, which did the bookkeeping.
+        return
+    record_transition(previous["status"], None)
+    record_rollup_changes([(previous, None)])
+    bump_report_versions(completed_months(previous))
+
+
+@receiver(post_migrate)
+def ensure_search_index(sender, using, **kwargs):
+    # SQLite loses the FTS triggers whenever a later migration rebuilds the request table.
+    if sender.name != "ewaste":
+        return
+    connection = connections[using]
+    if ("ewaste", "0014_request_search") in MigrationRecorder(connection).applied_migrations():
+        create_search_index(connection)
@@ -0,0 +1,94 @@
+import math
+
+from .routing import EARTH_RADIUS_KM, haversine_km
+
+# Fixed lat/lng grid stored as an integer cell id (EWasteRequest.grid_cell). Changing the cell
+# size means recomputing every stored cell, so it is a constant rather than a setting.
+GRID_DEGREES = 0.05  # ~5.6 km of latitude
+GRID_ROWS = round(180 / GRID_DEGREES)
+GRID_COLUMNS = round(360 / GRID_DEGREES)
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def _row(latitude):
+    return min(int((latitude + 90) // GRID_DEGREES), GRID_ROWS - 1)
+
+
+def _column(longitude):
+    return int((longitude + 180) // GRID_DEGREES) % GRID_COLUMNS
+
+
+def grid_cell(latitude, longitude):
+    if latitude is None or longitude is None:
+        return None
+    return _row(latitude) * GRID_COLUMNS + _column(longitude)
+
+
+# Above this many cells a search runs one range query per contiguous run of cell ids instead of a
+# single grid_cell__in list, which stays well inside SQLite's bound-variable limit (999 before 3.32).
+MAX_CELL_IDS = 500
+
+
+def cell_ranges(latitude, longitude, radius_km):
+    """Contiguous ``(first, last)`` runs of the ids of every cell that can hold a point within ``radius_km``.
+
+    Cell ids are row-major, so each grid row contributes one run (two across the antimeridian) and
+    runs that meet are merged; rows that wrap the whole way round near a pole become one run.
+    """
+    lat_span = radius_km / KM_PER_DEGREE
+    south, north = max(latitude - lat_span, -90.0), min(latitude + lat_span, 90.0)
+    # Meridians converge, so the longitude span is widest at the row edge nearest a pole. Once it
+    # reaches half the circle every column is in reach, however close to the pole the row is.
+    widest = max(abs(south), abs(north))
+    cos_lat = math.cos(math.radians(widest))
+    whole_rows = cos_lat * 180.0 * KM_PER_DEGREE <= radius_km
+
+    if whole_rows:
+        columns = [(0, GRID_COLUMNS - 1)]
+    else:
+        lng_span = radius_km / (KM_PER_DEGREE * cos_lat)
+        first, last = _column(longitude - lng_span), _column(longitude + lng_span)
+        # Wrapping across the antimeridian splits the span in two.
+        columns = [(first, last)] if first <= last else [(0, last), (first, GRID_COLUMNS - 1)]
+
+    ranges = []
+    for row in range(_row(south), _row(north) + 1):
+        for first, last in columns:
+            first, last = row * GRID_COLUMNS + first, row * GRID_COLUMNS + last
+            if ranges and ranges[-1][1] + 1 >= first:
+                ranges[-1] = (ranges[-1][0], last)
+            else:
+                ranges.append((first, last))
+    return ranges
+
+
+def cells_within(latitude, longitude, radius_km):
+    """Ids of every grid cell that can hold a point within ``radius_km``.
+
+    Matched with ``grid_cell__in`` so the database does one index probe per cell (a range OR is
+    collapsed into a single open-ended scan by SQLite). The rows read depend on the radius and
+    local density, never on the size of the table.
+    """
+    return [cell for first, last in cell_ranges(latitude, longitude, radius_km) for cell in range(first, last + 1)]
+
+
+def _candidates(queryset, latitude, longitude, radius_km):
+    ranges = cell_ranges(latitude, longitude, radius_km)
+    if sum(last - first + 1 for first, last in ranges) <= MAX_CELL_IDS:
+        yield from queryset.filter(grid_cell__in=[cell for first, last in ranges for cell in range(first, last + 1)])
+        return
+    # One bounded index range scan per run; there are at most a couple per grid row in reach.
+    for first, last in ranges:
+        yield from queryset.filter(grid_cell__range=(first, last))
+
+
+def nearby(queryset, latitude, longitude, radius_km, limit):
+    # Grid cells narrow the candidates in the database; exact distances are computed here.
+    origin = (latitude, longitude)
+    matches = []
+    for req in _candidates(queryset, latitude, longitude, radius_km):
+        distance = haversine_km(origin, (req.latitude, req.longitude))
+        if distance <= radius_km:
+            matches.append((distance, req))
+    matches.sort(key=lambda match: (match[0], match[1].id))
+    return matches[:limit]
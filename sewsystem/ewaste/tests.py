@@ -1,10 +1,44 @@
+import gzip
+import importlib
 import json
+import os
+import tempfile
+import threading
+import warnings
 from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
 from django.contrib.auth.models import User
-from django.test import Client, TestCase
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count
+from django.http import HttpResponse, JsonResponse
+from django.test import AsyncClient, Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-from .models import UserProfile
+from .assignment import plan_assignments
+from .counters import live_status_counts, stored_status_counts
+from .metrics import MetricsStore, clear_snapshots, merged_snapshot, render_prometheus
+from .middleware import OriginMatcher, SimpleCorsMiddleware
+from .models import EWasteRequest, ReportJob, RequestEvent, UserProfile
+from .ratelimit import SlidingWindowLimiter
+from . import jobs
+from . import views
+from . import reports
+from .rollups import rollup_drift, rollup_status_counts
+from .routing import plan_route
+from .seeding import seed_requests
+from .serialization import request_rows, serialize_request_row
+from .spatial import MAX_CELL_IDS, cell_ranges, cells_within, grid_cell
+from .warmup import warm_up
 
 
 class AuthAndRequestTests(TestCase):
@@ -125,3 +159,1217 @@ class AuthAndRequestTests(TestCase):
             content_type="application/json",
         )
         self.assertEqual(response.status_code, 403)
+
+
+class RequestPaginationTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="pager", password="StrongPass123!")
+        self.other = User.objects.create_user(username="other", password="StrongPass123!")
+        pickup_date = date.today() + timedelta(days=1)
+        for index in range(5):
+            EWasteRequest.objects.create(
+                user=self.user, item_type=f"Item {index}", pickup_address="Stone Town", pickup_date=pickup_date
+            )
+        EWasteRequest.objects.create(
+            user=self.other, item_type="Hidden", pickup_address="Stone Town", pickup_date=pickup_date
+        )
+        self.client.post(
+            "/api/auth/login/",
+            data=json.dumps({"username": "pager", "password": "StrongPass123!"}),
+            content_type="application/json",
+        )
+
+    def test_pages_follow_cursor_without_overlap(self):
+        seen = []
+        response = self.client.get("/api/requests/", {"page_size": 2})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            seen.extend(item["id"] for item in body["results"])
+            if not body["next"]:
+                break
+            response = self.client.get("/api/requests/", {"page_size": 2, "cursor": body["next"]})
+
+        expected = list(
+            EWasteRequest.objects.filter(user=self.user).order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_legacy_list_is_unpaginated(self):
+        response = self.client.get("/api/requests/")
+        self.assertEqual(len(response.json()), 5)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get("/api/requests/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+
+class RequestExportTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username="exportadmin", password="StrongPass123!", is_staff=True)
+        owner = User.objects.create_user(username="owner", password="StrongPass123!")
+        for index, pickup_date in enumerate([date(2025, 1, 10), date(2025, 2, 10), date(2025, 3, 10)]):
+            EWasteRequest.objects.create(
+                user=owner, item_type=f"Item {index}", pickup_address="Stone Town", pickup_date=pickup_date
+            )
+        self.client.post(
+            "/api/auth/login/",
+            data=json.dumps({"username": "exportadmin", "password": "StrongPass123!"}),
+            content_type="application/json",
+        )
+
+    def test_ndjson_export_filters_by_date_range(self):
+        response = self.client.get("/api/requests/export/", {"from": "2025-02-01", "to": "2025-03-31"})
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["item_type"] for line in lines], ["Item 1", "Item 2"])
+
+    def test_csv_export_has_header_and_rows(self):
+        response = self.client.get("/api/requests/export/", {"format": "csv", "status": "pending"})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].startswith("id,item_type,quantity"))
+        self.assertEqual(len(lines), 4)
+
+
+class RequestFilterSearchTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user(username="filteradmin", password="StrongPass123!", is_staff=True)
+        owner = User.objects.create_user(username="filterowner", password="StrongPass123!")
+        collector = User.objects.create_user(username="filtercollector", password="StrongPass123!")
+        UserProfile.objects.filter(user=collector).update(role=UserProfile.ROLE_COLLECTOR)
+        self.collector = User.objects.get(pk=collector.pk)
+        pickup_date = date.today() + timedelta(days=1)
+        rows = (
+            ("Laptop", "Dell", "Mlandege Street", "Cracked screen"),
+            ("Mobile Phone", "Tecno", "Darajani Market", ""),
+            ("Printer", "HP", "Mlandege Street", "Heavy, needs two people"),
+        )
+        self.requests = [
+            EWasteRequest.objects.create(
+                user=owner, item_type=item, brand=brand, pickup_address=address, notes=notes, pickup_date=pickup_date
+            )
+            for item, brand, address, notes in rows
+        ]
+        self.requests[2].mark_assigned(self.collector)
+        self.requests[2].save()
+        self.client = Client()
+        self.client.force_login(admin)
+
+    def _ids(self, **params):
+        response = self.client.get("/api/requests/", params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(item["id"] for item in response.json())
+
+    def test_filters_combine(self):
+        laptop, phone, printer = (req.id for req in self.requests)
+        self.assertEqual(self._ids(status="pending"), [laptop, phone])
+        self.assertEqual(self._ids(status="pending,assigned", item_type="printer"), [printer])
+        self.assertEqual(self._ids(collector_id=self.collector.id), [printer])
+        self.assertEqual(self._ids(collector_id="none"), [laptop, phone])
+        self.assertEqual(self.client.get("/api/requests/", {"status": "lost"}).status_code, 400)
+
+    def test_full_text_search_matches_prefixes_and_follows_edits(self):
+        laptop, phone, printer = (req.id for req in self.requests)
+        self.assertEqual(self._ids(q="mlandege"), [laptop, printer])
+        self.assertEqual(self._ids(q="Mland heav"), [printer])
+        self.assertEqual(self._ids(q="tecno", status="pending"), [phone])
+        self.assertEqual(self._ids(q='"; DROP'), [])
+        # Large match sets take the index-order plan instead of an inlined id list.
+        with mock.patch("ewaste.search.SQLITE_ID_LIST_LIMIT", 1):
+            self.assertEqual(self._ids(q="mlandege"), [laptop, printer])
+
+        self.requests[1].notes = "Mlandege drop-off instead"
+        self.requests[1].save()
+        self.requests[0].delete()
+        self.assertEqual(self._ids(q="mlandege"), [phone, printer])
+
+    def test_filtered_lists_get_distinct_etags(self):
+        everything = self.client.get("/api/requests/")
+        pending = self.client.get("/api/requests/", {"status": "pending"})
+        self.assertNotEqual(everything["ETag"], pending["ETag"])
+
+
+class QueryBudgetTests(TestCase):
+    # Queries per endpoint and role, including session and user lookups. Each case is measured on a
+    # small table and again after seeding more rows for the same users, and must hit its budget
+    # both times, so an N+1 fails here even when it only shows up with more data.
+    AREA = (-6.25, -6.1, 39.15, 39.3)  # Zanzibar Town
+    BUDGETS = (
+        ("user", "/api/me/", {}, 2),
+        ("user", "/api/requests/", {}, 5),
+        ("user", "/api/requests/", {"page_size": 5}, 5),
+        ("collector", "/api/requests/", {}, 5),
+        ("collector", "/api/routes/", {"date": "today"}, 3),
+        ("admin", "/api/requests/", {}, 5),
+        ("admin", "/api/requests/", {"status": "pending,assigned", "q": "laptop", "page_size": 5}, 6),
+        ("admin", "/api/requests/<id>/", {}, 3),
+        ("admin", "/api/requests/export/", {}, 3),
+        ("admin", "/api/collectors/", {}, 3),
+        ("admin", "/api/dashboard/stats/", {}, 3),
+        ("admin", "/api/requests/nearby/", {"lat": -6.16, "lng": 39.2, "radius_km": 20}, 3),
+    )
+
+    def setUp(self):
+        user_ids, collector_ids = seed_requests(20, users=2, collectors=2, months=1, batch_size=50, area=self.AREA)
+        self.users = {
+            "user": User.objects.get(pk=user_ids[0]),
+            "collector": User.objects.get(pk=collector_ids[0]),
+            "admin": User.objects.create_user(username="budgetadmin", is_staff=True),
+        }
+        self.first_request = EWasteRequest.objects.order_by("id").first()
+        self._hand_to_test_users()
+
+    def _hand_to_test_users(self):
+        # Every row belongs to the measured user, and every assigned one is on today's route.
+        EWasteRequest.objects.update(user=self.users["user"])
+        EWasteRequest.objects.filter(assigned_collector__isnull=False).update(assigned_collector=self.users["collector"])
+        EWasteRequest.objects.filter(status=EWasteRequest.STATUS_ASSIGNED).update(pickup_date=date.today())
+
+    def _query_counts(self):
+        counts = []
+        for role, path, params, _ in self.BUDGETS:
+            client = Client()
+            client.force_login(self.users[role])
+            path = path.replace("<id>", str(self.first_request.id))
+            params = {key: date.today().isoformat() if value == "today" else value for key, value in params.items()}
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(path, params)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+            self.assertEqual(response.status_code, 200, (role, path, params))
+            if path == "/api/routes/":
+                self.assertTrue(response.json()["stops"])
+            counts.append(len(queries))
+        return counts
+
+    def test_query_budgets_do_not_grow_with_rows(self):
+        small = self._query_counts()
+        seed_requests(200, users=2, collectors=2, months=1, batch_size=50, area=self.AREA, tag="more")
+        self._hand_to_test_users()
+        large = self._query_counts()
+        for (role, path, params, budget), before, after in zip(self.BUDGETS, small, large):
+            with self.subTest(role=role, path=path, params=params):
+                self.assertEqual((before, after), (budget, budget))
+
+
+@override_settings(STATUS_COUNTERS_ENABLED=True)
+class StatusCounterTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username="statsadmin", password="StrongPass123!", is_staff=True)
+        self.owner = User.objects.create_user(username="statsowner", password="StrongPass123!")
+        self.collector = User.objects.create_user(username="statscollector", password="StrongPass123!")
+        UserProfile.objects.filter(user=self.collector).update(role=UserProfile.ROLE_COLLECTOR)
+        self.client.post(
+            "/api/auth/login/",
+            data=json.dumps({"username": "statsadmin", "password": "StrongPass123!"}),
+            content_type="application/json",
+        )
+
+    def _create(self, item_type="Laptop"):
+        return EWasteRequest.objects.create(
+            user=self.owner,
+            item_type=item_type,
+            pickup_address="Stone Town",
+            pickup_date=date.today() + timedelta(days=1),
+        )
+
+    def test_counters_follow_create_assign_status_and_delete(self):
+        first = self._create()
+        second = self._create("Phone")
+        self._create("Printer")
+        self.client.post(
+            f"/api/requests/{first.id}/assign/",
+            data=json.dumps({"collector_id": self.collector.id}),
+            content_type="application/json",
+        )
+        self.client.post(
+            f"/api/requests/{first.id}/status/",
+            data=json.dumps({"status": "completed"}),
+            content_type="application/json",
+        )
+        self.client.post(
+            f"/api/requests/{second.id}/status/",
+            data=json.dumps({"status": "cancelled"}),
+            content_type="application/json",
+        )
+        EWasteRequest.objects.get(item_type="Printer").delete()
+
+        self.assertEqual(stored_status_counts(), live_status_counts())
+        stats = self.client.get("/api/dashboard/stats/").json()
+        self.assertEqual(
+            stats,
+            {
+                "total_requests": 2,
+                "pending_requests": 0,
+                "assigned_requests": 0,
+                "completed_requests": 1,
+                "cancelled_requests": 1,
+            },
+        )
+
+    def test_rebuild_command_repairs_drift(self):
+        self._create()
+        EWasteRequest.objects.update(status=EWasteRequest.STATUS_CANCELLED)
+        self.assertNotEqual(stored_status_counts(), live_status_counts())
+
+        call_command("rebuild_status_counters", stdout=StringIO())
+        self.assertEqual(stored_status_counts(), live_status_counts())
+
+    def test_stale_instances_apply_each_change_once(self):
+        req = self._create()
+        collector = User.objects.get(pk=self.collector.pk)
+        first = EWasteRequest.objects.get(pk=req.pk)
+        second = EWasteRequest.objects.get(pk=req.pk)
+        first.status = EWasteRequest.STATUS_ASSIGNED
+        first.assigned_collector = collector
+        first.save()
+        # Read before the assignment above; its delta must start from the stored row, not from pending.
+        second.status = EWasteRequest.STATUS_ASSIGNED
+        second.assigned_collector = collector
+        second.save()
+        self.assertEqual(stored_status_counts(), live_status_counts())
+        self.assertEqual(rollup_drift(), {})
+
+        second.status = EWasteRequest.STATUS_COMPLETED
+        second.save(update_fields=["status"])
+        first.delete()
+        stale = EWasteRequest(pk=req.pk, status=EWasteRequest.STATUS_COMPLETED)
+        stale.delete()
+        self.assertEqual(stored_status_counts(), live_status_counts())
+        self.assertEqual(rollup_drift(), {})
+
+
+@override_settings(STATUS_COUNTERS_ENABLED=True)
+class BulkAssignTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        admin = User.objects.create_user(username="bulkadmin", password="StrongPass123!", is_staff=True)
+        self.owner = User.objects.create_user(username="bulkowner", password="StrongPass123!")
+        self.collector = User.objects.create_user(username="bulkcollector", password="StrongPass123!")
+        UserProfile.objects.filter(user=self.collector).update(role=UserProfile.ROLE_COLLECTOR)
+        self.requests = [
+            EWasteRequest.objects.create(
+                user=self.owner, item_type="Laptop", pickup_address="Stone Town",
+                pickup_date=date.today() + timedelta(days=1),
+            )
+            for _ in range(4)
+        ]
+        self.client.force_login(admin)
+
+    def _post(self, assignments):
+        return self.client.post(
+            "/api/requests/assign/bulk/",
+            data=json.dumps({"assignments": assignments}),
+            content_type="application/json",
+        )
+
+    def test_bulk_assign_reports_per_item_results_and_keeps_derived_data_in_sync(self):
+        first, second, third, _ = self.requests
+        response = self._post([
+            {"request_id": first.id, "collector_id": self.collector.id},
+            {"request_id": second.id, "collector_id": self.collector.id},
+            {"request_id": third.id, "collector_id": self.owner.id},
+            {"request_id": 999999, "collector_id": self.collector.id},
+            {"request_id": first.id, "collector_id": self.collector.id},
+            {"request_id": "x"},
+        ])
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["assigned"], body["failed"]), (2, 4))
+        self.assertEqual(
+            [item.get("error") for item in body["results"]],
+            [None, None, "Selected user is not a collector", "Request not found",
+             "Duplicate request_id in payload", "request_id and collector_id must be valid numbers"],
+        )
+
+        first.refresh_from_db()
+        self.assertEqual(first.status, EWasteRequest.STATUS_ASSIGNED)
+        self.assertEqual(first.assigned_collector_id, self.collector.id)
+        self.assertEqual(EWasteRequest.objects.get(pk=third.pk).status, EWasteRequest.STATUS_PENDING)
+        self.assertEqual(stored_status_counts(), live_status_counts())
+        self.assertEqual(rollup_drift(), {})
+        self.assertEqual(RequestEvent.objects.filter(kind=RequestEvent.KIND_ASSIGNED).count(), 2)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        assignments = [{"request_id": req.id, "collector_id": self.collector.id} for req in self.requests]
+        # Warm up so the counter and rollup rows for the target key exist before measuring.
+        self._post(assignments[:1])
+        with CaptureQueriesContext(connection) as single:
+            self._post(assignments[1:2])
+        with self.assertNumQueries(len(single.captured_queries)):
+            self._post(assignments[2:])
+
+    def test_bulk_assign_is_admin_only(self):
+        self.client.force_login(self.owner)
+        self.assertEqual(self._post([]).status_code, 403)
+
+
+@override_settings(STATUS_COUNTERS_ENABLED=True)
+class AutoAssignTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="autoowner", password="StrongPass123!")
+        self.collectors = []
+        for name in ("autocollector1", "autocollector2"):
+            collector = User.objects.create_user(username=name, password="StrongPass123!")
+            UserProfile.objects.filter(user=collector).update(role=UserProfile.ROLE_COLLECTOR)
+            self.collectors.append(User.objects.get(pk=collector.pk))
+        self.day = date.today() + timedelta(days=1)
+        busy = self._create(self.day, 1)
+        busy.mark_assigned(self.collectors[0])
+        busy.save()
+        for quantity in (5, 1, 1, 1):
+            self._create(self.day, quantity)
+        self._create(self.day + timedelta(days=1), 2)
+
+    def _create(self, pickup_date, quantity):
+        return EWasteRequest.objects.create(
+            user=self.owner, item_type="Laptop", pickup_address="Stone Town", pickup_date=pickup_date, quantity=quantity
+        )
+
+    def test_plan_balances_each_day_and_dry_run_writes_nothing(self):
+        plan = plan_assignments()
+        first, second = (collector.id for collector in self.collectors)
+        day_counts = dict(
+            EWasteRequest.objects.filter(pickup_date=self.day, status=EWasteRequest.STATUS_ASSIGNED)
+            .values_list("assigned_collector_id")
+            .annotate(count=Count("id"))
+        )
+        for request_id, collector_id in plan["assignments"]:
+            if EWasteRequest.objects.get(pk=request_id).pickup_date == self.day:
+                day_counts[collector_id] = day_counts.get(collector_id, 0) + 1
+        self.assertEqual(day_counts, {first: 3, second: 2})
+        self.assertEqual(len(plan["assignments"]), 5)
+        # The next day is empty for both, so the lighter collector by total quantity gets it.
+        self.assertEqual(plan["assignments"][-1][1], first)
+        self.assertEqual(EWasteRequest.objects.filter(status=EWasteRequest.STATUS_PENDING).count(), 5)
+
+    def test_apply_endpoint_writes_plan_and_keeps_derived_data_in_sync(self):
+        admin = User.objects.create_user(username="autoadmin", password="StrongPass123!", is_staff=True)
+        client = Client()
+        client.force_login(admin)
+        response = client.post(
+            "/api/requests/assign/auto/", data=json.dumps({"apply": True}), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["planned"], response.json()["assigned"]), (5, 5))
+        self.assertFalse(EWasteRequest.objects.filter(status=EWasteRequest.STATUS_PENDING).exists())
+        self.assertEqual(stored_status_counts(), live_status_counts())
+        self.assertEqual(rollup_drift(), {})
+
+        loads = {row["id"]: row["open_assignments"] for row in client.get("/api/collectors/").json()}
+        self.assertEqual(sum(loads.values()), 6)
+
+    def test_command_defaults_to_dry_run(self):
+        out = StringIO()
+        call_command("auto_assign_requests", stdout=out)
+        self.assertIn("Dry run: 5 requests", out.getvalue())
+        call_command("auto_assign_requests", "--apply", stdout=out)
+        self.assertFalse(EWasteRequest.objects.filter(status=EWasteRequest.STATUS_PENDING).exists())
+
+
+class RoutePlanningTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="routeowner", password="StrongPass123!")
+        collector = User.objects.create_user(username="routecollector", password="StrongPass123!")
+        UserProfile.objects.filter(user=collector).update(role=UserProfile.ROLE_COLLECTOR)
+        self.collector = User.objects.get(pk=collector.pk)
+        self.day = date.today() + timedelta(days=1)
+        self.client = Client()
+        self.client.force_login(self.collector)
+
+    def _assigned(self, latitude=None, longitude=None):
+        req = EWasteRequest.objects.create(
+            user=self.owner, item_type="Laptop", pickup_address="Stone Town", pickup_date=self.day,
+            latitude=latitude, longitude=longitude,
+        )
+        req.mark_assigned(self.collector)
+        req.save()
+        return req
+
+    def test_route_orders_stops_along_the_line(self):
+        # Created out of order along a meridian; the planned route should visit them in sequence.
+        lats = (-6.10, -6.30, -6.15, -6.25, -6.20)
+        by_lat = {lat: self._assigned(lat, 39.2).id for lat in lats}
+        unlocated = self._assigned()
+
+        response = self.client.get("/api/routes/", {"date": self.day.isoformat(), "start_lat": -6.0, "start_lng": 39.2})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(
+            [stop["request"]["id"] for stop in body["stops"]], [by_lat[lat] for lat in sorted(lats, reverse=True)]
+        )
+        self.assertAlmostEqual(body["distance_km"], 33.36, places=1)
+        self.assertEqual([req["id"] for req in body["unrouted"]], [unlocated.id])
+
+    def test_plan_route_handles_200_stops(self):
+        points = [(-6.0 - (i * 7919 % 200) / 1000, 39.0 + (i * 104729 % 200) / 1000) for i in range(200)]
+        order, legs = plan_route(points, time_budget=5)
+        self.assertEqual(sorted(order), list(range(200)))
+        self.assertEqual(len(legs), 200)
+
+    def test_coordinates_must_come_in_pairs(self):
+        client = Client()
+        client.force_login(self.owner)
+        response = client.post(
+            "/api/requests/",
+            data=json.dumps({
+                "item_type": "Laptop", "pickup_address": "Stone Town",
+                "pickup_date": self.day.isoformat(), "latitude": -6.1,
+            }),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class NearbyPickupTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="nearowner", password="StrongPass123!")
+        admin = User.objects.create_user(username="nearadmin", password="StrongPass123!", is_staff=True)
+        self.client = Client()
+        self.client.force_login(admin)
+
+    def _create(self, latitude, longitude):
+        return EWasteRequest.objects.create(
+            user=self.owner, item_type="Laptop", pickup_address="Stone Town",
+            pickup_date=date.today() + timedelta(days=1), latitude=latitude, longitude=longitude,
+        )
+
+    def test_nearby_returns_pending_pickups_by_distance(self):
+        close = self._create(-6.165, 39.19)
+        closer = self._create(-6.161, 39.19)
+        self._create(-6.30, 39.19)  # ~15.6 km away
+        self._create(None, None)
+        moved = self._create(-7.0, 39.0)
+        moved.latitude, moved.longitude = -6.17, 39.19
+        moved.save()
+        self.assertEqual(EWasteRequest.objects.get(pk=moved.pk).grid_cell, grid_cell(-6.17, 39.19))
+
+        response = self.client.get("/api/requests/nearby/", {"lat": -6.16, "lng": 39.19, "radius_km": 2})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([item["request"]["id"] for item in results], [closer.id, close.id, moved.id])
+        self.assertAlmostEqual(results[0]["distance_km"], 0.111, places=2)
+
+    def test_cells_wrap_across_the_antimeridian(self):
+        cells = set(cells_within(0.0, 179.99, 5))
+        self.assertIn(grid_cell(0.0, -179.99), cells)
+        self.assertIn(grid_cell(0.0, 179.99), cells)
+
+    def test_stored_cells_match_the_grid_frozen_in_the_backfill(self):
+        # Changing the live grid needs a migration recomputing every stored cell.
+        migration = importlib.import_module("ewaste.migrations.0013_ewasterequest_grid_cell")
+        for point in ((-6.16, 39.19), (90.0, 180.0), (-90.0, -180.0), (0.0, 179.99), (51.5, -0.12)):
+            self.assertEqual(migration.grid_cell(*point), grid_cell(*point))
+
+    def test_searches_near_a_pole_use_bounded_cell_ranges(self):
+        across = self._create(89.98, -170.0)  # ~3.3 km away, across the pole
+        self._create(89.9, 10.0)  # ~10 km away
+        self.assertEqual(cell_ranges(89.99, 10.0, 5), [(grid_cell(89.95, -180.0), grid_cell(90.0, 179.99))])
+
+        with self.assertNumQueries(3):  # session, user, one range of cells
+            response = self.client.get("/api/requests/nearby/", {"lat": 89.99, "lng": 10.0, "radius_km": 5})
+        self.assertEqual([item["request"]["id"] for item in response.json()["results"]], [across.id])
+
+        # Mid-latitude searches that reach past MAX_CELL_IDS cells run one query per grid row.
+        far = self._create(60.3, 10.5)
+        ranges = cell_ranges(60.0, 10.0, 50)
+        self.assertGreater(len(cells_within(60.0, 10.0, 50)), MAX_CELL_IDS)
+        with self.assertNumQueries(2 + len(ranges)):
+            response = self.client.get("/api/requests/nearby/", {"lat": 60.0, "lng": 10.0, "radius_km": 50})
+        self.assertEqual([item["request"]["id"] for item in response.json()["results"]], [far.id])
+
+
+@override_settings(REPORT_CACHE_DIR=tempfile.mkdtemp(prefix="report-cache-"))
+class MonthlyReportCacheTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username="reportadmin", password="StrongPass123!", is_staff=True)
+        owner = User.objects.create_user(username="reportowner", password="StrongPass123!")
+        collector = User.objects.create_user(username="reportcollector", password="StrongPass123!")
+        UserProfile.objects.filter(user=collector).update(role=UserProfile.ROLE_COLLECTOR)
+        self.collector = User.objects.get(pk=collector.pk)
+        self.request = EWasteRequest.objects.create(
+            user=owner, item_type="Laptop", pickup_address="Stone Town", pickup_date=date(2025, 3, 14)
+        )
+        self.request.mark_assigned(self.collector)
+        self.request.save()
+        self.client.post(
+            "/api/auth/login/",
+            data=json.dumps({"username": "reportadmin", "password": "StrongPass123!"}),
+            content_type="application/json",
+        )
+
+    def test_repeat_download_is_served_from_cache_until_month_changes(self):
+        with mock.patch.object(reports, "render_monthly_report", wraps=reports.render_monthly_report) as render:
+            first = self.client.get("/api/reports/monthly-pdf/", {"month": "2025-03"})
+            second = self.client.get("/api/reports/monthly-pdf/", {"month": "2025-03"})
+            self.assertEqual(render.call_count, 1)
+            self.assertEqual(b"".join(first.streaming_content), b"".join(second.streaming_content))
+
+            self.request.mark_completed()
+            self.request.save()
+            self.client.get("/api/reports/monthly-pdf/", {"month": "2025-03"})
+            self.assertEqual(render.call_count, 2)
+
+    def test_summary_is_aggregated_in_the_database(self):
+        self.request.mark_completed()
+        self.request.save()
+        summary = reports.monthly_summary(2025, 3)
+        self.assertEqual(summary["total_collections"], 1)
+        self.assertEqual(summary["unique_collectors"], 1)
+        self.assertEqual(summary["top_items"], [("Laptop", 1)])
+
+    def test_version_tracks_completion_edit_and_revert(self):
+        self.assertEqual(reports.report_version(2025, 3), 0)
+        self.request.mark_completed()
+        self.request.save()
+        self.assertEqual(reports.report_version(2025, 3), 1)
+
+        self.request.pickup_date = date(2025, 4, 2)
+        self.request.save()
+        self.assertEqual(reports.report_version(2025, 3), 2)
+        self.assertEqual(reports.report_version(2025, 4), 1)
+
+        self.request.status = EWasteRequest.STATUS_ASSIGNED
+        self.request.save()
+        self.assertEqual(reports.report_version(2025, 4), 2)
+
+    def test_renamed_and_deleted_users_render_the_report_again(self):
+        self.request.mark_completed()
+        self.request.save()
+        with mock.patch.object(reports, "render_monthly_report", wraps=reports.render_monthly_report) as render:
+            self.client.get("/api/reports/monthly-pdf/", {"month": "2025-03"})
+            owner = User.objects.get(username="reportowner")
+            owner.username = "renamedowner"
+            owner.save()
+            self.client.get("/api/reports/monthly-pdf/", {"month": "2025-03"})
+            self.assertEqual(render.call_count, 2)
+
+            self.collector.delete()
+            self.client.get("/api/reports/monthly-pdf/", {"month": "2025-03"})
+            self.assertEqual(render.call_count, 3)
+        self.assertEqual(reports.report_version(2025, 3), 3)
+
+
+@override_settings(
+    REPORT_JOBS_EAGER=True,
+    REPORT_JOB_DIR=tempfile.mkdtemp(prefix="report-jobs-"),
+    REPORT_CACHE_DIR=tempfile.mkdtemp(prefix="report-cache-"),
+)
+class ReportJobTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.admin = User.objects.create_user(username="jobadmin", password="StrongPass123!", is_staff=True)
+        self.client.post(
+            "/api/auth/login/",
+            data=json.dumps({"username": "jobadmin", "password": "StrongPass123!"}),
+            content_type="application/json",
+        )
+
+    def test_job_renders_and_downloads(self):
+        response = self.client.post(
+            "/api/reports/jobs/", data=json.dumps({"month": "2025-03"}), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 202)
+        job = response.json()
+        self.assertEqual(job["status"], ReportJob.STATUS_DONE)
+
+        status = self.client.get(job["status_url"]).json()
+        self.assertEqual(status["download_url"], job["download_url"])
+        download = self.client.get(job["download_url"])
+        self.assertEqual(download["Content-Type"], "application/pdf")
+        self.assertTrue(b"".join(download.streaming_content).startswith(b"%PDF"))
+
+    def test_duplicate_submission_attaches_to_running_job(self):
+        running = ReportJob.objects.create(
+            month=date(2025, 3, 1), requested_by=self.admin, status=ReportJob.STATUS_RUNNING
+        )
+        response = self.client.post(
+            "/api/reports/jobs/", data=json.dumps({"month": "2025-03"}), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["id"], str(running.id))
+        self.assertEqual(self.client.get(f"/api/reports/jobs/{running.id}/download/").status_code, 409)
+
+    def test_staleness_follows_the_heartbeat(self):
+        long_ago = timezone.now() - timedelta(seconds=settings.REPORT_JOB_STALE_SECONDS + 60)
+        # Queued long ago but still held by a live worker.
+        waiting = ReportJob.objects.create(month=date(2025, 3, 1), requested_by=self.admin)
+        ReportJob.objects.filter(pk=waiting.pk).update(created_at=long_ago)
+        job, created = jobs.submit_monthly_report(2025, 3, self.admin)
+        self.assertEqual((job.id, created), (waiting.id, False))
+
+        ReportJob.objects.filter(pk=waiting.pk).update(heartbeat_at=long_ago)
+        job, created = jobs.submit_monthly_report(2025, 3, self.admin)
+        self.assertTrue(created)
+        self.assertEqual(ReportJob.objects.get(pk=waiting.pk).status, ReportJob.STATUS_FAILED)
+
+        # The abandoned job's worker turning up late neither runs nor revives it.
+        jobs._run_job(waiting.id)
+        self.assertEqual(ReportJob.objects.get(pk=waiting.pk).status, ReportJob.STATUS_FAILED)
+        self.assertFalse(os.path.exists(jobs.job_output_path(waiting.id)))
+
+    def test_heartbeat_refreshes_only_held_jobs(self):
+        long_ago = timezone.now() - timedelta(hours=1)
+        held = ReportJob.objects.create(month=date(2025, 3, 1), requested_by=self.admin, heartbeat_at=long_ago)
+        other = ReportJob.objects.create(month=date(2025, 4, 1), requested_by=self.admin, heartbeat_at=long_ago)
+        with mock.patch.object(jobs, "_held", {held.id}):
+            jobs._beat()
+        self.assertGreater(ReportJob.objects.get(pk=held.pk).heartbeat_at, long_ago)
+        self.assertEqual(ReportJob.objects.get(pk=other.pk).heartbeat_at, long_ago)
+
+    def test_lost_race_returns_the_winner_even_once_finished(self):
+        # The concurrent submission that won the insert has already finished by the time we look.
+        winner = ReportJob.objects.create(
+            month=date(2025, 3, 1), requested_by=self.admin, status=ReportJob.STATUS_DONE
+        )
+        with mock.patch.object(ReportJob.objects, "create", side_effect=IntegrityError("ewaste_reportjob_one_active")):
+            job, created = jobs.submit_monthly_report(2025, 3, self.admin)
+        self.assertEqual((job.id, created), (winner.id, False))
+
+
+class DailyRollupTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username="rollupowner", password="StrongPass123!")
+        collector = User.objects.create_user(username="rollupcollector", password="StrongPass123!")
+        UserProfile.objects.filter(user=collector).update(role=UserProfile.ROLE_COLLECTOR)
+        self.collector = User.objects.get(pk=collector.pk)
+        self.requests = [
+            EWasteRequest.objects.create(
+                user=owner, item_type=item_type, quantity=2, pickup_address="Stone Town", pickup_date=date(2025, 5, 3)
+            )
+            for item_type in ("Laptop", "Laptop", "Phone")
+        ]
+
+    def test_rollup_follows_state_changes(self):
+        first, second, third = self.requests
+        first.mark_assigned(self.collector)
+        first.save()
+        first.mark_completed()
+        first.quantity = 4
+        first.save()
+        second.status = EWasteRequest.STATUS_CANCELLED
+        second.save()
+        third.delete()
+
+        self.assertEqual(rollup_drift(), {})
+        counts = rollup_status_counts()
+        self.assertEqual((counts["total"], counts["completed"], counts["cancelled"]), (2, 1, 1))
+        summary = reports.monthly_summary(2025, 5)
+        self.assertEqual(summary["total_quantity"], 4)
+        self.assertEqual(summary["top_items"], [("Laptop", 4)])
+
+    def test_backfill_command_rebuilds_from_history(self):
+        EWasteRequest.objects.update(item_type="Printer")
+        self.assertNotEqual(rollup_drift(), {})
+
+        call_command("backfill_daily_rollup", stdout=StringIO())
+        self.assertEqual(rollup_drift(), {})
+
+
+class ProfileResolutionTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username="profileuser", password="StrongPass123!")
+        self.client.post(
+            "/api/auth/login/",
+            data=json.dumps({"username": "profileuser", "password": "StrongPass123!"}),
+            content_type="application/json",
+        )
+
+    def test_me_loads_user_and_profile_once(self):
+        # Session lookup plus one user+profile join.
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/me/")
+        self.assertEqual(response.json()["role"], UserProfile.ROLE_USER)
+
+    def test_profile_patch_resolves_profile_once(self):
+        # Session, user+profile, user update (inside a savepoint under TestCase), profile update.
+        with self.assertNumQueries(6):
+            response = self.client.patch(
+                "/api/profile/", data=json.dumps({"phone": "0777"}), content_type="application/json"
+            )
+        self.assertEqual(response.json()["user"]["phone"], "0777")
+
+
+class CorsTests(TestCase):
+    def test_matcher_allows_exact_origins_and_strict_wildcard_subdomains(self):
+        matcher = OriginMatcher(["http://localhost:5173/", "https://*.vercel.app", ""])
+        self.assertTrue(matcher.allows("http://localhost:5173"))
+        self.assertTrue(matcher.allows("https://app.vercel.app"))
+        self.assertTrue(matcher.allows("https://preview.team.vercel.app"))
+        self.assertFalse(matcher.allows("https://vercel.app"))
+        self.assertFalse(matcher.allows("http://app.vercel.app"))
+        self.assertFalse(matcher.allows("https://app.vercel.app.evil.com"))
+        self.assertFalse(matcher.allows("https://evilvercel.app"))
+        self.assertFalse(matcher.allows(""))
+
+    @override_settings(FRONTEND_ORIGINS=["https://*.vercel.app"], CORS_PREFLIGHT_MAX_AGE=600)
+    def test_preflight_is_cacheable_and_keeps_existing_vary(self):
+        def view(request):
+            response = HttpResponse()
+            response["Vary"] = "Cookie"
+            return response
+
+        middleware = SimpleCorsMiddleware(view)
+        factory = RequestFactory()
+        preflight = middleware(factory.options("/api/requests/", HTTP_ORIGIN="https://app.vercel.app"))
+        self.assertEqual(preflight.status_code, 204)
+        self.assertEqual(preflight["Access-Control-Allow-Origin"], "https://app.vercel.app")
+        self.assertEqual(preflight["Access-Control-Max-Age"], "600")
+
+        response = middleware(factory.get("/api/requests/", HTTP_ORIGIN="https://app.vercel.app"))
+        self.assertEqual(response["Vary"], "Cookie, Origin")
+        self.assertNotIn("Access-Control-Max-Age", response)
+        rejected = middleware(factory.get("/api/requests/", HTTP_ORIGIN="https://evil.example"))
+        self.assertNotIn("Access-Control-Allow-Origin", rejected)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username="metricsadmin", password="StrongPass123!", is_staff=True)
+        self.user = User.objects.create_user(username="metricsuser", password="StrongPass123!")
+
+    def test_metrics_are_admin_only_and_labelled_by_url_name(self):
+        client = Client()
+        self.assertEqual(client.get("/api/metrics/").status_code, 401)
+        client.force_login(self.user)
+        self.assertEqual(client.get("/api/me/").status_code, 200)
+        self.assertEqual(client.get("/api/metrics/").status_code, 403)
+
+        client.force_login(self.admin)
+        response = client.get("/api/metrics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        self.assertIn('ewaste_http_requests_total{view="me",method="GET",status="200"}', body)
+        self.assertIn('ewaste_http_requests_total{view="metrics",method="GET",status="403"}', body)
+        self.assertIn('ewaste_http_request_duration_seconds_bucket{view="me",le="+Inf"}', body)
+        self.assertIn('ewaste_db_queries_total{view="me"}', body)
+        self.assertNotIn('ewaste_db_queries_total{view="me"} 0\n', body)
+
+    @override_settings(METRICS_TOKEN="scrape-secret")
+    def test_bearer_token_allows_scraping_without_a_session(self):
+        client = Client()
+        self.assertEqual(client.get("/api/metrics/", headers={"Authorization": "Bearer wrong"}).status_code, 401)
+        response = client.get("/api/metrics/", headers={"Authorization": "Bearer scrape-secret"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_snapshots_from_worker_processes_are_merged(self):
+        directory = tempfile.mkdtemp(prefix="metrics-")
+        first = MetricsStore(directory, flush_seconds=60)
+        first.observe("requests", "GET", 200, 0.02, 3, 0.001, 900)
+        first.observe("requests", "GET", 200, 0.3, 4, 0.002, 5000)
+        first.flush()
+        second = MetricsStore(directory, flush_seconds=60)
+        second.observe("requests", "GET", 200, 0.004, 2, 0.001, 100)
+        second.observe("requests", "POST", 201, 0.05, 5, 0.003, None)
+        second.flush()
+
+        body = render_prometheus(merged_snapshot(directory))
+        self.assertIn('ewaste_http_requests_total{view="requests",method="GET",status="200"} 3', body)
+        self.assertIn('ewaste_http_requests_total{view="requests",method="POST",status="201"} 1', body)
+        self.assertIn('ewaste_http_request_duration_seconds_bucket{view="requests",le="0.025"} 2', body)
+        self.assertIn('ewaste_http_request_duration_seconds_count{view="requests"} 4', body)
+        self.assertIn('ewaste_http_response_size_bytes_count{view="requests"} 3', body)
+        self.assertIn('ewaste_db_queries_total{view="requests"} 14', body)
+
+    def test_reused_pids_keep_their_own_files_until_the_service_restarts(self):
+        directory = tempfile.mkdtemp(prefix="metrics-")
+        exited = MetricsStore(directory, flush_seconds=60)
+        exited.observe("requests", "GET", 200, 0.02, 1, 0.001, 100)
+        exited.observe("requests", "GET", 200, 0.02, 1, 0.001, 100)
+        exited.flush()
+        # A new worker with the same pid must not overwrite the exited one's counts.
+        reused = MetricsStore(directory, flush_seconds=60)
+        reused.observe("requests", "GET", 200, 0.02, 1, 0.001, 100)
+        reused.flush()
+        self.assertEqual(merged_snapshot(directory)["requests"]["requests", "GET", 200], 3)
+
+        clear_snapshots(directory)
+        self.assertEqual(os.listdir(directory), [])
+
+
+class RateLimitTests(TestCase):
+    def test_login_is_limited_with_retry_after(self):
+        client = Client()
+        payload = json.dumps({"username": "nobody", "password": "wrong"})
+        statuses = [
+            client.post("/api/auth/login/", data=payload, content_type="application/json").status_code
+            for _ in range(11)
+        ]
+        self.assertEqual(statuses, [401] * 10 + [429])
+        response = client.post("/api/auth/login/", data=payload, content_type="application/json")
+        self.assertGreater(int(response["Retry-After"]), 0)
+
+    def test_concurrent_hits_never_exceed_limit(self):
+        path = os.path.join(tempfile.mkdtemp(prefix="ratelimit-"), "limits.sqlite3")
+        allowed = []
+
+        def worker():
+            limiter = SlidingWindowLimiter(path)
+            for _ in range(10):
+                if not limiter.hit("shared-key", limit=25, window_seconds=60):
+                    allowed.append(1)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(allowed), 25)
+
+
+class EmailLoginTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username="mixedcase", email="Mixed.Case@Example.com", password="StrongPass123!"
+        )
+
+    def test_email_login_is_case_insensitive(self):
+        response = self.client.post(
+            "/api/auth/login/",
+            data=json.dumps({"email": "mixed.case@example.COM", "password": "StrongPass123!"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["user"]["id"], self.user.id)
+
+    def test_email_is_unique_regardless_of_case(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create_user(username="copycat", email="MIXED.case@example.com", password="x")
+        # Accounts without an email are not affected by the unique index.
+        User.objects.create_user(username="noemail1")
+        User.objects.create_user(username="noemail2")
+
+    def test_register_rejects_email_in_other_case(self):
+        response = self.client.post(
+            "/api/auth/register/",
+            data=json.dumps(
+                {
+                    "first_name": "Mixed",
+                    "last_name": "Case",
+                    "email": "MIXED.CASE@example.com",
+                    "password": "StrongPass123!",
+                }
+            ),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_failed_login_hashes_the_password_once(self):
+        original = PBKDF2PasswordHasher.encode
+        for credentials in (
+            {"username": "mixedcase"},
+            {"username": "nosuchuser"},
+            {"email": "mixed.case@example.com"},
+            {"email": "nobody@example.com"},
+        ):
+            with mock.patch.object(PBKDF2PasswordHasher, "encode", autospec=True, side_effect=original) as encode:
+                response = self.client.post(
+                    "/api/auth/login/",
+                    data=json.dumps({**credentials, "password": "WrongPass123!"}),
+                    content_type="application/json",
+                )
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(encode.call_count, 1, credentials)
+
+    def test_sessions_stored_under_model_backend_are_moved(self):
+        migration = importlib.import_module("ewaste.migrations.0015_session_backend_path")
+        store = SessionStore()
+        store.update(
+            {
+                SESSION_KEY: str(self.user.pk),
+                BACKEND_SESSION_KEY: migration.LEGACY_BACKEND,
+                HASH_SESSION_KEY: self.user.get_session_auth_hash(),
+            }
+        )
+        store.create()
+        migration.move_sessions_to_profile_backend(global_apps, None)
+
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = store.session_key
+        self.assertEqual(self.client.get("/api/me/").json()["id"], self.user.id)
+
+
+class UsernameAllocationTests(TestCase):
+    def test_next_free_suffix_is_found_in_one_query(self):
+        for username in ("shared@corp.com", "shared@corp.com_1", "shared@corp.com_3", "shared@corp.com.au"):
+            User.objects.create_user(username=username)
+        with self.assertNumQueries(1):
+            self.assertEqual(views._build_unique_username_from_email("Shared@corp.com"), "shared@corp.com_2")
+
+    def test_username_collision_is_retried(self):
+        User.objects.create_user(username="racer@corp.com")
+        allocate = views._build_unique_username_from_email
+        names = iter(["racer@corp.com"])
+
+        # The first allocation returns a name a concurrent registration has just taken.
+        with mock.patch.object(
+            views, "_build_unique_username_from_email", side_effect=lambda email: next(names, None) or allocate(email)
+        ):
+            user = views._create_user_from_email("racer@corp.com", "StrongPass123!")
+        self.assertEqual(user.username, "racer@corp.com_1")
+        self.assertTrue(user.check_password("StrongPass123!"))
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="etaguser", password="StrongPass123!")
+        self.request = EWasteRequest.objects.create(
+            user=self.user, item_type="Laptop", pickup_address="Stone Town", pickup_date=date.today() + timedelta(days=1)
+        )
+        self.client.post(
+            "/api/auth/login/",
+            data=json.dumps({"username": "etaguser", "password": "StrongPass123!"}),
+            content_type="application/json",
+        )
+
+    def test_list_returns_304_until_scope_changes(self):
+        etag = self.client.get("/api/requests/")["ETag"]
+        response = self.client.get("/api/requests/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        EWasteRequest.objects.create(
+            user=self.user, item_type="Phone", pickup_address="Stone Town", pickup_date=date.today() + timedelta(days=2)
+        )
+        response = self.client.get("/api/requests/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_detail_etag_changes_after_edit(self):
+        url = f"/api/requests/{self.request.id}/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.patch(url, data=json.dumps({"notes": "Fragile"}), content_type="application/json")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_etag_changes_when_listed_users_change(self):
+        collector = User.objects.create_user(username="etagcollector", email="old@example.com")
+        UserProfile.objects.filter(user=collector).update(role=UserProfile.ROLE_COLLECTOR)
+        collector = User.objects.get(pk=collector.pk)
+        self.request.status = EWasteRequest.STATUS_ASSIGNED
+        self.request.assigned_collector = collector
+        self.request.save()
+        etag = self.client.get("/api/requests/")["ETag"]
+
+        User.objects.filter(pk=self.user.pk).get().save(update_fields=["last_login"])
+        self.assertEqual(self.client.get("/api/requests/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        collector.email = "new@example.com"
+        collector.save()
+        response = self.client.get("/api/requests/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["assigned_collector"]["email"], "new@example.com")
+
+        etag = response["ETag"]
+        collector.delete()
+        response = self.client.get("/api/requests/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()[0]["assigned_collector"])
+
+
+class ListSerializationTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username="listadmin", is_staff=True)
+        owner = User.objects.create_user(username="listowner", email="owner@example.com")
+        collector = User.objects.create_user(username="listcollector", email="collector@example.com")
+        UserProfile.objects.filter(user=collector).update(role=UserProfile.ROLE_COLLECTOR)
+        collector = User.objects.get(pk=collector.pk)
+        pickup_date = date.today() + timedelta(days=1)
+        for index in range(20):
+            req = EWasteRequest.objects.create(
+                user=owner,
+                item_type="Laptop",
+                brand="Dell" if index % 2 else "",
+                pickup_address=f"Plot {index}, Stone Town",
+                pickup_date=pickup_date,
+                latitude=-6.16 if index % 3 else None,
+                longitude=39.2 if index % 3 else None,
+                notes="Fragile \u00e9cran" if index % 4 == 0 else "",
+            )
+            if index % 2:
+                req.mark_assigned(collector)
+                if index % 4 == 1:
+                    req.status = EWasteRequest.STATUS_COMPLETED
+                    req.completed_at = req.assigned_at
+                req.save()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_rows_encode_to_the_same_json_as_instances(self):
+        qs = EWasteRequest.objects.select_related("user", "assigned_collector").order_by("-created_at")
+        before = JsonResponse([views._serialize_request(req) for req in qs], safe=False).content
+        after = JsonResponse([serialize_request_row(row) for row in request_rows(qs)], safe=False).content
+        self.assertEqual(after, before)
+        self.assertEqual(self.client.get("/api/requests/").content, before)
+
+    @override_settings(GZIP_MIN_BYTES=1024)
+    def test_large_responses_are_gzipped_with_a_weak_etag(self):
+        plain = self.client.get("/api/requests/")
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertIn("Accept-Encoding", plain["Vary"])
+
+        response = self.client.get("/api/requests/", headers={"Accept-Encoding": "gzip, br"})
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response["ETag"], "W/" + plain["ETag"])
+        revalidated = self.client.get(
+            "/api/requests/", headers={"Accept-Encoding": "gzip", "If-None-Match": response["ETag"]}
+        )
+        self.assertEqual(revalidated.status_code, 304)
+
+        small = self.client.get("/api/me/", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", small)
+
+    def test_export_reads_rows(self):
+        response = self.client.get("/api/requests/export/?format=csv")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 21)
+        completed = EWasteRequest.objects.filter(status=EWasteRequest.STATUS_COMPLETED).order_by("id").first()
+        row = next(line for line in lines if line.startswith(f"{completed.id},"))
+        self.assertTrue(row.endswith(f"{completed.assigned_collector_id},listcollector,collector@example.com"))
+
+
+class AsyncReadViewTests(TestCase):
+    # The hot read endpoints are async views; AsyncClient drives them the way backend.asgi does.
+    def setUp(self):
+        self.owner = User.objects.create_user(username="asyncowner", password="StrongPass123!")
+        self.admin = User.objects.create_user(username="asyncadmin", password="StrongPass123!", is_staff=True)
+        pickup_date = date.today() + timedelta(days=1)
+        self.requests = [
+            EWasteRequest.objects.create(
+                user=self.owner, item_type=item, pickup_address="Stone Town", pickup_date=pickup_date
+            )
+            for item in ("Laptop", "Printer", "Router")
+        ]
+
+    async def test_read_endpoints(self):
+        client = AsyncClient()
+        self.assertEqual((await client.get("/api/me/")).status_code, 401)
+        await client.aforce_login(self.owner)
+        me = await client.get("/api/me/", headers={"Origin": "http://localhost:5173"})
+        self.assertEqual(me.json()["role"], UserProfile.ROLE_USER)
+        self.assertEqual(me["Access-Control-Allow-Origin"], "http://localhost:5173")
+
+        first = await client.get("/api/requests/", {"page_size": 2})
+        second = await client.get("/api/requests/", {"page_size": 2, "cursor": first.json()["next"]})
+        ids = [item["id"] for item in first.json()["results"] + second.json()["results"]]
+        self.assertEqual(ids, [req.id for req in reversed(self.requests)])
+        searched = await client.get("/api/requests/", {"q": "printer"})
+        self.assertEqual([item["id"] for item in searched.json()], [self.requests[1].id])
+
+        url = f"/api/requests/{self.requests[0].id}/"
+        detail = await client.get(url)
+        self.assertEqual(detail.json()["item_type"], "Laptop")
+        not_modified = await client.get(url, headers={"If-None-Match": detail["ETag"]})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual((await client.get("/api/requests/999999/")).status_code, 404)
+        self.assertEqual((await client.get("/api/dashboard/stats/")).status_code, 403)
+
+        await client.aforce_login(self.admin)
+        stats = (await client.get("/api/dashboard/stats/")).json()
+        self.assertEqual(stats["pending_requests"], 3)
+
+    @override_settings(DEBUG=True)
+    def test_middleware_chain_needs_no_thread_hops_under_asgi(self):
+        # In debug mode Django logs every middleware it has to wrap for the other execution mode.
+        with self.assertNoLogs("django.request", "DEBUG"):
+            ASGIHandler()
+
+    async def test_downloads_stream_without_buffering(self):
+        client = AsyncClient()
+        await client.aforce_login(self.admin)
+        downloads = (
+            ("/api/requests/export/", {}),
+            ("/api/requests/export/", {"format": "csv"}),
+            ("/api/reports/monthly-pdf/", {"month": f"{date.today():%Y-%m}"}),
+        )
+        bodies = []
+        for path, params in downloads:
+            response = await client.get(path, params)
+            self.assertEqual(response.status_code, 200)
+            # ASGIHandler sends from __aiter__, which warns and then reads a synchronous iterator whole.
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                bodies.append(b"".join([chunk async for chunk in response]))
+        self.assertEqual(bodies[0].count(b"\n"), len(self.requests))
+        self.assertEqual(bodies[1].count(b"\n"), len(self.requests) + 1)
+        self.assertTrue(bodies[2].startswith(b"%PDF"))
+
+    async def test_writes_still_go_through_the_sync_model_layer(self):
+        client = AsyncClient()
+        await client.aforce_login(self.owner)
+        payload = {"item_type": "Tablet", "pickup_address": "Stone Town", "pickup_date": str(date.today())}
+        created = await client.post("/api/requests/", data=json.dumps(payload), content_type="application/json")
+        self.assertEqual(created.status_code, 201)
+        request_id = created.json()["id"]
+        edited = await client.patch(
+            f"/api/requests/{request_id}/", data=json.dumps({"notes": "Boxed"}), content_type="application/json"
+        )
+        self.assertEqual(edited.json()["notes"], "Boxed")
+        # post_save bookkeeping ran for the create.
+        self.assertEqual(await RequestEvent.objects.filter(request_id=request_id).acount(), 1)
+
+
+@override_settings(SSE_POLL_SECONDS=0.01, SSE_MAX_SECONDS=0.2)
+class RequestEventFeedTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="feedowner", password="StrongPass123!")
+        other = User.objects.create_user(username="feedother", password="StrongPass123!")
+        collector = User.objects.create_user(username="feedcollector", password="StrongPass123!")
+        UserProfile.objects.filter(user=collector).update(role=UserProfile.ROLE_COLLECTOR)
+        pickup_date = date.today() + timedelta(days=1)
+        self.request = EWasteRequest.objects.create(
+            user=self.owner, item_type="Laptop", pickup_address="Stone Town", pickup_date=pickup_date
+        )
+        EWasteRequest.objects.create(user=other, item_type="Hidden", pickup_address="Stone Town", pickup_date=pickup_date)
+        self.request.mark_assigned(User.objects.get(pk=collector.pk))
+        self.request.save()
+        self.request.status = EWasteRequest.STATUS_CANCELLED
+        self.request.save()
+
+    async def _read_feed(self, client, **headers):
+        response = await client.get("/api/requests/events/", headers=headers)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        return b"".join([chunk async for chunk in response.streaming_content]).decode()
+
+    async def test_feed_replays_scoped_events_after_last_event_id(self):
+        client = AsyncClient()
+        await client.aforce_login(self.owner)
+        body = await self._read_feed(client, **{"Last-Event-ID": "0"})
+        events = [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+        self.assertEqual([event["type"] for event in events], ["created", "assigned", "status_changed"])
+        self.assertEqual({event["request_id"] for event in events}, {self.request.id})
+
+        body = await self._read_feed(client, **{"Last-Event-ID": str(events[1]["id"])})
+        self.assertIn("event: status_changed", body)
+        self.assertNotIn("event: assigned", body)
+
+    def test_feed_requires_asgi(self):
+        client = Client()
+        client.force_login(self.owner)
+        self.assertEqual(client.get("/api/requests/events/").status_code, 503)
+
+
+class StartupWarmupTests(TransactionTestCase):
+    # Not TestCase: the warmup closes the connection, which a test wrapped in a transaction cannot do.
+
+    def test_warm_up_prepares_urls_modules_and_database(self):
+        with mock.patch("ewaste.warmup.importlib.import_module") as import_module:
+            with self.assertNoLogs("ewaste.warmup", "ERROR"):
+                timings = warm_up()
+        self.assertEqual(set(timings), {"urls", "modules", "databases"})
+        self.assertIn(mock.call("reportlab.pdfgen.canvas"), import_module.call_args_list)
+
+    async def test_warm_up_inside_event_loop(self):
+        # uvicorn imports backend.asgi from its running loop; the database check must not be refused.
+        with self.assertNoLogs("ewaste.warmup", "ERROR"):
+            timings = warm_up()
+        self.assertIn("databases", timings)
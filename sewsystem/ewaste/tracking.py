@@ -0,0 +1,31 @@
+from .counters import record_transitions
+from .events import record_request_events
+from .models import EWasteRequest
+from .reports import bump_report_versions
+from .rollups import record_rollup_changes
+
+
+def completed_months(state):
+    if state and state["status"] == EWasteRequest.STATUS_COMPLETED and state["pickup_date"]:
+        return {state["pickup_date"].replace(day=1)}
+    return set()
+
+
+def record_request_changes(changes):
+    # changes: (request, previous tracked state) pairs, previous None for new rows. Called by the
+    # post_save handler and directly by bulk writes that bypass save(); must run in the writing
+    # transaction so counters, rollup, report versions and events commit with the rows.
+    states = [(previous, req.tracked_state()) for req, previous in changes]
+    record_transitions([(previous and previous["status"], current["status"]) for previous, current in states])
+    record_rollup_changes(states)
+
+    # Any write touching a completed row (completing, editing or reverting it) invalidates that
+    # month's cached report, including the month it moved out of.
+    months = set()
+    for previous, current in states:
+        months |= completed_months(previous) | completed_months(current)
+    bump_report_versions(months)
+
+    record_request_events(changes)
+    for (req, _), (_, current) in zip(changes, states):
+        req._loaded_state = current
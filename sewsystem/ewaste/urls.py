@@ -2,19 +2,29 @@ from django.urls import path
 
 from .views import (
     assign_request_view,
+    auto_assign_view,
+    bulk_assign_view,
     collectors_view,
     csrf_view,
     dashboard_stats_view,
+    export_requests_view,
     forgot_password_view,
     login_view,
     logout_view,
     me_view,
+    metrics_view,
     monthly_report_pdf_view,
+    nearby_requests_view,
     profile_view,
     register_view,
+    request_events_view,
+    report_job_detail_view,
+    report_job_download_view,
+    report_jobs_view,
     register_collector_view,
     request_detail_view,
     requests_view,
+    route_view,
     update_status_view,
 )
 
@@ -27,11 +37,21 @@ urlpatterns = [
     path("me/", me_view, name="me"),
     path("profile/", profile_view, name="profile"),
     path("requests/", requests_view, name="requests"),
+    path("requests/export/", export_requests_view, name="requests-export"),
+    path("requests/assign/bulk/", bulk_assign_view, name="requests-bulk-assign"),
+    path("requests/assign/auto/", auto_assign_view, name="requests-auto-assign"),
+    path("requests/nearby/", nearby_requests_view, name="requests-nearby"),
+    path("requests/events/", request_events_view, name="request-events"),
     path("requests/<int:request_id>/", request_detail_view, name="request-detail"),
     path("requests/<int:request_id>/assign/", assign_request_view, name="request-assign"),
     path("requests/<int:request_id>/status/", update_status_view, name="request-status"),
+    path("routes/", route_view, name="route"),
     path("collectors/", collectors_view, name="collectors"),
     path("collectors/register/", register_collector_view, name="register-collector"),
     path("dashboard/stats/", dashboard_stats_view, name="dashboard-stats"),
+    path("metrics/", metrics_view, name="metrics"),
     path("reports/monthly-pdf/", monthly_report_pdf_view, name="monthly-report-pdf"),
+    path("reports/jobs/", report_jobs_view, name="report-jobs"),
+    path("reports/jobs/<uuid:job_id>/", report_job_detail_view, name="report-job-detail"),
+    path("reports/jobs/<uuid:job_id>/download/", report_job_download_view, name="report-job-download"),
 ]
@@ -1,20 +1,39 @@
+import csv
+import hashlib
+import hmac
 import json
-from collections import Counter
-from calendar import month_name
 from datetime import datetime
 from datetime import date
-from io import BytesIO
+from urllib.parse import urlencode
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth.models import User
-from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.http import HttpResponse, JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Q
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.views.decorators.http import require_http_methods
 
-from .models import EWasteRequest, UserProfile
+from .assignment import apply_plan, plan_assignments, write_assignments
+from .counters import astatus_counts
+from .events import event_stream, latest_event_id
+from .jobs import job_output_path, submit_monthly_report
+from .metrics import get_store, merged_snapshot, render_prometheus
+from .models import EWasteRequest, ReportJob, UserProfile, users_with_email
+from .pagination import akeyset_page, parse_page_size
+from .ratelimit import get_limiter
+from .reports import open_monthly_report
+from .routing import plan_route
+from .search import search_requests, search_terms
+from .serialization import request_rows, serialize_request_row
+from .spatial import nearby
+from .streaming import stream_file_async
 
 
 def _json_body(request):
@@ -35,10 +54,11 @@ def _client_ip(request):
 
 def _throttle(request, scope, identifier="", limit=10, window_seconds=300):
     key = f"throttle:{scope}:{_client_ip(request)}:{(identifier or '').lower()}"
-    attempts = cache.get(key, 0)
-    if attempts >= limit:
-        return _error("Too many attempts. Try again later.", 429)
-    cache.set(key, attempts + 1, timeout=window_seconds)
+    retry_after = get_limiter().hit(key, limit, window_seconds)
+    if retry_after:
+        response = _error("Too many attempts. Try again later.", 429)
+        response["Retry-After"] = str(retry_after)
+        return response
     return None
 
 
@@ -52,21 +72,52 @@ def _validate_user_password(password, user=None):
 
 
 def _profile_for(user):
-    profile, _ = UserProfile.objects.get_or_create(user=user)
-    return profile
+    # The profile is cached on the user instance after the first lookup (and preloaded by
+    # ProfileModelBackend for request.user), so repeated calls within a request are free.
+    try:
+        return user.profile
+    except UserProfile.DoesNotExist:
+        profile, _ = UserProfile.objects.get_or_create(user=user)
+        user.profile = profile
+        return profile
 
 
 def _build_unique_username_from_email(email):
+    # One prefix query fetches every taken "<base>" / "<base>_<n>" name; the first free slot is then
+    # picked in Python, matching the old probe order without a round trip per collision.
     base = (email or "").strip().lower()
-    candidate = base
+    taken = set(
+        User.objects.filter(Q(username=base) | Q(username__startswith=f"{base}_")).values_list("username", flat=True)
+    )
+    if base not in taken:
+        return base
+    suffixes = {name[len(base) + 1 :] for name in taken}
     index = 1
-    while User.objects.filter(username=candidate).exists():
-        candidate = f"{base}_{index}"
+    while str(index) in suffixes:
         index += 1
-    return candidate
+    return f"{base}_{index}"
+
+
+def _create_user_from_email(email, password, attempts=5, **fields):
+    # Returns None when the email was claimed concurrently. A username collision with a concurrent
+    # registration is retried with a freshly allocated name; the password is only hashed once.
+    user = User(email=User.objects.normalize_email(email), **fields)
+    user.set_password(password)
+    for _ in range(attempts):
+        user.username = _build_unique_username_from_email(email)
+        try:
+            with transaction.atomic():
+                user.save(force_insert=True)
+            return user
+        except IntegrityError:
+            if users_with_email(email).exists():
+                return None
+    raise IntegrityError(f"Could not allocate a unique username for {email}")
 
 
 def _serialize_request(req):
+    # For single requests. Lists read rows with serialization.request_rows(); keep
+    # serialization.serialize_request_row() in step with this.
     return {
         "id": req.id,
         "item_type": req.item_type,
@@ -75,6 +126,8 @@ def _serialize_request(req):
         "brand": req.brand,
         "pickup_address": req.pickup_address,
         "pickup_date": req.pickup_date.isoformat(),
+        "latitude": req.latitude,
+        "longitude": req.longitude,
         "status": req.status,
         "notes": req.notes,
         "created_at": req.created_at.isoformat(),
@@ -97,6 +150,71 @@ def _serialize_request(req):
     }
 
 
+def _parse_coordinates(latitude, longitude):
+    # Both or neither; returns ((lat, lng) or (None, None), error response).
+    if latitude is None and longitude is None:
+        return (None, None), None
+    try:
+        lat, lng = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return (None, None), _error("latitude and longitude must both be valid numbers")
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return (None, None), _error("latitude must be within [-90, 90] and longitude within [-180, 180]")
+    return (lat, lng), None
+
+
+EXPORT_CSV_COLUMNS = (
+    "id",
+    "item_type",
+    "quantity",
+    "condition",
+    "brand",
+    "pickup_address",
+    "pickup_date",
+    "status",
+    "notes",
+    "created_at",
+    "assigned_at",
+    "completed_at",
+    "user_id",
+    "user_username",
+    "user_email",
+    "collector_id",
+    "collector_username",
+    "collector_email",
+)
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _export_csv_row(row):
+    # ``row`` comes from serialization.request_rows().
+    has_collector = row.assigned_collector_id is not None
+    return (
+        row.id,
+        row.item_type,
+        row.quantity,
+        row.condition,
+        row.brand,
+        row.pickup_address,
+        row.pickup_date.isoformat(),
+        row.status,
+        row.notes,
+        row.created_at.isoformat(),
+        row.assigned_at.isoformat() if row.assigned_at else "",
+        row.completed_at.isoformat() if row.completed_at else "",
+        row.user_id,
+        row.user__username,
+        row.user__email,
+        row.assigned_collector_id if has_collector else "",
+        row.assigned_collector__username if has_collector else "",
+        row.assigned_collector__email if has_collector else "",
+    )
+
+
 def _role(user):
     if not user.is_authenticated:
         return None
@@ -105,6 +223,105 @@ def _role(user):
     return _profile_for(user).role
 
 
+async def _aprofile_for(user):
+    if User.profile.is_cached(user):
+        try:
+            return user.profile
+        except UserProfile.DoesNotExist:
+            pass
+    profile, _ = await UserProfile.objects.aget_or_create(user=user)
+    user.profile = profile
+    return profile
+
+
+async def _arole(user):
+    if not user.is_authenticated:
+        return None
+    if user.is_superuser or user.is_staff:
+        return UserProfile.ROLE_ADMIN
+    return (await _aprofile_for(user)).role
+
+
+def _scoped_requests(user, role):
+    qs = EWasteRequest.objects.select_related("user", "assigned_collector")
+    if role == UserProfile.ROLE_USER:
+        qs = qs.filter(user=user)
+    elif role == UserProfile.ROLE_COLLECTOR:
+        qs = qs.filter(assigned_collector=user)
+    return qs
+
+
+def _filter_requests(qs, params):
+    # Shared by the request list and the export; returns (queryset, error response).
+    try:
+        date_from = (params.get("from") or "").strip()
+        if date_from:
+            qs = qs.filter(pickup_date__gte=date.fromisoformat(date_from))
+        date_to = (params.get("to") or "").strip()
+        if date_to:
+            qs = qs.filter(pickup_date__lte=date.fromisoformat(date_to))
+    except ValueError:
+        return qs, _error("from and to must be YYYY-MM-DD")
+
+    statuses = [value.strip().lower() for value in (params.get("status") or "").split(",") if value.strip()]
+    if statuses:
+        if any(status not in dict(EWasteRequest.STATUS_CHOICES) for status in statuses):
+            return qs, _error("Unsupported status")
+        qs = qs.filter(status__in=statuses)
+
+    item_type = (params.get("item_type") or "").strip()
+    if item_type:
+        qs = qs.filter(item_type__iexact=item_type)
+
+    collector = (params.get("collector_id") or "").strip().lower()
+    if collector == "none":
+        qs = qs.filter(assigned_collector__isnull=True)
+    elif collector:
+        try:
+            qs = qs.filter(assigned_collector_id=int(collector))
+        except ValueError:
+            return qs, _error("collector_id must be a valid number or none")
+
+    return search_requests(qs, params.get("q")), None
+
+
+async def _afilter_requests(qs, params):
+    # Only the SQLite search runs a query up front (its match-count probe); without a search term
+    # the filters just build the queryset.
+    if search_terms(params.get("q")):
+        return await sync_to_async(_filter_requests)(qs, params)
+    return _filter_requests(qs, params)
+
+
+def _make_etag(*parts):
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+async def _list_etag(request, user, role, scope):
+    # Two small queries over the caller's whole scope stand in for the payload: any create, edit or
+    # delete moves the newest updated_at (an index lookup on its own) or the row count, and so does a
+    # change to a listed user's name or email (see ewaste.signals). Filters are subsets of the scope,
+    # so they only need to key the tag, which keeps this cost independent of how expensive the filter is.
+    last_updated = (await scope.aaggregate(last_updated=Max("updated_at")))["last_updated"]
+    total = await scope.acount()
+    # Filters, search and paging all change the body; the sorted query string keys them.
+    query = urlencode(sorted(request.GET.items()))
+    return _make_etag("list", role, user.id, last_updated.isoformat() if last_updated else "", total, query)
+
+
+def _not_modified(request, etag):
+    response = get_conditional_response(request, etag=etag)
+    return _with_etag(response, etag) if response else None
+
+
+def _with_etag(response, etag):
+    response["ETag"] = etag
+    # Let browsers keep the body but revalidate it on every use.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 def _require_auth(request):
     if not request.user.is_authenticated:
         return _error("Authentication required", 401)
@@ -130,21 +347,16 @@ def register_view(request):
 
     if not first_name or not last_name or not email or not password:
         return _error("first_name, last_name, email and password are required")
-    if User.objects.filter(email__iexact=email).exists():
+    if users_with_email(email).exists():
         return _error("Email already exists")
     password_error = _validate_user_password(password)
     if password_error:
         return password_error
 
     # Use email as username for normal registrations.
-    username = _build_unique_username_from_email(email)
-    user = User.objects.create_user(
-        username=username,
-        email=email,
-        password=password,
-        first_name=first_name,
-        last_name=last_name,
-    )
+    user = _create_user_from_email(email, password, first_name=first_name, last_name=last_name)
+    if user is None:
+        return _error("Email already exists")
     profile = _profile_for(user)
     profile.phone = phone
     profile.address = address
@@ -181,12 +393,7 @@ def login_view(request):
 
     user = None
     if email:
-        accounts = User.objects.filter(email__iexact=email).order_by("id")
-        for account in accounts:
-            authenticated = authenticate(username=account.username, password=password)
-            if authenticated:
-                user = authenticated
-                break
+        user = authenticate(request, email=email, password=password)
     elif username:
         # Backward-compatible fallback for existing username-based accounts.
         user = authenticate(username=username, password=password)
@@ -223,14 +430,9 @@ def forgot_password_view(request):
     if not email or not new_password:
         return _error("email and new_password are required")
 
-    try:
-        user = User.objects.get(email__iexact=email)
-    except User.DoesNotExist:
+    user = users_with_email(email).first()
+    if not user:
         return _error("No user found with provided email", 404)
-    except User.MultipleObjectsReturned:
-        user = User.objects.filter(email__iexact=email).order_by("id").first()
-        if not user:
-            return _error("No user found with provided email", 404)
 
     password_error = _validate_user_password(new_password, user=user)
     if password_error:
@@ -248,20 +450,20 @@ def logout_view(request):
 
 
 @require_http_methods(["GET"])
-def me_view(request):
-    auth_error = _require_auth(request)
-    if auth_error:
-        return auth_error
+async def me_view(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _error("Authentication required", 401)
 
-    profile = _profile_for(request.user)
+    profile = await _aprofile_for(user)
     return JsonResponse(
         {
-            "id": request.user.id,
-            "username": request.user.username,
-                "email": request.user.email,
-                "first_name": request.user.first_name,
-                "last_name": request.user.last_name,
-                "role": _role(request.user),
+            "id": user.id,
+            "username": user.username,
+                "email": user.email,
+                "first_name": user.first_name,
+                "last_name": user.last_name,
+                "role": await _arole(user),
                 "phone": profile.phone,
                 "address": profile.address,
             }
@@ -294,13 +496,18 @@ def profile_view(request):
         return _error("Invalid JSON payload")
 
     email = (data.get("email") or request.user.email).strip()
-    if User.objects.exclude(id=request.user.id).filter(email__iexact=email).exists():
+    if email and users_with_email(email).exclude(id=request.user.id).exists():
         return _error("Email already exists")
 
     request.user.first_name = (data.get("first_name") or request.user.first_name).strip()
     request.user.last_name = (data.get("last_name") or request.user.last_name).strip()
     request.user.email = email
-    request.user.save()
+    try:
+        with transaction.atomic():
+            request.user.save()
+    except IntegrityError:
+        # Lost a race against another account claiming the same email (unique LOWER(email) index).
+        return _error("Email already exists")
 
     profile.phone = (data.get("phone") or profile.phone).strip()
     profile.address = (data.get("address") or profile.address).strip()
@@ -324,21 +531,42 @@ def profile_view(request):
 
 
 @require_http_methods(["GET", "POST"])
-def requests_view(request):
-    auth_error = _require_auth(request)
-    if auth_error:
-        return auth_error
+async def requests_view(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _error("Authentication required", 401)
 
-    role = _role(request.user)
-    if request.method == "GET":
-        qs = EWasteRequest.objects.select_related("user", "assigned_collector").order_by("-created_at")
-        if role == UserProfile.ROLE_USER:
-            qs = qs.filter(user=request.user)
-        elif role == UserProfile.ROLE_COLLECTOR:
-            qs = qs.filter(assigned_collector=request.user)
-        data = [_serialize_request(item) for item in qs]
-        return JsonResponse(data, safe=False)
+    role = await _arole(user)
+    if request.method == "POST":
+        return await sync_to_async(_create_request)(request, user, role)
+
+    scope = _scoped_requests(user, role)
+    etag = await _list_etag(request, user, role, scope)
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+    qs, filter_error = await _afilter_requests(scope, request.GET)
+    if filter_error:
+        return filter_error
+    cursor = (request.GET.get("cursor") or "").strip()
+
+    if "page_size" not in request.GET and not cursor:
+        # Legacy clients get the full list as a bare array.
+        data = [serialize_request_row(row) async for row in request_rows(qs.order_by("-created_at"))]
+        return _with_etag(JsonResponse(data, safe=False), etag)
 
+    try:
+        page_size = parse_page_size(
+            request.GET.get("page_size"), settings.REQUESTS_PAGE_SIZE, settings.REQUESTS_MAX_PAGE_SIZE
+        )
+        rows, next_cursor = await akeyset_page(request_rows(qs), page_size, cursor or None)
+    except ValueError as exc:
+        return _error(str(exc))
+    response = JsonResponse({"results": [serialize_request_row(row) for row in rows], "next": next_cursor})
+    return _with_etag(response, etag)
+
+
+def _create_request(request, user, role):
     data = _json_body(request)
     if data is None:
         return _error("Invalid JSON payload")
@@ -366,44 +594,137 @@ def requests_view(request):
         return _error("pickup_date cannot be in the past")
     if quantity < 1:
         return _error("quantity must be at least 1")
+    (latitude, longitude), coordinates_error = _parse_coordinates(data.get("latitude"), data.get("longitude"))
+    if coordinates_error:
+        return coordinates_error
 
     req = EWasteRequest.objects.create(
-        user=request.user,
+        user=user,
         item_type=item_type,
         quantity=quantity,
         condition=condition,
         brand=brand,
         pickup_address=pickup_address,
         pickup_date=parsed_date,
+        latitude=latitude,
+        longitude=longitude,
         notes=notes,
     )
     return JsonResponse(_serialize_request(req), status=201)
 
 
-@require_http_methods(["GET", "PATCH"])
-def request_detail_view(request, request_id):
+@require_http_methods(["GET"])
+def export_requests_view(request):
     auth_error = _require_auth(request)
     if auth_error:
         return auth_error
+    if _role(request.user) != UserProfile.ROLE_ADMIN:
+        return _error("Only admins can export requests", 403)
 
-    role = _role(request.user)
+    export_format = (request.GET.get("format") or "ndjson").strip().lower()
+    if export_format not in {"ndjson", "csv"}:
+        return _error("format must be ndjson or csv")
+
+    qs, filter_error = _filter_requests(EWasteRequest.objects.order_by("id"), request.GET)
+    if filter_error:
+        return filter_error
+
+    if export_format == "csv":
+        writer = csv.writer(_Echo())
+        header = writer.writerow(EXPORT_CSV_COLUMNS)
+        content_type = "text/csv; charset=utf-8"
+
+        def line(row):
+            return writer.writerow(_export_csv_row(row))
+
+    else:
+        header = ""
+        content_type = "application/x-ndjson"
+
+        def line(row):
+            return json.dumps(serialize_request_row(row)) + "\n"
+
+    # (a)iterator() streams rows from the cursor in chunks instead of caching the whole result set.
+    rows = request_rows(qs)
+    if isinstance(request, ASGIRequest):
+        # ASGI reads a synchronous iterator into memory before sending anything.
+        async def stream():
+            if header:
+                yield header
+            async for row in rows.aiterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+                yield line(row)
+
+    else:
+
+        def stream():
+            if header:
+                yield header
+            for row in rows.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+                yield line(row)
+
+    response = StreamingHttpResponse(stream(), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="ewaste_requests.{export_format}"'
+    return response
+
+
+@require_http_methods(["GET"])
+async def request_events_view(request):
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker would be pinned to one client for the life of the stream.
+        return _error("The change feed is only available when served through backend.asgi", 503)
+
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _error("Authentication required", 401)
+    role = await _arole(user)
+
+    last_event_id = (request.headers.get("Last-Event-ID") or request.GET.get("last_event_id") or "").strip()
+    if last_event_id:
+        try:
+            last_id = int(last_event_id)
+        except ValueError:
+            return _error("Last-Event-ID must be a number")
+    else:
+        last_id = await latest_event_id()
+
+    response = StreamingHttpResponse(event_stream(user, role, last_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@require_http_methods(["GET", "PATCH"])
+async def request_detail_view(request, request_id):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _error("Authentication required", 401)
+
+    role = await _arole(user)
     try:
-        req = EWasteRequest.objects.select_related("user", "assigned_collector").get(id=request_id)
+        req = await EWasteRequest.objects.select_related("user", "assigned_collector").aget(id=request_id)
     except EWasteRequest.DoesNotExist:
         return _error("Request not found", 404)
 
-    if role == UserProfile.ROLE_USER and req.user_id != request.user.id:
+    if role == UserProfile.ROLE_USER and req.user_id != user.id:
         return _error("Forbidden", 403)
-    if role == UserProfile.ROLE_COLLECTOR and req.assigned_collector_id != request.user.id:
+    if role == UserProfile.ROLE_COLLECTOR and req.assigned_collector_id != user.id:
         return _error("Forbidden", 403)
 
-    if request.method == "GET":
-        return JsonResponse(_serialize_request(req))
+    if request.method == "PATCH":
+        return await sync_to_async(_edit_request)(request, req, user, role)
+
+    etag = _make_etag("detail", role, user.id, req.id, req.updated_at.isoformat())
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+    return _with_etag(JsonResponse(_serialize_request(req)), etag)
 
+
+def _edit_request(request, req, user, role):
     data = _json_body(request)
     if data is None:
         return _error("Invalid JSON payload")
-    if role != UserProfile.ROLE_USER or req.user_id != request.user.id:
+    if role != UserProfile.ROLE_USER or req.user_id != user.id:
         return _error("Only request owner can edit this request", 403)
     if req.status != EWasteRequest.STATUS_PENDING:
         return _error("Only pending requests can be edited")
@@ -434,6 +755,12 @@ def request_detail_view(request, request_id):
             return _error("pickup_date cannot be in the past")
         req.pickup_date = parsed_date
 
+    if "latitude" in data or "longitude" in data:
+        coordinates, coordinates_error = _parse_coordinates(data.get("latitude"), data.get("longitude"))
+        if coordinates_error:
+            return coordinates_error
+        req.latitude, req.longitude = coordinates
+
     req.save()
     return JsonResponse(_serialize_request(req))
 
@@ -464,7 +791,7 @@ def assign_request_view(request, request_id):
         return _error("Request not found", 404)
 
     try:
-        collector = User.objects.get(id=collector_id)
+        collector = User.objects.select_related("profile").get(id=collector_id)
     except User.DoesNotExist:
         return _error("Collector not found", 404)
 
@@ -477,6 +804,105 @@ def assign_request_view(request, request_id):
     return JsonResponse(_serialize_request(req))
 
 
+def _parse_assignments(items):
+    # Returns (results, pending): results holds one slot per item, pre-filled for malformed ones;
+    # pending maps request_id -> (index, collector_id) for the items still to be applied.
+    results = [None] * len(items)
+    pending = {}
+    for index, item in enumerate(items):
+        request_id = item.get("request_id") if isinstance(item, dict) else None
+        collector_id = item.get("collector_id") if isinstance(item, dict) else None
+        try:
+            request_id = int(request_id)
+            collector_id = int(collector_id)
+        except (TypeError, ValueError):
+            results[index] = {"request_id": request_id, "collector_id": collector_id, "ok": False,
+                              "error": "request_id and collector_id must be valid numbers"}
+            continue
+        if request_id in pending:
+            results[index] = {"request_id": request_id, "collector_id": collector_id, "ok": False,
+                              "error": "Duplicate request_id in payload"}
+            continue
+        pending[request_id] = (index, collector_id)
+    return results, pending
+
+
+@require_http_methods(["POST"])
+def bulk_assign_view(request):
+    auth_error = _require_auth(request)
+    if auth_error:
+        return auth_error
+    if _role(request.user) != UserProfile.ROLE_ADMIN:
+        return _error("Only admins can assign collectors", 403)
+
+    data = _json_body(request)
+    if data is None:
+        return _error("Invalid JSON payload")
+    items = data.get("assignments")
+    if not isinstance(items, list) or not items:
+        return _error("assignments must be a non-empty list")
+    if len(items) > settings.BULK_ASSIGN_MAX_ITEMS:
+        return _error(f"At most {settings.BULK_ASSIGN_MAX_ITEMS} assignments per request")
+
+    results, pending = _parse_assignments(items)
+    collector_ids = {collector_id for _, collector_id in pending.values()}
+    collectors = set(
+        User.objects.filter(id__in=collector_ids, profile__role=UserProfile.ROLE_COLLECTOR).values_list("id", flat=True)
+    )
+
+    with transaction.atomic():
+        requests_by_id = EWasteRequest.objects.select_for_update().in_bulk(list(pending))
+        pairs = []
+        for request_id, (index, collector_id) in pending.items():
+            result = {"request_id": request_id, "collector_id": collector_id, "ok": False}
+            results[index] = result
+            req = requests_by_id.get(request_id)
+            if req is None:
+                result["error"] = "Request not found"
+                continue
+            if collector_id not in collectors:
+                result["error"] = "Selected user is not a collector"
+                continue
+            pairs.append((req, collector_id))
+            result.update(ok=True, status=EWasteRequest.STATUS_ASSIGNED)
+        assigned = write_assignments(pairs)
+
+    return JsonResponse({"assigned": assigned, "failed": len(results) - assigned, "results": results})
+
+
+@require_http_methods(["POST"])
+def auto_assign_view(request):
+    auth_error = _require_auth(request)
+    if auth_error:
+        return auth_error
+    if _role(request.user) != UserProfile.ROLE_ADMIN:
+        return _error("Only admins can assign collectors", 403)
+
+    data = _json_body(request)
+    if data is None:
+        return _error("Invalid JSON payload")
+    apply = data.get("apply", False)
+    if not isinstance(apply, bool):
+        return _error("apply must be true or false")
+
+    plan = plan_assignments()
+    assigned = apply_plan(plan) if apply else 0
+    return JsonResponse(
+        {
+            "applied": apply,
+            "planned": len(plan["assignments"]),
+            "assigned": assigned,
+            "collectors": [
+                {"collector_id": collector_id, **summary} for collector_id, summary in plan["collectors"].items()
+            ],
+            "assignments": [
+                {"request_id": request_id, "collector_id": collector_id}
+                for request_id, collector_id in plan["assignments"]
+            ],
+        }
+    )
+
+
 @require_http_methods(["POST"])
 def update_status_view(request, request_id):
     auth_error = _require_auth(request)
@@ -521,8 +947,13 @@ def collectors_view(request):
 
     collectors = (
         User.objects.filter(profile__role=UserProfile.ROLE_COLLECTOR)
+        .annotate(
+            open_assignments=Count(
+                "assigned_requests", filter=Q(assigned_requests__status=EWasteRequest.STATUS_ASSIGNED)
+            )
+        )
         .order_by("username")
-        .values("id", "username", "email")
+        .values("id", "username", "email", "open_assignments")
     )
     return JsonResponse(list(collectors), safe=False)
 
@@ -548,20 +979,15 @@ def register_collector_view(request):
 
     if not first_name or not last_name or not email or not password:
         return _error("first_name, last_name, email and password are required")
-    if User.objects.filter(email__iexact=email).exists():
+    if users_with_email(email).exists():
         return _error("Email already exists")
     password_error = _validate_user_password(password)
     if password_error:
         return password_error
 
-    username = _build_unique_username_from_email(email)
-    collector = User.objects.create_user(
-        username=username,
-        email=email,
-        password=password,
-        first_name=first_name,
-        last_name=last_name,
-    )
+    collector = _create_user_from_email(email, password, first_name=first_name, last_name=last_name)
+    if collector is None:
+        return _error("Email already exists")
     profile = _profile_for(collector)
     profile.role = UserProfile.ROLE_COLLECTOR
     profile.phone = phone
@@ -593,30 +1019,167 @@ def csrf_view(request):
 
 
 @require_http_methods(["GET"])
-def dashboard_stats_view(request):
+async def dashboard_stats_view(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _error("Authentication required", 401)
+    if await _arole(user) != UserProfile.ROLE_ADMIN:
+        return _error("Only admins can view dashboard stats", 403)
+
+    counts = await astatus_counts()
+    return JsonResponse(
+        {
+            "total_requests": counts["total"],
+            "pending_requests": counts[EWasteRequest.STATUS_PENDING],
+            "assigned_requests": counts[EWasteRequest.STATUS_ASSIGNED],
+            "completed_requests": counts[EWasteRequest.STATUS_COMPLETED],
+            "cancelled_requests": counts[EWasteRequest.STATUS_CANCELLED],
+        }
+    )
+
+
+def _metrics_token_ok(request):
+    token = settings.METRICS_TOKEN
+    if not token:
+        return False
+    return hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+
+
+@require_http_methods(["GET"])
+def metrics_view(request):
+    if not _metrics_token_ok(request):
+        auth_error = _require_auth(request)
+        if auth_error:
+            return auth_error
+        if _role(request.user) != UserProfile.ROLE_ADMIN:
+            return _error("Only admins can view metrics", 403)
+    if not settings.METRICS_ENABLED:
+        return _error("Metrics are disabled", 404)
+
+    # Publish this worker's latest numbers; the others flush on their own timer.
+    get_store().flush()
+    return HttpResponse(
+        render_prometheus(merged_snapshot(settings.METRICS_DIR)),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@require_http_methods(["GET"])
+def nearby_requests_view(request):
     auth_error = _require_auth(request)
     if auth_error:
         return auth_error
     if _role(request.user) != UserProfile.ROLE_ADMIN:
-        return _error("Only admins can view dashboard stats", 403)
+        return _error("Only admins can search nearby pickups", 403)
+
+    if not request.GET.get("lat") or not request.GET.get("lng"):
+        return _error("lat and lng query parameters are required")
+    (latitude, longitude), coordinates_error = _parse_coordinates(request.GET.get("lat"), request.GET.get("lng"))
+    if coordinates_error:
+        return coordinates_error
+    try:
+        radius_km = float(request.GET.get("radius_km") or settings.NEARBY_DEFAULT_RADIUS_KM)
+        limit = int(request.GET.get("limit") or settings.NEARBY_DEFAULT_LIMIT)
+    except ValueError:
+        return _error("radius_km and limit must be valid numbers")
+    if not 0 < radius_km <= settings.NEARBY_MAX_RADIUS_KM:
+        return _error(f"radius_km must be greater than 0 and at most {settings.NEARBY_MAX_RADIUS_KM}")
+    if limit < 1:
+        return _error("limit must be at least 1")
+
+    pending = EWasteRequest.objects.filter(status=EWasteRequest.STATUS_PENDING, grid_cell__isnull=False)
+    matches = nearby(
+        pending.select_related("user", "assigned_collector"),
+        latitude,
+        longitude,
+        radius_km,
+        min(limit, settings.NEARBY_MAX_LIMIT),
+    )
+    return JsonResponse(
+        {
+            "results": [
+                {"distance_km": round(distance, 3), "request": _serialize_request(req)} for distance, req in matches
+            ]
+        }
+    )
+
+
+@require_http_methods(["GET"])
+def route_view(request):
+    auth_error = _require_auth(request)
+    if auth_error:
+        return auth_error
 
-    total = EWasteRequest.objects.count()
-    pending = EWasteRequest.objects.filter(status=EWasteRequest.STATUS_PENDING).count()
-    assigned = EWasteRequest.objects.filter(status=EWasteRequest.STATUS_ASSIGNED).count()
-    completed = EWasteRequest.objects.filter(status=EWasteRequest.STATUS_COMPLETED).count()
-    cancelled = EWasteRequest.objects.filter(status=EWasteRequest.STATUS_CANCELLED).count()
+    role = _role(request.user)
+    if role == UserProfile.ROLE_COLLECTOR:
+        collector_id = request.user.id
+    elif role == UserProfile.ROLE_ADMIN:
+        try:
+            collector_id = int(request.GET.get("collector_id") or "")
+        except ValueError:
+            return _error("collector_id is required")
+    else:
+        return _error("Only collectors and admins can plan routes", 403)
 
+    try:
+        pickup_date = date.fromisoformat((request.GET.get("date") or "").strip())
+    except ValueError:
+        return _error("date query parameter is required in YYYY-MM-DD format")
+    start, start_error = _parse_coordinates(request.GET.get("start_lat"), request.GET.get("start_lng"))
+    if start_error:
+        return start_error
+
+    stops = list(
+        EWasteRequest.objects.filter(
+            assigned_collector_id=collector_id, pickup_date=pickup_date, status=EWasteRequest.STATUS_ASSIGNED
+        )
+        .select_related("user", "assigned_collector")
+        .order_by("id")
+    )
+    located = [req for req in stops if req.latitude is not None]
+    order, legs = plan_route(
+        [(req.latitude, req.longitude) for req in located],
+        start=start if start[0] is not None else None,
+        time_budget=settings.ROUTE_OPTIMIZE_SECONDS,
+    )
     return JsonResponse(
         {
-            "total_requests": total,
-            "pending_requests": pending,
-            "assigned_requests": assigned,
-            "completed_requests": completed,
-            "cancelled_requests": cancelled,
+            "date": pickup_date.isoformat(),
+            "collector_id": collector_id,
+            "distance_km": round(sum(legs), 3),
+            "stops": [
+                {"sequence": sequence, "leg_km": round(leg, 3), "request": _serialize_request(located[index])}
+                for sequence, (index, leg) in enumerate(zip(order, legs), start=1)
+            ],
+            # Pickups without coordinates cannot be placed on the route; listed for manual handling.
+            "unrouted": [_serialize_request(req) for req in stops if req.latitude is None],
         }
     )
 
 
+def _parse_report_month(value):
+    month_param = (value or "").strip()
+    if not month_param:
+        return None, _error("month query parameter is required in YYYY-MM format")
+    try:
+        return datetime.strptime(month_param, "%Y-%m"), None
+    except ValueError:
+        return None, _error("Invalid month format. Use YYYY-MM")
+
+
+def _serialize_report_job(job):
+    return {
+        "id": str(job.id),
+        "month": job.month.strftime("%Y-%m"),
+        "status": job.status,
+        "error": job.error or None,
+        "created_at": job.created_at.isoformat(),
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "status_url": f"/api/reports/jobs/{job.id}/",
+        "download_url": f"/api/reports/jobs/{job.id}/download/" if job.status == ReportJob.STATUS_DONE else None,
+    }
+
+
 @require_http_methods(["GET"])
 def monthly_report_pdf_view(request):
     auth_error = _require_auth(request)
@@ -625,194 +1188,76 @@ def monthly_report_pdf_view(request):
     if _role(request.user) != UserProfile.ROLE_ADMIN:
         return _error("Only admins can export reports", 403)
 
-    month_param = (request.GET.get("month") or "").strip()
-    if not month_param:
-        return _error("month query parameter is required in YYYY-MM format")
+    month_date, month_error = _parse_report_month(request.GET.get("month"))
+    if month_error:
+        return month_error
 
+    year = month_date.year
+    month = month_date.month
     try:
-        month_date = datetime.strptime(month_param, "%Y-%m")
-    except ValueError:
-        return _error("Invalid month format. Use YYYY-MM")
+        handle = open_monthly_report(year, month, request.user.username)
+    except ImportError:
+        return _error("PDF library not installed. Please install reportlab.", 500)
+
+    filename = f"monthly_collection_{year}_{month:02d}.pdf"
+    response = FileResponse(handle, as_attachment=True, filename=filename, content_type="application/pdf")
+    return stream_file_async(response) if isinstance(request, ASGIRequest) else response
 
+
+@require_http_methods(["POST"])
+def report_jobs_view(request):
+    auth_error = _require_auth(request)
+    if auth_error:
+        return auth_error
+    if _role(request.user) != UserProfile.ROLE_ADMIN:
+        return _error("Only admins can export reports", 403)
+
+    data = _json_body(request)
+    if data is None:
+        return _error("Invalid JSON payload")
+    month_date, month_error = _parse_report_month(data.get("month"))
+    if month_error:
+        return month_error
+
+    job, created = submit_monthly_report(month_date.year, month_date.month, request.user)
+    return JsonResponse(_serialize_report_job(job), status=202 if created else 200)
+
+
+def _report_job_for(request, job_id):
+    auth_error = _require_auth(request)
+    if auth_error:
+        return None, auth_error
+    if _role(request.user) != UserProfile.ROLE_ADMIN:
+        return None, _error("Only admins can export reports", 403)
     try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib import colors
-        from reportlab.pdfgen import canvas
-    except Exception:
-        return _error("PDF library not installed. Please install reportlab.", 500)
+        return ReportJob.objects.get(id=job_id), None
+    except ReportJob.DoesNotExist:
+        return None, _error("Report job not found", 404)
 
-    year = month_date.year
-    month = month_date.month
 
-    requests_qs = (
-        EWasteRequest.objects.select_related("user", "assigned_collector")
-        .filter(pickup_date__year=year, pickup_date__month=month, status=EWasteRequest.STATUS_COMPLETED)
-        .order_by("pickup_date")
-    )
-    requests = list(requests_qs)
-
-    buffer = BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-    left = 36
-    right = width - 36
-    total_collections = len(requests)
-    total_quantity = sum(item.quantity for item in requests)
-    unique_users = len({item.user_id for item in requests})
-    unique_collectors = len({item.assigned_collector_id for item in requests if item.assigned_collector_id})
-    item_counter = Counter()
-    for item in requests:
-        item_counter[item.item_type] += item.quantity
-
-    header_bg = colors.HexColor("#0B7A66")
-    accent_bg = colors.HexColor("#E8F6F2")
-    accent_bg_2 = colors.HexColor("#E7F2FA")
-    line_color = colors.HexColor("#D4E5DF")
-    text_dark = colors.HexColor("#10212A")
-    text_muted = colors.HexColor("#526370")
-    panel_bg = colors.HexColor("#F6FAFC")
-
-    def _truncate(value, size):
-        value = str(value)
-        return value if len(value) <= size else f"{value[:size-1]}..."
-
-    def draw_page_header(page_no):
-        # Soft page panel to improve print/readability over white paper.
-        pdf.setFillColor(panel_bg)
-        pdf.roundRect(24, 20, width - 48, height - 40, 16, stroke=0, fill=1)
-
-        pdf.setFillColor(header_bg)
-        pdf.roundRect(24, height - 103, width - 48, 86, 14, stroke=0, fill=1)
-
-        pdf.setFillColor(colors.white)
-        pdf.setFont("Helvetica-Bold", 18)
-        title_x = left + 6
-        pdf.drawString(title_x, height - 48, "Smart E-Waste Collection System")
-        pdf.setFont("Helvetica", 11)
-        pdf.drawString(title_x, height - 68, f"Monthly Collection Report - {month_name[month]} {year}")
-        pdf.drawRightString(right - 6, height - 68, f"Generated by: {request.user.username}")
-        pdf.setFont("Helvetica", 10)
-        pdf.drawRightString(right - 6, height - 84, f"Page {page_no}")
-        pdf.setFont("Helvetica-Bold", 9)
-        pdf.setFillColor(colors.HexColor("#D2F4E9"))
-        pdf.drawString(left + 8, height - 86, "Environment First")
-
-    def draw_summary_cards(y_top):
-        card_width = (right - left - 18) / 4
-        labels = [
-            ("Completed Pickups", total_collections),
-            ("Total Items", total_quantity),
-            ("Unique Users", unique_users),
-            ("Collectors", unique_collectors),
-        ]
-        for index, (label, value) in enumerate(labels):
-            x = left + (card_width + 6) * index
-            pdf.setFillColor(accent_bg if index % 2 == 0 else accent_bg_2)
-            pdf.roundRect(x, y_top - 52, card_width, 44, 8, stroke=0, fill=1)
-            pdf.setFillColor(text_dark)
-            pdf.setFont("Helvetica-Bold", 12)
-            pdf.drawString(x + 8, y_top - 27, str(value))
-            pdf.setFont("Helvetica", 8)
-            pdf.setFillColor(text_muted)
-            pdf.drawString(x + 8, y_top - 40, label)
-
-    def draw_item_breakdown(y_top):
-        pdf.setFillColor(colors.white)
-        pdf.roundRect(left, y_top - 78, right - left, 66, 10, stroke=0, fill=1)
-        pdf.setFillColor(text_dark)
-        pdf.setFont("Helvetica-Bold", 10)
-        pdf.drawString(left + 10, y_top - 25, "Top Collected Item Types")
-
-        top_items = item_counter.most_common(3)
-        if not top_items:
-            pdf.setFillColor(text_muted)
-            pdf.setFont("Helvetica-Oblique", 9)
-            pdf.drawString(left + 10, y_top - 42, "No completed collections for this month.")
-            return y_top - 86
-
-        max_count = top_items[0][1] if top_items else 1
-        bar_area_width = 140
-        for idx, (item_name, count) in enumerate(top_items):
-            row_y = y_top - 42 - (idx * 16)
-            pdf.setFillColor(text_muted)
-            pdf.setFont("Helvetica", 8.5)
-            pdf.drawString(left + 10, row_y, _truncate(item_name, 22))
-            pdf.setFillColor(colors.HexColor("#D9EAF6"))
-            pdf.roundRect(left + 160, row_y - 3, bar_area_width, 8, 4, stroke=0, fill=1)
-            bar_width = 0 if max_count == 0 else (count / max_count) * bar_area_width
-            pdf.setFillColor(colors.HexColor("#0F4F7A"))
-            pdf.roundRect(left + 160, row_y - 3, bar_width, 8, 4, stroke=0, fill=1)
-            pdf.setFillColor(text_dark)
-            pdf.setFont("Helvetica-Bold", 8)
-            pdf.drawString(left + 306, row_y, str(count))
-        return y_top - 86
-
-    def draw_table_header(y):
-        pdf.setFillColor(colors.HexColor("#0F4F7A"))
-        pdf.rect(left, y - 15, right - left, 15, stroke=0, fill=1)
-        pdf.setFillColor(colors.white)
-        pdf.setFont("Helvetica-Bold", 8.5)
-        pdf.drawString(left + 4, y - 10, "ID")
-        pdf.drawString(left + 30, y - 10, "DATE")
-        pdf.drawString(left + 90, y - 10, "USER")
-        pdf.drawString(left + 180, y - 10, "ITEM TYPE")
-        pdf.drawString(left + 312, y - 10, "QTY")
-        pdf.drawString(left + 344, y - 10, "COLLECTOR")
-        pdf.drawString(left + 440, y - 10, "ADDRESS")
-        return y - 18
-
-    page_no = 1
-    draw_page_header(page_no)
-    draw_summary_cards(height - 102)
-    y = draw_item_breakdown(height - 154)
-    y = draw_table_header(y - 8)
-
-    if not requests:
-        pdf.setFont("Helvetica-Oblique", 10)
-        pdf.setFillColor(text_muted)
-        pdf.drawString(left + 4, y - 6, "No completed collections found for this month.")
-    else:
-        for index, req in enumerate(requests):
-            if y < 64:
-                pdf.setStrokeColor(line_color)
-                pdf.line(left, 42, right, 42)
-                pdf.setFillColor(text_muted)
-                pdf.setFont("Helvetica", 8)
-                pdf.drawRightString(right, 28, f"Generated on {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-                pdf.showPage()
-                page_no += 1
-                draw_page_header(page_no)
-                draw_summary_cards(height - 102)
-                y = draw_item_breakdown(height - 154)
-                y = draw_table_header(y - 8)
-
-            if index % 2 == 0:
-                pdf.setFillColor(colors.HexColor("#F8FBFD"))
-                pdf.rect(left, y - 12, right - left, 14, stroke=0, fill=1)
-
-            collector_name = req.assigned_collector.username if req.assigned_collector else "-"
-            pdf.setFillColor(text_dark)
-            pdf.setFont("Helvetica", 8)
-            pdf.drawString(left + 4, y - 8, str(req.id))
-            pdf.drawString(left + 30, y - 8, req.pickup_date.isoformat())
-            pdf.drawString(left + 90, y - 8, _truncate(req.user.username, 16))
-            pdf.drawString(left + 180, y - 8, _truncate(req.item_type, 24))
-            pdf.drawString(left + 312, y - 8, str(req.quantity))
-            pdf.drawString(left + 344, y - 8, _truncate(collector_name, 16))
-            pdf.drawString(left + 440, y - 8, _truncate(req.pickup_address, 24))
-            y -= 14
-
-    pdf.setStrokeColor(line_color)
-    pdf.line(left, 42, right, 42)
-    pdf.setFillColor(text_muted)
-    pdf.setFont("Helvetica", 8)
-    pdf.drawString(left, 28, f"Report Month: {month_name[month]} {year}")
-    pdf.drawCentredString(width / 2, 28, "Smart E-Waste Management - Zanzibar")
-    pdf.drawRightString(right, 28, f"Generated on {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-    pdf.save()
-    buffer.seek(0)
+@require_http_methods(["GET"])
+def report_job_detail_view(request, job_id):
+    job, error = _report_job_for(request, job_id)
+    if error:
+        return error
+    return JsonResponse(_serialize_report_job(job))
 
-    filename = f"monthly_collection_{year}_{month:02d}.pdf"
-    response = HttpResponse(buffer.getvalue(), content_type="application/pdf")
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return response
+
+@require_http_methods(["GET"])
+def report_job_download_view(request, job_id):
+    job, error = _report_job_for(request, job_id)
+    if error:
+        return error
+    if job.status != ReportJob.STATUS_DONE:
+        return _error("Report is not ready yet", 409)
+    try:
+        handle = open(job_output_path(job.id), "rb")
+    except FileNotFoundError:
+        return _error("Report file has expired; submit the job again", 410)
+    response = FileResponse(
+        handle,
+        as_attachment=True,
+        filename=f"monthly_collection_{job.month:%Y_%m}.pdf",
+        content_type="application/pdf",
+    )
+    return stream_file_async(response) if isinstance(request, ASGIRequest) else response
@@ -0,0 +1,78 @@
+import asyncio
+import importlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+# Imported lazily by the views that use them; warming them here keeps the first request that needs one
+# (the monthly PDF report) from paying for the import.
+WARM_MODULES = (
+    "reportlab.lib.colors",
+    "reportlab.lib.pagesizes",
+    "reportlab.pdfgen.canvas",
+)
+
+
+def _warm_urls():
+    # url_patterns imports the URLconfs and every view module; reverse_dict builds the reverse lookup.
+    resolver = get_resolver()
+    resolver.url_patterns
+    resolver.reverse_dict
+
+
+def _warm_modules():
+    for name in WARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            logger.warning("Startup warmup could not import %s", name)
+
+
+def _check_databases():
+    # Each connection is opened, checked and closed again: the same module is imported by a gunicorn
+    # --preload master, and neither a socket nor a pool's threads may cross the fork. The driver import
+    # and the backend's one-off setup are what the first request would otherwise pay for.
+    for connection in connections.all():
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except Exception:
+            logger.exception("Startup warmup could not reach database %r", connection.alias)
+        finally:
+            connection.close()
+            if hasattr(connection, "close_pool"):  # PostgreSQL; a no-op unless pooling is on
+                connection.close_pool()
+
+
+def _warm_databases():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        _check_databases()
+        return
+    # uvicorn imports the application inside its running event loop, where Django refuses blocking
+    # database calls; the loop has nothing else to do until the import returns.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        executor.submit(_check_databases).result()
+
+
+def warm_up():
+    """Do the one-off work of a worker's first requests at boot; returns seconds spent per step.
+
+    Called by backend.wsgi and backend.asgi when STARTUP_WARMUP is on. A database that cannot be
+    reached is logged rather than raised, so a slow database does not keep the worker from starting.
+    """
+    timings = {}
+    for name, step in (("urls", _warm_urls), ("modules", _warm_modules), ("databases", _warm_databases)):
+        started = time.perf_counter()
+        step()
+        timings[name] = time.perf_counter() - started
+    logger.info(
+        "Startup warmup: %s", ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items())
+    )
+    return timings
@@ -9,6 +9,9 @@ import CollectorDashboard from "./pages/CollectorDashboard";
 import BackgroundShapes from "./components/BackgroundShapes";
 import UserProfilePage from "./pages/UserProfilePage";
 
+// Events that arrive within this window of each other are folded into one list refresh.
+const EVENT_REFRESH_DELAY_MS = 250;
+
 export default function App() {
   const readGuestView = () => {
     const hash = (window.location.hash || "").toLowerCase();
@@ -69,6 +72,33 @@ export default function App() {
     };
   }, []);
 
+  useEffect(() => {
+    if (!user) return undefined;
+    // Server-sent change events replace re-polling. A bulk or auto assign sends one event per request,
+    // and each one changes the list ETag, so events are coalesced: one refresh runs at a time, and
+    // any events that arrive meanwhile share a single trailing refresh.
+    let pending = false;
+    let running = false;
+    let closed = false;
+    const drain = async () => {
+      running = true;
+      while (pending && !closed) {
+        await new Promise((resolve) => setTimeout(resolve, EVENT_REFRESH_DELAY_MS));
+        pending = false;
+        await refresh();
+      }
+      running = false;
+    };
+    const unsubscribe = api.subscribeRequestEvents(() => {
+      pending = true;
+      if (!running) drain();
+    });
+    return () => {
+      closed = true;
+      unsubscribe();
+    };
+  }, [user?.id]);
+
   const onLogin = async (loggedInUser) => {
     saveUser(loggedInUser);
     setUserView("dashboard");
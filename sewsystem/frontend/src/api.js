@@ -63,7 +63,7 @@ export const api = {
   me: () => call("/me/"),
   getProfile: () => call("/profile/"),
   updateProfile: (payload) => call("/profile/", { method: "PATCH", body: JSON.stringify(payload) }),
-  listRequests: () => call("/requests/"),
+  listRequests: (filters) => call(filters ? `/requests/?${new URLSearchParams(filters)}` : "/requests/"),
   createRequest: (payload) => call("/requests/", { method: "POST", body: JSON.stringify(payload) }),
   updateRequest: (id, payload) => call(`/requests/${id}/`, { method: "PATCH", body: JSON.stringify(payload) }),
   listCollectors: () => call("/collectors/"),
@@ -79,6 +79,12 @@ export const api = {
       body: JSON.stringify({ status })
     }),
   dashboardStats: () => call("/dashboard/stats/"),
+  subscribeRequestEvents: (onEvent) => {
+    if (typeof EventSource === "undefined") return () => {};
+    const source = new EventSource(`${API_BASE}/requests/events/`, { withCredentials: true });
+    ["created", "assigned", "status_changed"].forEach((type) => source.addEventListener(type, onEvent));
+    return () => source.close();
+  },
   exportMonthlyReportPdf: async (month) => {
     const response = await fetch(`${API_BASE}/reports/monthly-pdf/?month=${encodeURIComponent(month)}`, {
       method: "GET",
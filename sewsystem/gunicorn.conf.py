@@ -0,0 +1,16 @@
+"""
+gunicorn settings, read from the working directory gunicorn is started in (sewsystem/ on Render).
+"""
+import os
+
+
+def on_starting(server):
+    # Runs once in the master when the service starts, before any worker is forked, whether or not
+    # the app is preloaded. Metrics snapshots left by the previous run's workers would otherwise be
+    # merged into this run's counters for as long as the directory lives.
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    from django.conf import settings
+
+    from ewaste.metrics import clear_snapshots
+
+    clear_snapshots(settings.METRICS_DIR)